@@ -1,11 +1,12 @@
 import os
-import pandas as pd
 
 name = 'pylabinstrument'
 
-def initialize(reset=False):
-
-	userprofile = os.environ['USERPROFILE']
+def configFolder():
+	"""
+	Return the .pylabinstrument folder in the user profile, creating it if needed.
+	"""
+	userprofile = os.environ.get('USERPROFILE', os.path.expanduser('~'))
 
 	foldername = '.'+name
 	fulldir = os.path.join(userprofile, foldername)
@@ -13,14 +14,24 @@ def initialize(reset=False):
 	if not os.path.exists(fulldir):
 		os.mkdir(fulldir)
 
+	return fulldir
+
+def initialize(reset=False):
+	import csv
+
+	fulldir = configFolder()
+
 	filename = 'dlllocations.csv'
 
 	# if the file does not exist, create an empty one
 	if not os.path.exists( os.path.join(fulldir, filename) ) or reset:
-		data = pd.DataFrame(columns=['item','location'])
-		data.to_csv(os.path.join(fulldir, filename), index=False)
+		with open(os.path.join(fulldir, filename), 'w', newline='') as f:
+			csv.writer(f).writerow(['item','location'])
 
 	return os.path.join(fulldir, filename)
 
 
-initialize()
+# Submodules are imported on first access (PEP 562). The config folder is created by locateDll when it is first needed.
+from .ctools.lazy import lazyImporter
+
+__getattr__, __dir__ = lazyImporter(__name__, ['ctools', 'ids', 'locateDll', 'oceanoptics', 'ophir', 'spectral', 'thorlabs'])
@@ -0,0 +1,102 @@
+"""
+Import-time benchmark. Each subpackage, and each driver module, is imported in a fresh interpreter with `python -X importtime` and its cumulative import time is checked against a budget.
+
+Run from the folder containing the package:
+    python -m pylabinstrument.benchmarks.importtime [--repeat 5] [--scale 1.0]
+
+Exit status is 1 if any module is over budget or pulls in a heavy dependency it is not allowed (see HEAVY and DRIVERS).
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+root = __package__.split('.')[0]
+
+# budget in milliseconds for `import <root>.<subpackage>`
+BUDGETS = {
+    '': 20,
+    'ctools': 20,
+    'ids': 20,
+    'oceanoptics': 20,
+    'ophir': 20,
+    'thorlabs': 20,
+    'thorlabs.motion': 20,
+    'thorlabs.powermeter': 20,
+    'thorlabs.spectrometer': 20,
+}
+
+# budget in milliseconds for `import <root>.<module>` of a driver, and the heavy modules it may import.
+# The budgets include numpy (about 50 ms) and visa/pyvisa (about 60 to 110 ms).
+DRIVERS = {
+    'thorlabs.powermeter.PMSeries': (200, ['numpy', 'visa', 'pyvisa']),
+    'thorlabs.spectrometer.CCS': (200, ['numpy', 'visa', 'pyvisa']),
+    'thorlabs.motion.KCubeDCServo': (100, ['numpy']),
+    'thorlabs.motion.DeviceManager': (30, []),
+    'ids.IDS': (100, ['numpy']),
+}
+
+# modules that must not be imported just by importing a package
+HEAVY = ['pandas', 'numpy', 'PyQt5', 'pyueye', 'visa', 'pyvisa', 'win32com', 'comtypes', 'seabreeze']
+
+
+def measure(modname, repeat=5):
+    """
+    Return (best cumulative import time in ms, list of top-level modules imported) for modname.
+    """
+    parent = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = parent + os.pathsep + env.get('PYTHONPATH', '')
+
+    best = None
+    imported = set()
+    for i in range(repeat):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(modname)],
+                              env=env, stderr=subprocess.PIPE, universal_newlines=True)
+        if proc.returncode!=0:
+            raise Exception('Failed to import {}:\n{}'.format(modname, proc.stderr))
+
+        total = 0
+        started = False
+        for line in proc.stderr.splitlines():
+            if not line.startswith('import time:') or '|' not in line:
+                continue
+            fields = line[len('import time:'):].split('|')
+            if not fields[0].strip().isdigit():
+                continue  # header line
+            name = fields[2][1:].rstrip()
+            if name.strip().split('.')[0]==root:
+                started = True
+            if started:
+                imported.add(name.strip().split('.')[0])
+            if name==name.lstrip() and name.split('.')[0]==root:
+                total += int(fields[1])
+        total = total/1000.0
+        best = total if best is None else min(best, total)
+    return best, sorted(imported)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check import time of each subpackage and driver module against a budget.')
+    parser.add_argument('--repeat', type=int, default=5, help='number of fresh interpreters per module; the best time is kept.')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply every budget, e.g. for slow machines.')
+    args = parser.parse_args(argv)
+
+    checks = [(sub, budget, []) for sub, budget in BUDGETS.items()]
+    checks += [(sub, budget, allowed) for sub, (budget, allowed) in DRIVERS.items()]
+
+    failed = False
+    print('{:<48}{:>10}{:>10}  {}'.format('module', 'ms', 'budget', 'heavy imports'))
+    for sub, budget, allowed in checks:
+        modname = root if sub=='' else root + '.' + sub
+        ms, imported = measure(modname, args.repeat)
+        heavy = [m for m in HEAVY if m in imported and m not in allowed]
+        budget = budget*args.scale
+        ok = ms<=budget and len(heavy)==0
+        failed = failed or not ok
+        print('{:<48}{:>10.2f}{:>10.1f}  {}{}'.format(modname, ms, budget, ', '.join(heavy) or '-', '' if ok else '  <-- FAIL'))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Per-reading overhead of PowerMeter.measure() versus the fast-read path (PowerReader.read and PowerReader.readInto), measured against the simulated TLPM backend with zero latency, so the numbers are the Python-side cost of a reading.
+
+Run from the folder containing the package:
+    python -m pylabinstrument.benchmarks.pm_measure [--n 100000]
+"""
+import sys
+import argparse
+from time import perf_counter
+
+import numpy as np
+
+root = __package__.split('.')[0]
+
+
+def timeit(func, n):
+    """
+    Return the best of 5 runs of func(n) in microseconds per reading, after a warm-up run.
+    """
+    func(min(n, 1000))
+    best = None
+    for i in range(5):
+        t0 = perf_counter()
+        func(n)
+        dt = (perf_counter()-t0)/n*1e6
+        best = dt if best is None else min(best, dt)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Per-reading overhead of the power meter read paths against the simulator.')
+    parser.add_argument('--n', type=int, default=100000, help='readings per run.')
+    args = parser.parse_args(argv)
+
+    import importlib
+    simulators = importlib.import_module(root + '.ctools.simulators')
+    PMSeries = importlib.import_module(root + '.thorlabs.powermeter.PMSeries')
+
+    sim = simulators.create('tlpm')
+    pm = PMSeries.PowerMeter(sim.devices[0][0])
+    pm._verbose = False
+    pm.library = sim
+    pm.open()
+
+    # cost of the simulated MeasurePower itself, to subtract from each path
+    handle = pm.instrumentHandle
+    def baseline(n):
+        power = PMSeries.c_double(0.0)
+        ref = PMSeries.byref(power)
+        f = sim.MeasurePower
+        for i in range(n):
+            f(handle, ref)
+
+    def measure(n):
+        for i in range(n):
+            pm.measure()
+
+    reader = pm.reader()
+    def read(n):
+        for i in range(n):
+            reader.read()
+
+    out = np.empty(args.n)
+    def readInto(n):
+        reader.readInto(out, n)
+
+    base = timeit(baseline, args.n)
+    print('{:<30}{:>14}{:>14}'.format('path', 'us/reading', 'overhead us'))
+    print('{:<30}{:>14.3f}{:>14}'.format('simulated MeasurePower', base, '-'))
+    for name, func in [('PowerMeter.measure', measure), ('PowerReader.read', read), ('PowerReader.readInto', readInto)]:
+        dt = timeit(func, args.n)
+        print('{:<30}{:>14.3f}{:>14.3f}'.format(name, dt, dt-base))
+
+    pm.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
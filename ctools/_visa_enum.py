@@ -29,5 +29,7 @@ ViPSession = POINTER(c_long)
 ViPUInt32 = POINTER(c_uint32)
 ViUInt32 = c_uint32
 ViChar = c_char
+ViReal32 = c_float
 ViReal64 = c_double
-ViInt16 = c_int16
\ No newline at end of file
+ViInt16 = c_int16
+ViInt32 = c_int32
\ No newline at end of file
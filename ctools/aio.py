@@ -0,0 +1,97 @@
+"""
+asyncio support for the blocking drivers.
+
+DLL calls run in a bounded thread pool (runBlocking), and wait loops poll with asyncio.sleep (pollUntil), so one event loop can drive many instruments at once. Calls to the same instrument are serialized with lockOf(instrument), as the vendor libraries do not allow overlapping calls on one session.
+
+    import asyncio
+    async def main():
+        await asyncio.gather(pm.measureAsync(), motor.moveToPositionAsync(45), ccs.sweepAsync())
+    asyncio.run(main())
+"""
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+# number of DLL calls that can run at the same time
+MAX_WORKERS = 16
+
+_executor = None
+_executorLock = threading.Lock()
+# event loop -> {instrument: asyncio.Lock}. An asyncio.Lock belongs to the loop it is first used in.
+_locks = weakref.WeakKeyDictionary()
+
+
+def getExecutor():
+    """
+    Return the thread pool the blocking calls run in, creating it on first use.
+    """
+    global _executor
+    if _executor is None:
+        with _executorLock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='pylabinstrument-aio')
+    return _executor
+
+
+def setMaxWorkers(n):
+    """
+    Change the number of worker threads. Calls already running finish in the old pool.
+    """
+    global MAX_WORKERS, _executor
+    with _executorLock:
+        MAX_WORKERS = int(n)
+        old, _executor = _executor, None
+    if old is not None:
+        old.shutdown(wait=False)
+
+
+async def runBlocking(func, *args, **kwargs):
+    """
+    Run func(*args, **kwargs) in the thread pool and return its result.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(getExecutor(), functools.partial(func, *args, **kwargs))
+
+
+async def pollUntil(predicate, interval=0.01, maxInterval=0.1, timeout=None):
+    """
+    Call the blocking predicate() in the thread pool until it returns a true value, sleeping between calls without blocking the event loop. The interval grows by half each time up to maxInterval.
+
+    INPUTS:
+    predicate -- a callable with no argument, e.g. lambda: not pm.isDarkAdjustRunning().
+    interval -- first sleep in seconds.
+    maxInterval -- longest sleep in seconds.
+    timeout -- seconds before asyncio.TimeoutError is raised. None waits forever.
+    OUTPUT:
+    the true value returned by predicate.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+    while True:
+        result = await runBlocking(predicate)
+        if result:
+            return result
+        sleep = interval
+        if deadline is not None:
+            remaining = deadline - loop.time()
+            if remaining<=0:
+                raise asyncio.TimeoutError('Condition not met within {} seconds.'.format(timeout))
+            sleep = min(sleep, remaining)
+        await asyncio.sleep(sleep)
+        interval = min(1.5*interval, maxInterval)
+
+
+def lockOf(instrument):
+    """
+    Return the asyncio.Lock that serializes the async calls of an instrument in the running event loop. Each loop (e.g. each asyncio.run()) gets its own lock, so an instrument can be used from one loop after another.
+    """
+    loop = asyncio.get_running_loop()
+    locks = _locks.get(loop)
+    if locks is None:
+        locks = _locks.setdefault(loop, weakref.WeakKeyDictionary())
+    lock = locks.get(instrument)
+    if lock is None:
+        lock = locks.setdefault(instrument, asyncio.Lock())
+    return lock
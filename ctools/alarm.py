@@ -0,0 +1,213 @@
+"""
+Threshold, hysteresis and rate-of-change alarms on a sample stream (see ctools.stream).
+
+An AlarmMonitor follows a stream on its own thread and evaluates its rules on each new block of samples with numpy, then calls onAlarm/onClear for every change of a rule's state. The latency of each event, from the time stamp of the sample to the callback, is kept in the event and recorded by ctools.instrumentation under ('alarm', rule name):
+
+    from pylabinstrument.ctools import alarm
+    stream = pm.stream()
+    monitor = alarm.AlarmMonitor(stream, [alarm.Threshold('low power', 0.8e-3, 'below', hysteresis=0.05e-3),
+                                          alarm.RateOfChange('jump', 1e-3)],
+                                 onAlarm=lambda event: shutter.close())
+    monitor.start()
+"""
+import collections
+import time
+import numpy as np
+
+from . import instrumentation
+from .worker import Worker
+
+AlarmEvent = collections.namedtuple('AlarmEvent', ['rule', 'state', 't', 'value', 'latency'])
+AlarmEvent.__doc__ = """
+A change of state of a rule. state is 'alarm' or 'clear'; t and value are those of the sample that caused it; latency is the time from t to the detection in seconds.
+"""
+
+
+def latch(setMask, clearMask, state):
+    """
+    Evaluate a set/reset latch over a block of samples without a Python loop.
+
+    INPUTS:
+    setMask -- boolean array, True where the latch is set. Set wins where both masks are True.
+    clearMask -- boolean array, True where the latch is reset.
+    state -- the state of the latch before the block.
+    OUTPUT:
+    a boolean array of the state after each sample.
+    """
+    n = len(setMask)
+    events = np.where(setMask, 1, np.where(clearMask, 0, -1))
+    last = np.maximum.accumulate(np.where(events>=0, np.arange(n), -1))
+    return np.where(last>=0, events[np.maximum(last, 0)]==1, bool(state))
+
+
+class Rule(object):
+    """
+    Base class of the alarm rules. A rule keeps its state between blocks; subclasses implement masks(t, value), returning the boolean arrays (set, clear) of the samples that raise and clear the alarm.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.active = False
+
+    def reset(self):
+        self.active = False
+
+    def masks(self, t, value):
+        raise NotImplementedError
+
+    def evaluate(self, t, value):
+        """
+        Return a boolean array of the alarm state after each sample of the block, and keep the last one.
+        """
+        setMask, clearMask = self.masks(t, value)
+        states = latch(setMask, clearMask, self.active)
+        if len(states)>0:
+            self.active = bool(states[-1])
+        return states
+
+
+class Threshold(Rule):
+    """
+    Alarm when the value goes below (or above) a limit. With hysteresis, the alarm clears only once the value is back past limit + hysteresis (or limit - hysteresis), so noise around the limit does not make it chatter.
+
+    INPUTS:
+    name -- name of the rule.
+    limit -- the limit, in the unit of the stream.
+    direction -- 'below' or 'above'.
+    hysteresis -- the clearing margin (>=0).
+    """
+
+    def __init__(self, name, limit, direction='below', hysteresis=0.0):
+        super().__init__(name)
+        if direction not in ('below', 'above'):
+            raise ValueError("direction must be 'below' or 'above'.")
+        self.limit = limit
+        self.direction = direction
+        self.hysteresis = abs(hysteresis)
+
+    def masks(self, t, value):
+        if self.direction=='below':
+            return value<self.limit, value>=self.limit+self.hysteresis
+        return value>self.limit, value<=self.limit-self.hysteresis
+
+
+class RateOfChange(Rule):
+    """
+    Alarm when the value changes faster than maxRate (unit per second) between consecutive samples, in either direction.
+
+    INPUTS:
+    name -- name of the rule.
+    maxRate -- the largest allowed |dvalue/dt|.
+    hysteresis -- the alarm clears once |dvalue/dt| <= maxRate - hysteresis.
+    """
+
+    def __init__(self, name, maxRate, hysteresis=0.0):
+        super().__init__(name)
+        self.maxRate = abs(maxRate)
+        self.hysteresis = abs(hysteresis)
+        self._last = None
+
+    def reset(self):
+        super().reset()
+        self._last = None
+
+    def masks(self, t, value):
+        n = len(value)
+        if n==0:
+            return np.zeros(0, bool), np.zeros(0, bool)
+        if self._last is None:
+            t0, v0 = t[0], value[0]
+        else:
+            t0, v0 = self._last
+        self._last = (t[-1], value[-1])
+        dt = np.diff(t, prepend=t0)
+        dv = np.diff(value, prepend=v0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.abs(np.where(dt>0, dv/dt, 0.0))
+        return rate>self.maxRate, rate<=self.maxRate-self.hysteresis
+
+
+class AlarmMonitor(Worker):
+    """
+    INPUTS:
+    stream -- a started stream (a ctools.stream.SampleStream, e.g. PowerMeter.stream() or OphirPM.stream()).
+    rules -- a list of Rule.
+    onAlarm -- called with an AlarmEvent when a rule goes into alarm. It runs on the monitor thread, so keep it short (e.g. close a shutter, set a flag).
+    onClear -- called with an AlarmEvent when a rule clears.
+    timeout -- seconds the monitor waits for samples before checking whether it should stop.
+    history -- number of events kept in events.
+    """
+
+    def __init__(self, stream, rules=(), onAlarm=None, onClear=None, timeout=0.1, history=1000):
+        super().__init__('AlarmMonitor')
+        self._stream = stream
+        self._rules = list(rules)
+        self.onAlarm = onAlarm
+        self.onClear = onClear
+        self._timeout = timeout
+        self._events = collections.deque(maxlen=history)
+
+    @property
+    def rules(self):
+        return self._rules
+
+    @property
+    def events(self):
+        """
+        The latest events, oldest first.
+        """
+        return list(self._events)
+
+    def addRule(self, rule):
+        self._rules.append(rule)
+
+    def active(self):
+        """
+        Return a dict of rule name --> True if the rule is in alarm.
+        """
+        return dict((rule.name, rule.active) for rule in self._rules)
+
+    #########################################
+
+    def _loop(self):
+        for block in self._stream.iterBlocks(timeout=self._timeout, copy=False):
+            if self._stop.is_set():
+                return
+            if len(block)>0:
+                self.evaluate(block['t'], block['value'])
+
+    #########################################
+
+    def evaluate(self, t, value):
+        """
+        Evaluate every rule on a block of samples and fire the callbacks of the changes of state, in the order of the samples. Return the list of AlarmEvent.
+        """
+        t = np.asarray(t, dtype=np.float64)
+        value = np.asarray(value, dtype=np.float64)
+        changes = []
+        for rule in self._rules:
+            before = rule.active
+            states = rule.evaluate(t, value)
+            if len(states)==0:
+                continue
+            previous = np.empty_like(states)
+            previous[0] = before
+            previous[1:] = states[:-1]
+            for i in np.flatnonzero(states!=previous):
+                changes.append((i, rule, bool(states[i])))
+
+        changes.sort(key=lambda change: change[0])
+        events = []
+        for i, rule, state in changes:
+            latency = time.time() - t[i]
+            event = AlarmEvent(rule.name, 'alarm' if state else 'clear', float(t[i]), float(value[i]), latency)
+            instrumentation.record('alarm', rule.name, latency)
+            self._events.append(event)
+            events.append(event)
+            callback = self.onAlarm if state else self.onClear
+            if callback is not None:
+                try:
+                    callback(event)
+                except Exception as e:
+                    print('AlarmMonitor -- callback of rule {} failed: {}'.format(rule.name, e))
+        return events
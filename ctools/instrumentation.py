@@ -0,0 +1,206 @@
+"""
+Per-function call-latency statistics for the functions returned by ctools.tools.bind.
+
+Instrumentation is off by default and then costs nothing: bound functions call the DLL directly. When it is on, every call of a bound function records its duration under (library, symbol), e.g. ('TLPM_64.dll', 'TLPM_measPower'):
+
+    from pylabinstrument.ctools import instrumentation as inst
+    inst.enable()
+    ...                      # run the acquisition
+    inst.printStats()
+    stats = inst.snapshot()  # {(library, symbol): {'count', 'total', 'mean', 'min', 'max', 'p50', 'p95', 'p99'}}
+    inst.reset()
+
+Code that is not a bound DLL function (e.g. Python glue around a DLL call) can add its own timings with record() or the timer context manager:
+
+    with inst.timer('PMSeries', 'PowerMeter.measure'):
+        ...
+"""
+import threading
+from bisect import bisect_right
+from time import perf_counter
+
+# histogram bucket edges in seconds: 100 ns to 100 s, 20 buckets per decade
+_DECADES = (-7, 2)
+_PER_DECADE = 20
+EDGES = [10**(_DECADES[0] + i/float(_PER_DECADE)) for i in range((_DECADES[1]-_DECADES[0])*_PER_DECADE + 1)]
+
+_enabled = False
+_stats = dict()
+_statsLock = threading.Lock()
+_functions = []
+
+
+class CallStats(object):
+    """
+    Call count, cumulative time and a log-spaced latency histogram of one function.
+    """
+
+    def __init__(self, library, symbol):
+        self.library = library
+        self.symbol = symbol
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+            self.total = 0.0
+            self.min = None
+            self.max = None
+            self.histogram = [0]*(len(EDGES)+1)
+
+    def add(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            if self.min is None or seconds<self.min:
+                self.min = seconds
+            if self.max is None or seconds>self.max:
+                self.max = seconds
+            self.histogram[bisect_right(EDGES, seconds)] += 1
+
+    def percentile(self, q):
+        """
+        Return the q-th percentile (0..100) of the latency in seconds, resolved to a histogram bucket (about 12% wide).
+        """
+        with self._lock:
+            if self.count==0:
+                return None
+            target = q/100.0*self.count
+            cumulative = 0
+            for i, n in enumerate(self.histogram):
+                cumulative += n
+                if cumulative>=target and n>0:
+                    break
+            lo = EDGES[i-1] if i>0 else 0.0
+            hi = EDGES[i] if i<len(EDGES) else self.max
+            # geometric middle of the bucket, clipped to what was actually seen
+            mid = (lo*hi)**0.5 if lo>0 else hi
+            return min(max(mid, self.min), self.max)
+
+    def summary(self):
+        return {'count': self.count, 'total': self.total,
+                'mean': self.total/self.count if self.count else None,
+                'min': self.min, 'max': self.max,
+                'p50': self.percentile(50), 'p95': self.percentile(95), 'p99': self.percentile(99)}
+
+
+def getCallStats(library, symbol):
+    """
+    Return the CallStats of (library, symbol), creating it if needed.
+    """
+    key = (library, symbol)
+    stats = _stats.get(key)
+    if stats is None:
+        with _statsLock:
+            stats = _stats.get(key)
+            if stats is None:
+                stats = CallStats(library, symbol)
+                _stats[key] = stats
+    return stats
+
+
+def record(library, symbol, seconds):
+    """
+    Add one call of the given duration to the statistics of (library, symbol). Does nothing when instrumentation is off.
+    """
+    if _enabled:
+        getCallStats(library, symbol).add(seconds)
+
+
+class timer(object):
+    """
+    Context manager that records the duration of its block under (library, symbol) when instrumentation is on.
+    """
+
+    __slots__ = ('library', 'symbol', 't0')
+
+    def __init__(self, library, symbol):
+        self.library = library
+        self.symbol = symbol
+
+    def __enter__(self):
+        self.t0 = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.library, self.symbol, perf_counter() - self.t0)
+        return False
+
+
+def instrumented(func, library, symbol):
+    """
+    Return a callable that calls func and records its duration under (library, symbol).
+    """
+    stats = getCallStats(library, symbol)
+    add = stats.add
+
+    def _call(*args):
+        t0 = perf_counter()
+        try:
+            return func(*args)
+        finally:
+            add(perf_counter() - t0)
+    return _call
+
+
+def register(function):
+    """
+    Register a bound function (see ctools.tools.LazyFunction) so enable()/disable() can switch it.
+    """
+    _functions.append(function)
+
+
+def enable():
+    """
+    Start recording call statistics of every bound function.
+    """
+    global _enabled
+    _enabled = True
+    for f in _functions:
+        f.rebind()
+
+
+def disable():
+    """
+    Stop recording. Bound functions go back to calling the DLL directly. The statistics are kept.
+    """
+    global _enabled
+    _enabled = False
+    for f in _functions:
+        f.rebind()
+
+
+def isEnabled():
+    return _enabled
+
+
+def snapshot():
+    """
+    Return a dict of (library, symbol) --> summary dict of the functions called so far.
+    """
+    with _statsLock:
+        items = list(_stats.items())
+    return dict((key, stats.summary()) for key, stats in items if stats.count>0)
+
+
+def reset():
+    """
+    Clear the statistics of every function.
+    """
+    with _statsLock:
+        items = list(_stats.values())
+    for stats in items:
+        stats.reset()
+
+
+def printStats(sort='total'):
+    """
+    Print a table of the statistics, sorted by sort (a summary key) in descending order. Times are in microseconds.
+    """
+    snap = snapshot()
+    rows = sorted(snap.items(), key=lambda kv: kv[1][sort], reverse=True)
+    print('{:<28}{:<34}{:>9}{:>12}{:>10}{:>10}{:>10}{:>10}'.format('library', 'symbol', 'count', 'total [s]', 'mean', 'p50', 'p95', 'p99'))
+    for (library, symbol), s in rows:
+        print('{:<28}{:<34}{:>9}{:>12.4f}{:>10.1f}{:>10.1f}{:>10.1f}{:>10.1f}'.format(
+            library, symbol, s['count'], s['total'], 1e6*s['mean'], 1e6*s['p50'], 1e6*s['p95'], 1e6*s['p99']))
@@ -0,0 +1,22 @@
+import importlib
+
+
+def lazyImporter(package, submodules):
+    """
+    Return (__getattr__, __dir__) for a package __init__ so its submodules are imported on first attribute access (PEP 562) rather than when the package is imported.
+
+    INPUTS:
+    package -- __name__ of the package.
+    submodules -- names of the submodules to expose.
+    """
+    submodules = list(submodules)
+
+    def __getattr__(name):
+        if name in submodules:
+            return importlib.import_module('.' + name, package)
+        raise AttributeError('module {!r} has no attribute {!r}'.format(package, name))
+
+    def __dir__():
+        return sorted(set(submodules).union(importlib.import_module(package).__dict__.keys()))
+
+    return __getattr__, __dir__
@@ -0,0 +1,155 @@
+"""
+A fixed-capacity ring buffer on a preallocated numpy array, for streaming acquisition.
+
+The storage is mirrored: item k is written at k % capacity and at k % capacity + capacity, so the latest n items are always one contiguous slice and latest(n) is a view with no copy. Memory is bounded by 2*capacity items however long a stream runs.
+
+One thread writes (append, or slot() then commit()); any number of threads read. A view returned by latest() or since() is overwritten once the writer has gone round the buffer, so copy what must be kept longer than capacity items.
+"""
+import threading
+import numpy as np
+
+
+class RingBuffer(object):
+    """
+    INPUTS:
+    capacity -- number of items kept.
+    shape -- shape of one item, e.g. () for scalars or (3648,) for a spectrum.
+    dtype -- numpy dtype of the items. A structured dtype, e.g. [('t', 'f8'), ('value', 'f8')], keeps several fields per item.
+    """
+
+    def __init__(self, capacity, shape=(), dtype=np.float64):
+        capacity = int(capacity)
+        if capacity<1:
+            raise ValueError('capacity must be >=1.')
+        self._capacity = capacity
+        self._shape = tuple(shape)
+        self._data = np.zeros((2*capacity,) + self._shape, dtype=dtype)
+        self._count = 0
+        self._cond = threading.Condition()
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    @property
+    def count(self):
+        """
+        Number of items written since creation (or clear()). It is the sequence number of the next item.
+        """
+        return self._count
+
+    def __len__(self):
+        return min(self._count, self._capacity)
+
+    #########################################
+    # Writing (one thread)
+
+    def slot(self):
+        """
+        Return a writable view of the next item, e.g. for a DLL to fill in place. Call commit() once it is filled.
+        """
+        return self._data[self._count % self._capacity]
+
+    def commit(self):
+        """
+        Publish the item written into slot(). Return its sequence number.
+        """
+        i = self._count % self._capacity
+        self._data[i + self._capacity] = self._data[i]
+        return self._publish(1)
+
+    def append(self, item):
+        """
+        Write one item. Return its sequence number.
+        """
+        i = self._count % self._capacity
+        self._data[i] = item
+        self._data[i + self._capacity] = self._data[i]
+        return self._publish(1)
+
+    def extend(self, items):
+        """
+        Write a block of items (an array of shape (n,) + shape). Only the last capacity items are kept if n is larger.
+        """
+        items = np.asarray(items, dtype=self.dtype)
+        n = len(items)
+        if n>self._capacity:
+            self._count += n - self._capacity
+            items = items[-self._capacity:]
+            n = self._capacity
+        i = self._count % self._capacity
+        first = min(n, self._capacity - i)
+        for offset in (0, self._capacity):
+            self._data[offset+i:offset+i+first] = items[:first]
+            self._data[offset:offset+n-first] = items[first:]
+        return self._publish(n)
+
+    def _publish(self, n):
+        with self._cond:
+            self._count += n
+            self._cond.notify_all()
+        return self._count - 1
+
+    def notify(self):
+        """
+        Wake up the threads blocked in wait(), e.g. when the writer stops.
+        """
+        with self._cond:
+            self._cond.notify_all()
+
+    def clear(self):
+        with self._cond:
+            self._count = 0
+
+    #########################################
+    # Reading (any thread)
+
+    def latest(self, n=None):
+        """
+        Return a view of the latest n items, oldest first. Default is all the items held.
+        """
+        count = self._count
+        held = min(count, self._capacity)
+        n = held if n is None else min(int(n), held)
+        end = count % self._capacity + self._capacity
+        return self._data[end-n:end]
+
+    def since(self, seq):
+        """
+        Return (items, nextSeq, dropped): a view of the items with sequence numbers >= seq, the sequence number to pass on the next call, and how many items were overwritten before they could be read.
+        """
+        count = self._count
+        seq = max(int(seq), 0)
+        dropped = max(count - self._capacity - seq, 0)
+        if count - seq - dropped<=0:
+            return self._data[0:0], max(count, seq), dropped
+        return self._view(seq + dropped, count), count, dropped
+
+    def view(self, start, stop):
+        """
+        Return a view of the items with sequence numbers start to stop-1, e.g. to read the same items from parallel buffers written by one thread (spectra and their timestamps). Raise IndexError if an item is not written yet or is older than count-capacity, i.e. has been overwritten by a newer one.
+        """
+        count = self._count
+        if start>stop or start<count-self._capacity or stop>count:
+            raise IndexError('Items {} to {} are not held (count {}, capacity {}).'.format(start, stop, count, self._capacity))
+        return self._view(start, stop)
+
+    def _view(self, start, stop):
+        n = stop - start
+        end = (stop - 1) % self._capacity + self._capacity + 1 if n>0 else 0
+        return self._data[end-n:end]
+
+    def wait(self, seq, timeout=None):
+        """
+        Block until an item with sequence number seq has been written, or timeout seconds passed. Return True if it has.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._count>seq, timeout)
@@ -0,0 +1,63 @@
+"""
+In-process instrument simulators that stand in for the vendor wrapper modules.
+
+A driver talks to its DLL only through its .library (the wrapper module), so setting .library to a simulator runs the driver's real call path without hardware:
+
+    from pylabinstrument.ctools import simulators
+    from pylabinstrument.thorlabs.powermeter.PMSeries import PowerMeter
+
+    pm = PowerMeter('USB0::0x1313::0x8078::P0000001::INSTR')
+    sim = simulators.use(pm, 'tlpm', signal=2e-3, noise=0.01, latency={'MeasurePower': 0.002})
+    pm.open()
+    pm.measure()
+
+One simulator can serve several driver instances (e.g. a group of power meters, or a motor and a shutter sharing a test bench).
+"""
+import importlib
+
+# backend name --> (module, class)
+BACKENDS = {
+    'tlpm': ('._tlpm', 'TLPMSimulator'),
+    'tlccs': ('._tlccs', 'TLCCSSimulator'),
+    'kcubedcservo': ('._kinesis', 'KCubeDCServoSimulator'),
+    'kcubesolenoid': ('._kinesis', 'KCubeSolenoidSimulator'),
+    'ueye': ('._ueye', 'UEyeSimulator'),
+}
+
+
+def register(name, module, classname):
+    """
+    Register a simulator class under a backend name. module is an absolute module name or one relative to this package.
+    """
+    BACKENDS[name.lower()] = (module, classname)
+
+
+def backends():
+    return list(BACKENDS.keys())
+
+
+def getBackend(name):
+    """
+    Return the simulator class registered under name.
+    """
+    if name.lower() not in BACKENDS:
+        raise ValueError('Unknown backend {}. Must be one of {}.'.format(name, backends()))
+    module, classname = BACKENDS[name.lower()]
+    return getattr(importlib.import_module(module, __name__), classname)
+
+
+def create(name, **kwargs):
+    """
+    Return a new simulator of the backend name. kwargs go to the simulator class.
+    """
+    return getBackend(name)(**kwargs)
+
+
+def use(instrument, backend, **kwargs):
+    """
+    Make instrument (any driver with a .library, e.g. PowerMeter, CCS, a KCube Motor or an IDS Camera) run against a simulator. backend is either a backend name, with kwargs passed to create(), or an existing simulator to share. Return the simulator.
+    """
+    if isinstance(backend, str):
+        backend = create(backend, **kwargs)
+    instrument.library = backend
+    return backend
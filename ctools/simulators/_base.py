@@ -0,0 +1,116 @@
+import ctypes
+import importlib
+import random
+import threading
+import time
+
+from ..tools import LazyFunction
+
+
+class SimulatedLibrary(object):
+    """
+    Base class of the in-process instrument simulators.
+
+    A simulator stands in for a wrapper module (e.g. thorlabs.powermeter.tools._TLPM_wrapper): it implements the same function names with the same arguments, so a driver runs against it once its .library is set to the simulator. Structures and constants that a driver reads from its library (e.g. TLI_DeviceInfo, MOT_DC_PIDParameters) are taken from the real wrapper module. Functions that are not simulated raise AttributeError instead of loading the vendor DLL.
+
+    INPUTS:
+    latency -- seconds each call takes. Either a number for every function, or a dict of function name to seconds; functions missing from the dict take no time.
+    noise -- relative standard deviation of the gaussian noise added to measured values.
+    seed -- seed of the random generator, for reproducible runs.
+    """
+
+    # module (relative to the package root) whose structures and constants are exposed
+    wrapper = None
+
+    def __init__(self, latency=0.0, noise=0.0, seed=None):
+        self._latency = latency
+        self.noise = noise
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+        self.calls = dict()
+
+    @property
+    def latency(self):
+        return self._latency
+
+    @latency.setter
+    def latency(self, value):
+        self._latency = value
+
+    def getLatency(self, fname):
+        if isinstance(self._latency, dict):
+            return self._latency.get(fname, 0.0)
+        return self._latency
+
+    def delay(self, fname):
+        """
+        Count a call of fname and sleep for its latency.
+        """
+        self.calls[fname] = self.calls.get(fname, 0) + 1
+        sec = self.getLatency(fname)
+        if sec>0:
+            time.sleep(sec)
+
+    def addNoise(self, value):
+        if self.noise:
+            return value*(1.0 + self.random.gauss(0.0, self.noise))
+        return value
+
+    def __getattr__(self, name):
+        if name.startswith('_') or self.wrapper is None:
+            raise AttributeError(name)
+        package = __name__.rsplit('.', 3)[0]
+        module = importlib.import_module(self.wrapper, package)
+        attr = getattr(module, name)
+        if isinstance(attr, LazyFunction):
+            raise AttributeError('{} does not simulate {}.'.format(type(self).__name__, name))
+        return attr
+
+
+#############################################################
+### Helpers to read and write ctypes arguments the way the DLL would
+
+def deref(arg):
+    """
+    Return the ctypes object behind a byref() argument or a pointer; other arguments are returned as they are.
+    """
+    if hasattr(arg, '_obj'):  # byref()
+        return arg._obj
+    if isinstance(arg, ctypes._Pointer):
+        return arg.contents
+    return arg
+
+
+def value(arg):
+    """
+    Return the python value of a ctypes (or python) argument.
+    """
+    arg = deref(arg)
+    if hasattr(arg, 'value'):
+        return arg.value
+    return arg
+
+
+def setValue(arg, val):
+    deref(arg).value = val
+
+
+def address(arg):
+    """
+    Return the memory address that a pointer-like argument points to.
+    """
+    if hasattr(arg, '_obj'):  # byref() points to the object itself
+        return ctypes.addressof(arg._obj)
+    if isinstance(arg, (ctypes._Pointer, ctypes.c_char_p, ctypes.c_void_p)):
+        return ctypes.cast(arg, ctypes.c_void_p).value
+    return ctypes.addressof(arg)
+
+
+def key(arg):
+    """
+    Return a str key from a serial number or resource name argument.
+    """
+    val = value(arg)
+    if isinstance(val, bytes):
+        val = val.decode()
+    return str(val)
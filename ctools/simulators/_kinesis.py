@@ -0,0 +1,273 @@
+import time
+
+from ._base import SimulatedLibrary, value, setValue, key, deref
+
+
+class _KinesisSimulator(SimulatedLibrary):
+    """
+    Device list and session functions shared by the simulated Kinesis KCube libraries.
+    """
+
+    typeID = None
+
+    def __init__(self, serials=None, latency=0.0, noise=0.0, seed=None):
+        super().__init__(latency, noise, seed)
+        if serials is None:
+            serials = [str(self.typeID) + '000001']
+        self.serials = [str(s) for s in serials]
+        self.devices = dict()
+
+    def newState(self):
+        return dict()
+
+    def state(self, serial):
+        return self.devices[key(serial)]
+
+    def BuildDeviceList(self):
+        self.delay('BuildDeviceList')
+        return 0
+
+    def GetDeviceListSize(self):
+        self.delay('GetDeviceListSize')
+        return len(self.serials)
+
+    def GetDeviceListExt(self, sbuffer, size):
+        self.delay('GetDeviceListExt')
+        sbuffer.value = ','.join(self.serials).encode()[:value(size)-1]
+        return 0
+
+    def GetDeviceListByTypeExt(self, sbuffer, size, typeID):
+        self.delay('GetDeviceListByTypeExt')
+        serials = self.serials if value(typeID)==self.typeID else []
+        sbuffer.value = ','.join(serials).encode()[:value(size)-1]
+        return 0
+
+    def Open(self, serial, *args):
+        self.delay('Open')
+        serial = key(serial)
+        if serial not in self.serials:
+            return 2  # FT_DeviceNotFound
+        with self.lock:
+            if serial not in self.devices:
+                self.devices[serial] = self.newState()
+        return 0
+
+    def Close(self, serial):
+        self.delay('Close')
+        return 0
+
+    def Identify(self, serial):
+        self.delay('Identify')
+
+    def ClearMessageQueue(self, serial):
+        self.delay('ClearMessageQueue')
+
+    def LoadSettings(self, serial):
+        self.delay('LoadSettings')
+        return True
+
+    def RequestSettings(self, serial):
+        self.delay('RequestSettings')
+        return 0
+
+
+class KCubeDCServoSimulator(_KinesisSimulator):
+    """
+    Simulated Kinesis KCube DC servo library (KDC101). Use in place of _KCubeDCServo.
+
+    A move runs at a constant velocity from the current position to the target; the moving bits of GetStatusBits are set until it arrives.
+
+    INPUTS:
+    serials -- serial numbers of the simulated controllers.
+    velocity -- speed of a move in real units (mm or deg) per second.
+    countsPerUnit -- device units per real unit. The default is that of a PRM1-Z8 rotation stage.
+    latency, noise, seed -- see SimulatedLibrary. noise is unused.
+    """
+
+    wrapper = '.thorlabs.motion.tools._KCubeDCServo'
+    typeID = 27
+
+    # GetStatusBits
+    STATUS_MOVING_FORWARD = 0x00000010
+    STATUS_MOVING_REVERSE = 0x00000020
+    STATUS_HOMING = 0x00000200
+    STATUS_HOMED = 0x00000400
+    STATUS_ENABLED = 0x80000000
+
+    def __init__(self, serials=None, velocity=10.0, countsPerUnit=1919.6418, latency=0.0, noise=0.0, seed=None):
+        super().__init__(serials, latency, noise, seed)
+        self.velocity = velocity
+        self.countsPerUnit = countsPerUnit
+
+    def newState(self):
+        return {'start': 0.0, 'target': 0.0, 't0': 0.0, 'homing': False, 'homed': False,
+                'polling': 0, 'pid': {'proportionalGain': 0, 'integralGain': 0, 'differentialGain': 0, 'integralLimit': 0, 'parameterFilter': 15}}
+
+    def position(self, serial):
+        """
+        Return the current position of the simulated stage in real units.
+        """
+        state = self.state(serial)
+        dist = state['target'] - state['start']
+        travelled = self.velocity*(time.time()-state['t0'])
+        if travelled<abs(dist):
+            return state['start'] + (travelled if dist>=0 else -travelled)
+        if state['homing']:
+            state['homing'] = False
+            state['homed'] = True
+        return state['target']
+
+    def isMoving(self, serial):
+        state = self.state(serial)
+        return self.position(serial)!=state['target']
+
+    def _moveTo(self, serial, target):
+        with self.lock:
+            state = self.state(serial)
+            state['start'] = self.position(serial)
+            state['target'] = target
+            state['t0'] = time.time()
+
+    def Home(self, serial):
+        self.delay('Home')
+        self._moveTo(serial, 0.0)
+        self.state(serial)['homing'] = True
+        return 0
+
+    def CanHome(self, serial):
+        self.delay('CanHome')
+        return True
+
+    def MoveToPosition(self, serial, deviceUnit):
+        self.delay('MoveToPosition')
+        self._moveTo(serial, value(deviceUnit)/self.countsPerUnit)
+        return 0
+
+    def StopProfiled(self, serial):
+        self.delay('StopProfiled')
+        self._moveTo(serial, self.position(serial))
+        return 0
+
+    StopImmediate = StopProfiled
+
+    def RequestPosition(self, serial):
+        self.delay('RequestPosition')
+        return 0
+
+    def GetPosition(self, serial):
+        self.delay('GetPosition')
+        return int(round(self.position(serial)*self.countsPerUnit))
+
+    def GetStatusBits(self, serial):
+        self.delay('GetStatusBits')
+        state = self.state(serial)
+        pos = self.position(serial)
+        status = self.STATUS_ENABLED
+        if pos!=state['target']:
+            status |= self.STATUS_MOVING_FORWARD if state['target']>pos else self.STATUS_MOVING_REVERSE
+        if state['homing']:
+            status |= self.STATUS_HOMING
+        if state['homed']:
+            status |= self.STATUS_HOMED
+        return status
+
+    def StartPolling(self, serial, ms):
+        self.delay('StartPolling')
+        self.state(serial)['polling'] = value(ms)
+        return True
+
+    def StopPolling(self, serial):
+        self.delay('StopPolling')
+        self.state(serial)['polling'] = 0
+
+    def GetRealValueFromDeviceUnit(self, serial, deviceUnit, pReal, unitType):
+        self.delay('GetRealValueFromDeviceUnit')
+        setValue(pReal, value(deviceUnit)/self.countsPerUnit)
+        return 0
+
+    def GetDeviceUnitFromRealValue(self, serial, real, pDeviceUnit, unitType):
+        self.delay('GetDeviceUnitFromRealValue')
+        setValue(pDeviceUnit, int(round(value(real)*self.countsPerUnit)))
+        return 0
+
+    def GetVelParams(self, serial, pAcceleration, pMaxVelocity):
+        self.delay('GetVelParams')
+        setValue(pAcceleration, int(round(4*self.velocity*self.countsPerUnit)))
+        setValue(pMaxVelocity, int(round(self.velocity*self.countsPerUnit)))
+        return 0
+
+    def GetDCPIDParams(self, serial, pParams):
+        self.delay('GetDCPIDParams')
+        params = deref(pParams)
+        for f, v in self.state(serial)['pid'].items():
+            setattr(params, f, v)
+        return 0
+
+    def SetDCPIDParams(self, serial, pParams):
+        self.delay('SetDCPIDParams')
+        params = deref(pParams)
+        self.state(serial)['pid'] = dict((f, getattr(params, f)) for f in self.state(serial)['pid'])
+        return 0
+
+
+class KCubeSolenoidSimulator(_KinesisSimulator):
+    """
+    Simulated Kinesis KCube solenoid library (KSC101). Use in place of _KCubeSolenoid.
+
+    The solenoid follows a change of operating state after switchTime. Every state change is kept in history as (time.time(), state) for checking shutter timing.
+
+    INPUTS:
+    serials -- serial numbers of the simulated controllers.
+    switchTime -- seconds the solenoid takes to open or close.
+    latency, noise, seed -- see SimulatedLibrary. noise is unused.
+    """
+
+    wrapper = '.thorlabs.motion.tools._KCubeSolenoid'
+    typeID = 68
+
+    # SC_OperatingModes, SC_OperatingStates and SC_SolenoidStates values
+    MANUAL = 1
+    ACTIVE = 1
+    INACTIVE = 2
+    OPEN = 1
+    CLOSED = 2
+
+    def __init__(self, serials=None, switchTime=0.005, latency=0.0, noise=0.0, seed=None):
+        super().__init__(serials, latency, noise, seed)
+        self.switchTime = switchTime
+
+    def newState(self):
+        return {'mode': self.MANUAL, 'state': self.INACTIVE, 'changed': 0.0, 'history': []}
+
+    def history(self, serial):
+        return self.state(serial)['history']
+
+    def GetOperatingMode(self, serial):
+        self.delay('GetOperatingMode')
+        return self.state(serial)['mode']
+
+    def SetOperatingMode(self, serial, mode):
+        self.delay('SetOperatingMode')
+        self.state(serial)['mode'] = value(mode)
+        return 0
+
+    def GetOperatingState(self, serial):
+        self.delay('GetOperatingState')
+        return self.state(serial)['state']
+
+    def SetOperatingState(self, serial, opstate):
+        self.delay('SetOperatingState')
+        state = self.state(serial)
+        opstate = value(opstate)
+        if opstate!=state['state']:
+            state['state'] = opstate
+            state['changed'] = time.time()
+            state['history'].append((state['changed'], opstate))
+        return 0
+
+    def GetSolenoidState(self, serial):
+        self.delay('GetSolenoidState')
+        state = self.state(serial)
+        settled = time.time()-state['changed']>=self.switchTime
+        isOpen = (state['state']==self.ACTIVE)==settled
+        return self.OPEN if isOpen else self.CLOSED
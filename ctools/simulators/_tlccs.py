@@ -0,0 +1,197 @@
+import time
+import ctypes
+import numpy as np
+
+from ._base import SimulatedLibrary, value, setValue, deref, address
+
+VI_SUCCESS = 0
+VI_ERROR_INV_OBJECT = -1073807346
+
+PIX_NUM = 3648
+
+# tlccs_getDeviceStatus bits
+STATUS_SCAN_IDLE = 0x0002
+STATUS_SCAN_TRIGGERED = 0x0004
+STATUS_SCAN_START_TRANS = 0x0008
+STATUS_SCAN_TRANSFER = 0x0010
+
+
+def asDoubles(arg, n):
+    """
+    Return a numpy view of n doubles of a ctypes array/pointer argument.
+    """
+    obj = deref(arg)
+    if isinstance(obj, np.ndarray):
+        return obj
+    buf = (ctypes.c_double*n).from_address(address(arg))
+    return np.ctypeslib.as_array(buf)
+
+
+class TLCCSSimulator(SimulatedLibrary):
+    """
+    Simulated Thorlabs TLCCS library (CCS-series spectrometers). Use in place of _TLCCS_wrapper.
+
+    A scan integrates for the set integration time after StartScan; GetDeviceStatus reports the transfer bit once it is done and GetScanData waits for it. After StartScanCont, scans follow each other back-to-back until a call other than GetScanData or GetDeviceStatus stops the continuous scanning, like on the device.
+
+    INPUTS:
+    spectrum -- a callable f(wavelength, integrationTime) returning the noiseless spectrum (normalized 0..1 amplitude) as a numpy array. The default is a 632.8 nm line on a flat background growing with integration time.
+    wlRange -- (min, max) wavelength in nm of the factory calibration.
+    readoutTime -- seconds to transfer a scan after integration.
+    latency, noise, seed -- see SimulatedLibrary. Here noise is the standard deviation of an additive noise, in amplitude units.
+    """
+
+    wrapper = '.thorlabs.spectrometer.tools._TLCCS_wrapper'
+
+    def __init__(self, spectrum=None, wlRange=(350.0, 700.0), readoutTime=0.002, latency=0.0, noise=0.0, seed=None):
+        super().__init__(latency, noise, seed)
+        self.spectrum = spectrum if spectrum is not None else defaultSpectrum
+        self.readoutTime = readoutTime
+        self.rng = np.random.RandomState(seed)
+        # a slightly non-linear pixel to wavelength mapping, like a real grating
+        x = np.arange(PIX_NUM)/(PIX_NUM-1.0)
+        wlmin, wlmax = wlRange
+        self.wavelength = wlmin + (wlmax-wlmin)*(0.92*x + 0.08*x**2)
+        self.userWavelength = None
+        self.sessions = dict()
+        self._nextHandle = 1
+
+    def Open(self, rsrc, idQuery, resetDevice, pHandle):
+        self.delay('Open')
+        with self.lock:
+            handle = self._nextHandle
+            self._nextHandle += 1
+            self.sessions[handle] = {'integrationTime': 0.01, 'scanStart': None, 'continuous': False, 'framesRead': 0}
+        setValue(pHandle, handle)
+        return VI_SUCCESS
+
+    Init = Open
+
+    def Close(self, handle):
+        self.delay('Close')
+        self.sessions.pop(value(handle), None)
+        return VI_SUCCESS
+
+    def GetIntegrationTime(self, handle, pTime):
+        self.delay('GetIntegrationTime')
+        state = self.sessions[value(handle)]
+        self._stopContinuous(state)
+        setValue(pTime, state['integrationTime'])
+        return VI_SUCCESS
+
+    def SetIntegrationTime(self, handle, sec):
+        self.delay('SetIntegrationTime')
+        state = self.sessions[value(handle)]
+        state['integrationTime'] = value(sec)
+        state['scanStart'] = None
+        state['continuous'] = False
+        return VI_SUCCESS
+
+    ###########################################
+    # Scanning
+
+    def _stopContinuous(self, state):
+        if state['continuous']:
+            state['continuous'] = False
+            state['scanStart'] = None
+
+    def _frameTime(self, state):
+        return state['integrationTime'] + self.readoutTime
+
+    def _readyAt(self, state):
+        """
+        Return the time the next unread scan is ready, or None if no scan is running.
+        """
+        if state['scanStart'] is None:
+            return None
+        if state['continuous']:
+            return state['scanStart'] + (state['framesRead']+1)*self._frameTime(state)
+        return state['scanStart'] + self._frameTime(state)
+
+    def StartScan(self, handle):
+        self.delay('StartScan')
+        state = self.sessions[value(handle)]
+        state['scanStart'] = time.time()
+        state['continuous'] = False
+        state['framesRead'] = 0
+        return VI_SUCCESS
+
+    def StartScanCont(self, handle):
+        self.delay('StartScanCont')
+        state = self.sessions[value(handle)]
+        state['scanStart'] = time.time()
+        state['continuous'] = True
+        state['framesRead'] = 0
+        return VI_SUCCESS
+
+    def GetDeviceStatus(self, handle, pStatus):
+        self.delay('GetDeviceStatus')
+        state = self.sessions[value(handle)]
+        readyAt = self._readyAt(state)
+        if readyAt is None:
+            status = STATUS_SCAN_IDLE
+        elif time.time()>=readyAt:
+            status = STATUS_SCAN_TRANSFER
+        else:
+            status = STATUS_SCAN_TRIGGERED
+        setValue(pStatus, status)
+        return VI_SUCCESS
+
+    def GetScanData(self, handle, data):
+        self.delay('GetScanData')
+        state = self.sessions[value(handle)]
+        readyAt = self._readyAt(state)
+        if readyAt is None:
+            return VI_ERROR_INV_OBJECT
+        wait = readyAt - time.time()
+        if wait>0:
+            time.sleep(wait)
+        out = asDoubles(data, PIX_NUM)
+        out[:] = self.spectrum(self.wavelength, state['integrationTime'])
+        if self.noise:
+            out += self.noise*self.rng.standard_normal(PIX_NUM)
+        np.clip(out, 0.0, 1.0, out=out)
+        if state['continuous']:
+            # the device keeps only the latest scan: frames the caller was too slow for are lost
+            completed = int((time.time() - state['scanStart'])/self._frameTime(state))
+            state['framesRead'] = max(state['framesRead']+1, completed)
+        else:
+            state['scanStart'] = None
+        return VI_SUCCESS
+
+    ###########################################
+    # Wavelength calibration
+
+    def GetWavelengthData(self, handle, dataset, data, pMin, pMax):
+        self.delay('GetWavelengthData')
+        self._stopContinuous(self.sessions[value(handle)])
+        dataset = value(dataset)
+        if dataset==1 and self.userWavelength is not None:
+            wl = self.userWavelength
+        elif dataset in (0, 1):
+            wl = self.wavelength
+        else:
+            return VI_ERROR_INV_OBJECT
+        asDoubles(data, PIX_NUM)[:] = wl
+        setValue(pMin, float(wl.min()))
+        setValue(pMax, float(wl.max()))
+        return VI_SUCCESS
+
+    def SetWavelengthData(self, handle, pixels, wavelengths, length):
+        """
+        Write the user calibration: like the device, fit a 3rd order polynomial through the (pixel, wavelength) supporting points.
+        """
+        self.delay('SetWavelengthData')
+        self._stopContinuous(self.sessions[value(handle)])
+        n = value(length)
+        if n<4:
+            return VI_ERROR_INV_OBJECT
+        px = np.ctypeslib.as_array((ctypes.c_int32*n).from_address(address(pixels)))
+        wl = asDoubles(wavelengths, n)
+        poly = np.polyfit(px.astype(np.float64), wl, 3)
+        self.userWavelength = np.polyval(poly, np.arange(PIX_NUM, dtype=np.float64))
+        return VI_SUCCESS
+
+
+def defaultSpectrum(wavelength, integrationTime):
+    line = np.exp(-0.5*((wavelength-632.8)/0.5)**2)
+    return (0.02 + 0.9*line)*min(integrationTime/0.01, 1.0)
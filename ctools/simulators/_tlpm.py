@@ -0,0 +1,302 @@
+import time
+
+from ._base import SimulatedLibrary, value, setValue, key
+
+VI_SUCCESS = 0
+VI_ERROR_INV_OBJECT = -1073807346
+
+
+class TLPMSimulator(SimulatedLibrary):
+    """
+    Simulated Thorlabs TLPM library (PM100-series power meters). Use in place of _TLPM_wrapper.
+
+    INPUTS:
+    signal -- the true optical power in watts. Either a number or a callable f(t, wavelength) of the time (time.time()) and the correction wavelength in nm, returning watts.
+    devices -- a list of (resourceName, modelName, serialNo) tuples reported by FindResources/GetResourceInfo.
+    darkAdjustTime -- seconds a dark current adjustment runs.
+    sensor -- (name, serialNo) of the sensor connected to each meter. See also swapSensor().
+    latency, noise, seed -- see SimulatedLibrary.
+    """
+
+    wrapper = '.thorlabs.powermeter.tools._TLPM_wrapper'
+
+    # sensor type, subtype and flags reported by GetSensorInfo (photodiode, single-data, has temperature sensor)
+    SENSOR_TYPE = 0x01
+    SENSOR_SUBTYPE = 0x01
+    SENSOR_FLAGS = 0x0100
+
+    # time between two samples of a measurement sequence
+    SEQUENCE_SAMPLE_TIME = 1e-5
+
+    def __init__(self, signal=1e-3, devices=None, darkAdjustTime=1.0, sensor=('S120C', '00000001'), latency=0.0, noise=0.0, seed=None):
+        super().__init__(latency, noise, seed)
+        self.signal = signal
+        if devices is None:
+            devices = [('USB0::0x1313::0x8078::P0000001::INSTR', 'PM100D', 'P0000001')]
+        self.devices = list(devices)
+        self.darkAdjustTime = darkAdjustTime
+        self.sensor = tuple(sensor)
+        self.sessions = dict()
+        self._nextHandle = 1
+
+    def power(self, handle):
+        """
+        Return the (noisy) power the simulated sensor of the session reads now.
+        """
+        return self._powerAt(handle, time.time())
+
+    def _powerAt(self, handle, t):
+        state = self.sessions[handle]
+        if callable(self.signal):
+            p = self.signal(t, state['wavelength'][0])
+        else:
+            p = self.signal
+        p = self.addNoise(p)
+        if state['unit']==1:
+            from math import log10
+            p = 10*log10(max(p, 1e-15)/1e-3)
+        return p
+
+    def _newState(self, rsrc):
+        return {'resourceName': rsrc, 'timeout': 1000,
+                'avgTime': [0.001, 0.0001, 10.0, 0.001], 'avgCount': 1,
+                'wavelength': [635.0, 400.0, 1100.0], 'attn': [0.0, -60.0, 60.0, 0.0],
+                'powerRange': [0.01, 1e-9, 0.2], 'autoRange': 1, 'unit': 0,
+                'darkUntil': 0.0, 'darkOffset': 0.0, 'sensor': self.sensor,
+                'sequence': {'baseTime': 1, 'start': None}}
+
+    def swapSensor(self, handle, name, serialNo, wavelength=None, powerRange=None):
+        """
+        Simulate plugging another sensor into the meter of a session.
+
+        INPUTS:
+        handle -- the session handle (int).
+        name, serialNo -- of the new sensor.
+        wavelength -- (min, max) correction wavelength range of the new sensor in nm.
+        powerRange -- (min, max) power range of the new sensor in W.
+        """
+        state = self.sessions[handle]
+        state['sensor'] = (name, serialNo)
+        for attr, limits in [('wavelength', wavelength), ('powerRange', powerRange)]:
+            if limits is not None:
+                values = state[attr]
+                values[1], values[2] = limits
+                values[0] = min(max(values[0], limits[0]), limits[1])
+
+    #########################################
+    # Resource discovery
+
+    def FindResources(self, handle, pCount):
+        self.delay('FindResources')
+        setValue(pCount, len(self.devices))
+        return VI_SUCCESS
+
+    def GetResourceInfo(self, handle, index, modelName, serialNo, manufacturer, pAvailable):
+        self.delay('GetResourceInfo')
+        index = value(index)
+        if not 0<=index<len(self.devices):
+            return VI_ERROR_INV_OBJECT
+        rsrc, model, serial = self.devices[index]
+        modelName.value = model.encode()
+        serialNo.value = serial.encode()
+        manufacturer.value = b'Thorlabs'
+        inUse = any(s['resourceName']==rsrc for s in self.sessions.values())
+        setValue(pAvailable, 0 if inUse else 1)
+        return VI_SUCCESS
+
+    def GetResourceName(self, handle, index, name):
+        self.delay('GetResourceName')
+        index = value(index)
+        if not 0<=index<len(self.devices):
+            return VI_ERROR_INV_OBJECT
+        name.value = self.devices[index][0].encode()
+        return VI_SUCCESS
+
+    #########################################
+    # Session
+
+    def Open(self, rsrc, idQuery, resetDevice, pHandle):
+        self.delay('Open')
+        with self.lock:
+            handle = self._nextHandle
+            self._nextHandle += 1
+            self.sessions[handle] = self._newState(key(rsrc))
+        setValue(pHandle, handle)
+        return VI_SUCCESS
+
+    Init = Open
+
+    def Close(self, handle):
+        self.delay('Close')
+        self.sessions.pop(value(handle), None)
+        return VI_SUCCESS
+
+    def ErrorMessage(self, handle, status, description):
+        description.value = 'Simulated error {}'.format(value(status)).encode()
+        return VI_SUCCESS
+
+    def GetSensorInfo(self, handle, name, serialNo, message, pType, pSubtype, pFlags):
+        self.delay('GetSensorInfo')
+        sensorName, sensorSerial = self.sessions[value(handle)]['sensor']
+        name.value = sensorName.encode()
+        serialNo.value = sensorSerial.encode()
+        message.value = b''
+        setValue(pType, self.SENSOR_TYPE)
+        setValue(pSubtype, self.SENSOR_SUBTYPE)
+        setValue(pFlags, self.SENSOR_FLAGS)
+        return VI_SUCCESS
+
+    def SetTimeout(self, handle, ms):
+        self.delay('SetTimeout')
+        self.sessions[value(handle)]['timeout'] = value(ms)
+        return VI_SUCCESS
+
+    def GetTimeout(self, handle, pMs):
+        self.delay('GetTimeout')
+        setValue(pMs, self.sessions[value(handle)]['timeout'])
+        return VI_SUCCESS
+
+    #########################################
+    # Attribute get/set with (set, min, max, default) lists
+
+    def _set(self, fname, attr, handle, val):
+        self.delay(fname)
+        values = self.sessions[value(handle)][attr]
+        val = value(val)
+        if not values[1]<=val<=values[2]:
+            return VI_ERROR_INV_OBJECT
+        values[0] = val
+        return VI_SUCCESS
+
+    def _get(self, fname, attr, handle, which, pValue):
+        self.delay(fname)
+        values = self.sessions[value(handle)][attr]
+        which = value(which)
+        if not 0<=which<len(values):
+            return VI_ERROR_INV_OBJECT
+        setValue(pValue, values[which])
+        return VI_SUCCESS
+
+    def SetAvgTime(self, handle, sec):
+        return self._set('SetAvgTime', 'avgTime', handle, sec)
+
+    def GetAvgTime(self, handle, attr, pValue):
+        return self._get('GetAvgTime', 'avgTime', handle, attr, pValue)
+
+    def SetAvgCount(self, handle, count):
+        self.delay('SetAvgCount')
+        self.sessions[value(handle)]['avgCount'] = value(count)
+        return VI_SUCCESS
+
+    def GetAvgCount(self, handle, pCount):
+        self.delay('GetAvgCount')
+        setValue(pCount, self.sessions[value(handle)]['avgCount'])
+        return VI_SUCCESS
+
+    def SetAttn(self, handle, db):
+        return self._set('SetAttn', 'attn', handle, db)
+
+    def GetAttn(self, handle, attr, pValue):
+        return self._get('GetAttn', 'attn', handle, attr, pValue)
+
+    def SetWavelength(self, handle, wl):
+        return self._set('SetWavelength', 'wavelength', handle, wl)
+
+    def GetWavelength(self, handle, attr, pValue):
+        return self._get('GetWavelength', 'wavelength', handle, attr, pValue)
+
+    def SetPowerRange(self, handle, power):
+        return self._set('SetPowerRange', 'powerRange', handle, power)
+
+    def GetPowerRange(self, handle, attr, pValue):
+        return self._get('GetPowerRange', 'powerRange', handle, attr, pValue)
+
+    def SetPowerAutoRange(self, handle, mode):
+        self.delay('SetPowerAutoRange')
+        self.sessions[value(handle)]['autoRange'] = 1 if value(mode) else 0
+        return VI_SUCCESS
+
+    def GetPowerAutoRange(self, handle, pMode):
+        self.delay('GetPowerAutoRange')
+        setValue(pMode, self.sessions[value(handle)]['autoRange'])
+        return VI_SUCCESS
+
+    def SetPowerUnit(self, handle, unit):
+        self.delay('SetPowerUnit')
+        self.sessions[value(handle)]['unit'] = value(unit)
+        return VI_SUCCESS
+
+    def GetPowerUnit(self, handle, pUnit):
+        self.delay('GetPowerUnit')
+        setValue(pUnit, self.sessions[value(handle)]['unit'])
+        return VI_SUCCESS
+
+    #########################################
+    # Dark adjustment
+
+    def StartDarkAdjust(self, handle):
+        self.delay('StartDarkAdjust')
+        state = self.sessions[value(handle)]
+        state['darkUntil'] = time.time() + self.darkAdjustTime
+        state['darkOffset'] = self.random.gauss(0.0, 1e-9)
+        return VI_SUCCESS
+
+    def CancelDarkAdjust(self, handle):
+        self.delay('CancelDarkAdjust')
+        self.sessions[value(handle)]['darkUntil'] = 0.0
+        return VI_SUCCESS
+
+    def GetDarkAdjustState(self, handle, pState):
+        self.delay('GetDarkAdjustState')
+        running = time.time()<self.sessions[value(handle)]['darkUntil']
+        setValue(pState, 1 if running else 0)
+        return VI_SUCCESS
+
+    def GetDarkOffset(self, handle, pOffset):
+        self.delay('GetDarkOffset')
+        setValue(pOffset, self.sessions[value(handle)]['darkOffset'])
+        return VI_SUCCESS
+
+    #########################################
+    # Measure
+
+    def MeasurePower(self, handle, pPower):
+        self.delay('MeasurePower')
+        setValue(pPower, self.power(value(handle)))
+        return VI_SUCCESS
+
+    #########################################
+    # Measurement sequence
+
+    def ConfPowerMeasurementSequence(self, handle, baseTime):
+        self.delay('ConfPowerMeasurementSequence')
+        baseTime = value(baseTime)
+        if not 1<=baseTime<=100:
+            return VI_ERROR_INV_OBJECT
+        self.sessions[value(handle)]['sequence'] = {'baseTime': baseTime, 'start': None}
+        return VI_SUCCESS
+
+    def StartMeasurementSequence(self, handle, autoTriggerDelay, pTriggerForced):
+        self.delay('StartMeasurementSequence')
+        self.sessions[value(handle)]['sequence']['start'] = time.time()
+        setValue(pTriggerForced, 1)
+        return VI_SUCCESS
+
+    def GetMeasurementSequence(self, handle, baseTime, timeStamps, values, values2):
+        self.delay('GetMeasurementSequence')
+        h = value(handle)
+        seq = self.sessions[h]['sequence']
+        if seq['start'] is None:
+            return VI_ERROR_INV_OBJECT
+        n = 100*seq['baseTime']
+        # the capture runs in real time
+        wait = seq['start'] + n*self.SEQUENCE_SAMPLE_TIME - time.time()
+        if wait>0:
+            time.sleep(wait)
+        for i in range(n):
+            t = seq['start'] + i*self.SEQUENCE_SAMPLE_TIME
+            timeStamps[i] = i*self.SEQUENCE_SAMPLE_TIME*1e6
+            values[i] = self._powerAt(h, t)
+            values2[i] = 0.0
+        seq['start'] = None
+        return VI_SUCCESS
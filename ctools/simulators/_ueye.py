@@ -0,0 +1,209 @@
+import ctypes
+import time
+import numpy as np
+
+from ._base import SimulatedLibrary, value, setValue, deref, address
+from ...ids.tools import _enum as enum
+
+SUCCESS = 0
+NO_SUCCESS = -1
+INVALID_PARAMETER = 125
+
+
+class UEyeSimulator(SimulatedLibrary):
+    """
+    Simulated IDS uEye API. Use in place of ids.tools._ids_wrapper.
+
+    FreezeVideo renders an 8-bit frame (a gaussian spot on a noisy background) into the active image memory after the exposure time; CopyImageMem copies it to the caller's buffer.
+
+    INPUTS:
+    cameraIds -- camera ids of the simulated cameras.
+    size -- (width, height) of the sensor.
+    pixelClocks -- pixel clock rates in MHz the sensor supports.
+    latency, noise, seed -- see SimulatedLibrary. noise is the standard deviation of the background in counts.
+    """
+
+    wrapper = '.ids.tools._ids_wrapper'
+
+    def __init__(self, cameraIds=(1,), size=(1280, 1024), pixelClocks=(20, 30, 40), latency=0.0, noise=2.0, seed=None):
+        super().__init__(latency, noise, seed)
+        self.cameraIds = list(cameraIds)
+        self.size = size
+        self.pixelClocks = list(pixelClocks)
+        self.rng = np.random.RandomState(seed)
+        self.cameras = dict()
+        self.memories = dict()
+        self._nextPid = 1
+
+    def camera(self, hids):
+        return self.cameras[value(hids)]
+
+    def render(self, width, height, exposure):
+        """
+        Return a (height, width) uint8 frame exposed for exposure ms.
+        """
+        y, x = np.ogrid[0:height, 0:width]
+        spot = 200.0*np.exp(-((x-width/2.0)**2 + (y-height/2.0)**2)/(2*(0.05*width)**2))
+        frame = (10.0 + spot)*min(exposure/10.0, 1.0)
+        if self.noise:
+            frame = frame + self.noise*self.rng.standard_normal((height, width))
+        return np.clip(frame, 0, 255).astype(np.uint8)
+
+    #########################################
+    # Discovery
+
+    def GetNumberOfCameras(self, pNum):
+        self.delay('GetNumberOfCameras')
+        setValue(pNum, len(self.cameraIds))
+        return SUCCESS
+
+    def GetCameraList(self, pList):
+        self.delay('GetCameraList')
+        clist = deref(pList)
+        for i, cid in enumerate(self.cameraIds[:len(clist.cameras)]):
+            info = clist.cameras[i]
+            info.CameraID = cid
+            info.DeviceID = cid
+            info.SensorID = 1
+            info.InUse = 1 if cid in self.cameras else 0
+            info.SerNo = 'SIM{:05d}'.format(cid).encode()
+            info.Model = b'UI-SIM'
+        return SUCCESS
+
+    #########################################
+    # Session
+
+    def InitCamera(self, pHids, hwnd):
+        self.delay('InitCamera')
+        cid = value(pHids)
+        if cid not in self.cameraIds:
+            return NO_SUCCESS
+        self.cameras[cid] = {'colorMode': enum.IS_CM_MONO8, 'pixelClock': self.pixelClocks[0], 'exposure': 10.0, 'activeMem': None}
+        return SUCCESS
+
+    def ExitCamera(self, hids):
+        self.delay('ExitCamera')
+        self.cameras.pop(value(hids), None)
+        return SUCCESS
+
+    def GetSensorInfo(self, hids, pInfo):
+        self.delay('GetSensorInfo')
+        info = deref(pInfo)
+        info.SensorID = 1
+        info.Sensorname = b'SIM'
+        info.MaxWidth = self.size[0]
+        info.MaxHeight = self.size[1]
+        info.PixelSize = 520
+        return SUCCESS
+
+    def GetCameraInfo(self, hids, pInfo):
+        self.delay('GetCameraInfo')
+        info = deref(pInfo)
+        info.SerialNo = 'SIM{:05d}'.format(value(hids)).encode()
+        info.ID = b'Simulated'
+        return SUCCESS
+
+    def SetDisplayMode(self, hids, mode):
+        self.delay('SetDisplayMode')
+        return SUCCESS
+
+    def SetColorMode(self, hids, mode):
+        self.delay('SetColorMode')
+        self.camera(hids)['colorMode'] = value(mode)
+        return SUCCESS
+
+    def SetExternalTrigger(self, hids, mode):
+        self.delay('SetExternalTrigger')
+        return SUCCESS
+
+    #########################################
+    # Image memory
+
+    def AllocImageMem(self, hids, width, height, bitspixel, ppcMem, pPid):
+        self.delay('AllocImageMem')
+        w, h, bits = value(width), value(height), value(bitspixel)
+        buf = ctypes.create_string_buffer(w*h*bits//8)
+        with self.lock:
+            pid = self._nextPid
+            self._nextPid += 1
+        self.memories[pid] = {'buffer': buf, 'width': w, 'height': h}
+        # make the caller's char pointer point to the new buffer
+        ctypes.memmove(address(ppcMem), ctypes.byref(ctypes.c_void_p(ctypes.addressof(buf))), ctypes.sizeof(ctypes.c_void_p))
+        setValue(pPid, pid)
+        return SUCCESS
+
+    def SetImageMem(self, hids, pcMem, pid):
+        self.delay('SetImageMem')
+        pid = value(pid)
+        if pid not in self.memories:
+            return INVALID_PARAMETER
+        self.camera(hids)['activeMem'] = pid
+        return SUCCESS
+
+    def FreeImageMem(self, hids, pcMem, pid):
+        self.delay('FreeImageMem')
+        self.memories.pop(value(pid), None)
+        return SUCCESS
+
+    def FreezeVideo(self, hids, wait):
+        self.delay('FreezeVideo')
+        cam = self.camera(hids)
+        mem = self.memories.get(cam['activeMem'])
+        if mem is None:
+            return NO_SUCCESS
+        time.sleep(cam['exposure']/1000.0)
+        frame = self.render(mem['width'], mem['height'], cam['exposure'])
+        ctypes.memmove(mem['buffer'], frame.ctypes.data, frame.nbytes)
+        return SUCCESS
+
+    def CopyImageMem(self, hids, pcSource, pid, pcDest):
+        self.delay('CopyImageMem')
+        mem = self.memories.get(value(pid))
+        if mem is None:
+            return INVALID_PARAMETER
+        ctypes.memmove(address(pcDest), mem['buffer'], mem['width']*mem['height'])
+        return SUCCESS
+
+    def StopLiveVideo(self, hids, wait):
+        self.delay('StopLiveVideo')
+        return SUCCESS
+
+    #########################################
+    # Pixel clock and exposure (command-style functions)
+
+    def PixelClock(self, hids, command, pParam, size):
+        self.delay('PixelClock')
+        cam = self.camera(hids)
+        command = value(command)
+        param = deref(pParam)
+        if command==enum.IS_PIXELCLOCK_CMD_GET_NUMBER:
+            param.value = len(self.pixelClocks)
+        elif command==enum.IS_PIXELCLOCK_CMD_GET_LIST:
+            for i, clock in enumerate(self.pixelClocks):
+                param[i] = clock
+        elif command==enum.IS_PIXELCLOCK_CMD_GET:
+            param.value = cam['pixelClock']
+        elif command==enum.IS_PIXELCLOCK_CMD_SET:
+            if param.value not in self.pixelClocks:
+                return INVALID_PARAMETER
+            cam['pixelClock'] = param.value
+        else:
+            return INVALID_PARAMETER
+        return SUCCESS
+
+    def Exposure(self, hids, command, pParam, size):
+        self.delay('Exposure')
+        cam = self.camera(hids)
+        command = value(command)
+        param = deref(pParam)
+        if command==enum.IS_EXPOSURE_CMD_GET_EXPOSURE:
+            param.value = cam['exposure']
+        elif command==enum.IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_MIN:
+            param.value = 0.01
+        elif command==enum.IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_MAX:
+            param.value = 1000.0
+        elif command==enum.IS_EXPOSURE_CMD_SET_EXPOSURE:
+            cam['exposure'] = param.value
+        else:
+            return INVALID_PARAMETER
+        return SUCCESS
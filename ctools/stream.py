@@ -0,0 +1,96 @@
+"""
+Base class of the background acquisition streams (e.g. thorlabs.powermeter.PMStream, ophir.powermeter.OphirStream).
+
+A stream runs an acquisition loop on a daemon thread and writes (t, value) samples into a RingBuffer, where t is time.time() of the sample. Consumers look at the latest samples (latest(n), a zero-copy view) or follow the stream with iterBlocks() or by iterating it.
+"""
+import numpy as np
+
+from .ringbuffer import RingBuffer
+from .worker import Worker
+
+# one sample of a stream
+SAMPLE = np.dtype([('t', 'f8'), ('value', 'f8')])
+
+
+class SampleStream(Worker):
+    """
+    Subclasses implement _prepare(), called on the caller's thread by start() (e.g. to fail early if the device is not open), and _acquire(buffer, stop), the acquisition loop run by the thread until stop (a threading.Event) is set. See ctools.worker.Worker.
+
+    INPUTS:
+    capacity -- number of samples kept.
+    name -- name of the thread.
+    shape, dtype -- shape and dtype of one item of the ring buffer. The default is a (t, value) SAMPLE; streams of other items, e.g. spectra, keep their timestamps elsewhere (see thorlabs.spectrometer.CCSStream).
+    """
+
+    def __init__(self, capacity=100000, name='SampleStream', shape=(), dtype=SAMPLE):
+        super().__init__(name)
+        self._buffer = RingBuffer(capacity, shape, dtype)
+        self._dropped = 0
+
+    @property
+    def buffer(self):
+        return self._buffer
+
+    @property
+    def count(self):
+        """
+        Number of samples acquired since the stream started.
+        """
+        return self._buffer.count
+
+    @property
+    def dropped(self):
+        """
+        Number of samples iterBlocks()/__iter__ missed because the consumer fell behind by more than capacity samples.
+        """
+        return self._dropped
+
+    #########################################
+
+    def _acquire(self, buffer, stop, *args):
+        raise NotImplementedError
+
+    def _loop(self, *args):
+        self._acquire(self._buffer, self._stop, *args)
+
+    def _finished(self):
+        # wake up consumers waiting for samples
+        self._buffer.notify()
+
+    #########################################
+    # Consumers
+
+    def latest(self, n=None):
+        """
+        Return a view of the latest n samples (fields 't' and 'value'), oldest first.
+        """
+        return self._buffer.latest(n)
+
+    def iterBlocks(self, timeout=1.0, copy=True):
+        """
+        Yield arrays of the samples acquired since the previous block, starting with the samples acquired after the call. Ends when the stream stops; raises the acquisition error if the thread failed.
+
+        INPUTS:
+        timeout -- seconds to wait for new samples before yielding an empty block, so a GUI loop can keep going.
+        copy -- yield copies. With False the blocks are views, valid until the ring buffer wraps.
+        """
+        seq = self._buffer.count
+        while True:
+            running = self.isRunning()
+            self._buffer.wait(seq, timeout)
+            block, seq, dropped = self._buffer.since(seq)
+            self._dropped += dropped
+            if len(block)>0 or running:
+                yield block.copy() if copy else block
+            if not running and len(block)==0:
+                if self._error is not None:
+                    raise self._error
+                return
+
+    def __iter__(self):
+        """
+        Yield (t, value) of every new sample.
+        """
+        for block in self.iterBlocks(copy=False):
+            for t, value in block.tolist():
+                yield t, value
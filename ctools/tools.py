@@ -1,8 +1,121 @@
-from ctypes import CFUNCTYPE, CDLL
+from ctypes import CFUNCTYPE, CDLL, cdll
+from contextlib import contextmanager
 from typing import List, Any
+import threading
+
+from . import instrumentation
+
+
+class LazyLibrary(object):
+    """
+    A stand-in for a CDLL that defers locating and loading the vendor DLL until a function bound to it is first called.
+
+    INPUTS:
+    libname -- a file name of the DLL, such as "TLPM_64.dll".
+    foldername -- a folder name under root in which the DLL is searched for. See locateDll.
+    root -- a root directory to search the foldername in.
+    depends -- a list of LazyLibrary that must be loaded before this library, e.g. Thorlabs.MotionControl.DeviceManager.dll for Kinesis DLLs.
+    """
+
+    def __init__(self, libname: str, foldername: str, root: str="C:\\Program Files", depends: List[Any]=None):
+        self._libname = libname
+        self._foldername = foldername
+        self._root = root
+        self._depends = list(depends) if depends is not None else []
+        self._lib = None
+        self._lock = threading.Lock()
+
+    @property
+    def libname(self):
+        return self._libname
+
+    @property
+    def isLoaded(self):
+        return self._lib is not None
+
+    def load(self) -> CDLL:
+        """
+        Locate and load the DLL (and its dependencies) if it has not been loaded yet. Return the loaded CDLL.
+        """
+        if self._lib is None:
+            with self._lock:
+                if self._lib is None:
+                    for dep in self._depends:
+                        dep.load()
+                    from ..locateDll import locateDll
+                    dllpath = locateDll(self._libname, self._foldername, self._root)
+                    self._lib = cdll.LoadLibrary(dllpath.replace("\\","\\\\"))
+        return self._lib
+
+    def __repr__(self):
+        return '<LazyLibrary {} ({})>'.format(self._libname, 'loaded' if self.isLoaded else 'not loaded')
+
+
+class LazyFunction(object):
+    """
+    A callable returned by bind() for a LazyLibrary. The first call loads the library, looks up the symbol and sets its argtypes and restype. Later calls go straight to the bound function, or through a timing wrapper while instrumentation is enabled (see ctools.instrumentation).
+    """
+
+    __slots__ = ('library', 'name', 'argtypes', 'restype', '_func', '_call')
+
+    def __init__(self, lib: LazyLibrary, func: str,
+                 argtypes: List[Any]=None, restype: Any=None):
+        self.library = lib
+        self.name = func
+        self.argtypes = argtypes
+        self.restype = restype
+        self._func = None
+        self._call = None
+        instrumentation.register(self)
+
+    def resolve(self):
+        """
+        Bind the function now. Return the underlying (ctypes) function.
+        """
+        if self._func is None:
+            _func = getattr(self.library.load(), self.name, null_function)
+            _func.argtypes = self.argtypes
+            _func.restype = self.restype
+            self._func = _func
+        return self._func
+
+    def rebind(self):
+        """
+        Make the next call pick the direct or the instrumented call path again. Called when instrumentation is switched on or off.
+        """
+        self._call = None
+
+    def _prepare(self):
+        _func = self.resolve()
+        if instrumentation.isEnabled():
+            _func = instrumentation.instrumented(_func, self.library.libname, self.name)
+        self._call = _func
+        return _func
+
+    def target(self):
+        """
+        Return what a call goes to right now: the ctypes function, or its timing wrapper while instrumentation is enabled. Hot loops may call it directly to save the extra Python call of __call__.
+        """
+        _call = self._call
+        if _call is None:
+            _call = self._prepare()
+        return _call
+
+    def __call__(self, *args):
+        _call = self._call
+        if _call is None:
+            _call = self._prepare()
+        return _call(*args)
+
+    def __repr__(self):
+        return '<LazyFunction {} of {}>'.format(self.name, self.library.libname)
+
 
 def bind(lib: CDLL, func: str,
          argtypes: List[Any]=None, restype: Any=None) -> CFUNCTYPE:
+    if isinstance(lib, LazyLibrary):
+        return LazyFunction(lib, func, argtypes, restype)
+
     _func = getattr(lib, func, null_function)
     _func.argtypes = argtypes
     _func.restype = restype
@@ -13,7 +126,30 @@ def bind(lib: CDLL, func: str,
 def null_function():
     pass
 
+
+@contextmanager
+def quiet(device, **flags):
+    """
+    Turn off the messages of device (verbose=False) for the block and restore them afterwards. Printing a message per call delays a tight loop, e.g. the moves of a control loop or the switches of a shutter schedule.
+
+    INPUTS:
+    device -- an object with a verbose attribute, e.g. a KCube Motor or an IDS Camera.
+    flags -- other attributes of device to set for the block, e.g. wait=False for a Motor.
+    """
+    flags.setdefault('verbose', False)
+    saved = dict((name, getattr(device, name)) for name in flags)
+    try:
+        for name, value in flags.items():
+            setattr(device, name, value)
+        yield device
+    finally:
+        for name, value in saved.items():
+            setattr(device, name, value)
+
 __all__ = [
     bind,
     null_function,
-]
\ No newline at end of file
+    quiet,
+    LazyLibrary,
+    LazyFunction,
+]
@@ -0,0 +1,84 @@
+"""
+Base class of the objects that run a loop on background threads: the acquisition streams (ctools.stream), the alarm monitor (ctools.alarm), the dark adjustment monitor (thorlabs.powermeter.PMDark) and the procedures (thorlabs.procedures).
+"""
+import threading
+
+
+class Worker(object):
+    """
+    The start/stop life cycle of a loop run on a daemon thread.
+
+    Subclasses implement _loop(*args), run by the thread until the stop event (self._stop, a threading.Event) is set, and may implement _prepare(), called on the caller's thread by start() (e.g. to fail early if the device is not open) and returning the arguments of _loop. An object running several loops at once overrides _loops().
+
+    An exception raised by a loop is kept in error and sets the stop event, so the other loops end too. _finished() is called on each thread when its loop ended, e.g. to wake up consumers.
+
+    INPUTS:
+    name -- name of the thread.
+    """
+
+    def __init__(self, name='Worker'):
+        self._name = name
+        self._threads = []
+        self._stop = threading.Event()
+        self._error = None
+
+    @property
+    def error(self):
+        """
+        The exception that stopped the thread, or None.
+        """
+        return self._error
+
+    def isRunning(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    #########################################
+
+    def _prepare(self):
+        return ()
+
+    def _loops(self):
+        """
+        Return a list of (thread name, loop) of the threads started by start(). Each loop is called with the arguments returned by _prepare().
+        """
+        return [(self._name, self._loop)]
+
+    def _loop(self, *args):
+        raise NotImplementedError
+
+    def _finished(self):
+        pass
+
+    def start(self):
+        if self.isRunning():
+            return
+        args = tuple(self._prepare())
+        self._stop.clear()
+        self._error = None
+        self._threads = [threading.Thread(target=self._run, args=(loop,)+args, name=name, daemon=True) for name, loop in self._loops()]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self, loop, *args):
+        try:
+            loop(*args)
+        except Exception as e:
+            if self._error is None:
+                self._error = e
+            self._stop.set()
+        finally:
+            self._finished()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
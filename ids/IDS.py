@@ -1,11 +1,9 @@
 from ctypes import c_int, c_ulong, ARRAY, pointer, POINTER
 from ctypes import byref
 import ctypes
-import pandas as pd
 import warnings
 import typing
 import numpy as np
-from pyueye import ueye
 from time import sleep
 
 from .tools import _ids_wrapper as K
@@ -52,9 +50,9 @@ class DeviceManager(object):
 		Inputs:
 		show -- a boolean indicating whether to show the list in the command prompt or not.
 		"""
+		import pandas as pd
 		n_cam = self.getNumberOfCameras()
 
-		plist = pd.DataFrame()
 		plist = pd.DataFrame(columns=['CameraID', 'DeviceID', 'SensorID','InUse','SerNo','Model','Status'])
 		if n_cam<1:
 			warnings.warn('Found no camera.')
@@ -279,7 +277,7 @@ class Camera(object):
 			self.verboseMessage('Capturing a single frame...')
 			self.setImgMem()
 			sleep(0.2)
-			err_code = self.library.FreezeVideo(self.cameraId_c, ueye.IS_WAIT)
+			err_code = self.library.FreezeVideo(self.cameraId_c, enum.IS_WAIT)
 			# err_code = self.library.CaptureSingle(self.cameraId_c, ctypes.c_int(0x0000))  # #IS_DONT_WAIT  = 0x0000, or IS_GET_LIVE = 0x8000
 			sleep(0.2)
 			if err_code==enum.SUCCESS:
@@ -309,7 +307,7 @@ class Camera(object):
 		else:
 			raise self.notInSessionMsg()
 
-	def setColorMode(self, mode = ueye.IS_CM_MONO8):
+	def setColorMode(self, mode = enum.IS_CM_MONO8):
 		if self.isInSession:
 			self.verboseMessage('Setting color mode...')
 			err_code = self.library.SetColorMode(self.cameraId_c, mode)
@@ -320,7 +318,7 @@ class Camera(object):
 		else:
 			raise self.notInSessionMsg()
 
-	def setExternalTrigger(self, mode = ueye.IS_SET_TRIGGER_SOFTWARE):
+	def setExternalTrigger(self, mode = enum.IS_SET_TRIGGER_SOFTWARE):
 		if self.isInSession:
 			self.verboseMessage('Setting external trigger mode...')
 			err_code = self.library.SetExternalTrigger(self.cameraId_c, mode)
@@ -419,11 +417,11 @@ class Camera(object):
 	def getPixelClockList(self):
 		if self.isInSession:
 			nclocks = ctypes.c_uint(0)
-			err_code = self.library.PixelClock(self.cameraId_c, ueye.IS_PIXELCLOCK_CMD_GET_NUMBER, byref(nclocks), ctypes.sizeof(nclocks))
+			err_code = self.library.PixelClock(self.cameraId_c, enum.IS_PIXELCLOCK_CMD_GET_NUMBER, byref(nclocks), ctypes.sizeof(nclocks))
 			if err_code!=enum.SUCCESS:
 				raise Exception('Failed to get pixel clock number. Error code: {}.'.format(err_code))
 			clocklist = (ctypes.c_uint*150)()
-			err_code = self.library.PixelClock(self.cameraId_c, ueye.IS_PIXELCLOCK_CMD_GET_LIST, byref(clocklist), nclocks.value*ctypes.sizeof(ctypes.c_uint))
+			err_code = self.library.PixelClock(self.cameraId_c, enum.IS_PIXELCLOCK_CMD_GET_LIST, byref(clocklist), nclocks.value*ctypes.sizeof(ctypes.c_uint))
 			if err_code!=enum.SUCCESS:
 				raise Exception('Failed to get pixel clock list. Error code: {}.'.format(err_code))
 			return clocklist[0:nclocks.value]
@@ -433,7 +431,7 @@ class Camera(object):
 	def getPixelClock(self):
 		if self.isInSession:
 			clock = ctypes.c_uint(0)
-			err_code = self.library.PixelClock(self.cameraId_c, ueye.IS_PIXELCLOCK_CMD_GET, byref(clock), ctypes.sizeof(clock))
+			err_code = self.library.PixelClock(self.cameraId_c, enum.IS_PIXELCLOCK_CMD_GET, byref(clock), ctypes.sizeof(clock))
 			if err_code!=enum.SUCCESS:
 				raise Exception('Failed to get a current pixel clock. Error code: {}.'.format(err_code))
 			return clock.value
@@ -451,7 +449,7 @@ class Camera(object):
 				raise ValueError('Clock rate must be a member of {}.'.format(self.getPixelClockList))
 			self.verboseMessage('Setting pixel clock to {} MHz...'.format(val))
 			val_c = ctypes.c_uint(val)
-			err_code = self.library.PixelClock(self.cameraId_c, ueye.IS_PIXELCLOCK_CMD_SET, byref(val_c), ctypes.sizeof(val_c))
+			err_code = self.library.PixelClock(self.cameraId_c, enum.IS_PIXELCLOCK_CMD_SET, byref(val_c), ctypes.sizeof(val_c))
 			if err_code!=enum.SUCCESS:
 				raise Exception('Failed to set pixel clock. Error code: {}.'.format(err_code))
 			self.verboseMessage('Done setting pixel clock.')
@@ -461,7 +459,7 @@ class Camera(object):
 	def getExposureTime(self):
 		if self.isInSession:
 			expTime = ctypes.c_double(0)
-			err_code = self.library.Exposure(self.cameraId_c, ueye.IS_EXPOSURE_CMD_GET_EXPOSURE, byref(expTime), ctypes.sizeof(expTime))
+			err_code = self.library.Exposure(self.cameraId_c, enum.IS_EXPOSURE_CMD_GET_EXPOSURE, byref(expTime), ctypes.sizeof(expTime))
 			if err_code!=enum.SUCCESS:
 				raise Exception('Failed to get current exposure time. Error code: {}.'.format(err_code))
 			return expTime.value
@@ -471,7 +469,7 @@ class Camera(object):
 	def getMaxExposureTime(self):
 		if self.isInSession:
 			expTime = ctypes.c_double(0)
-			err_code = self.library.Exposure(self.cameraId_c, ueye.IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_MAX, byref(expTime), ctypes.sizeof(expTime))
+			err_code = self.library.Exposure(self.cameraId_c, enum.IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_MAX, byref(expTime), ctypes.sizeof(expTime))
 			if err_code!=enum.SUCCESS:
 				raise Exception('Failed to get current exposure time. Error code: {}.'.format(err_code))
 			return expTime.value
@@ -481,7 +479,7 @@ class Camera(object):
 	def getMinExposureTime(self):
 		if self.isInSession:
 			expTime = ctypes.c_double(0)
-			err_code = self.library.Exposure(self.cameraId_c, ueye.IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_MIN, byref(expTime), ctypes.sizeof(expTime))
+			err_code = self.library.Exposure(self.cameraId_c, enum.IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_MIN, byref(expTime), ctypes.sizeof(expTime))
 			if err_code!=enum.SUCCESS:
 				raise Exception('Failed to get current exposure time. Error code: {}.'.format(err_code))
 			return expTime.value
@@ -497,7 +495,7 @@ class Camera(object):
 				raise ValueError('Exposure time must be between {} to {} ms.'.format(mintime, maxtime))
 			self.verboseMessage('Setting exposure time to {} ms...'.format(val))
 			val_c = ctypes.c_double(val)
-			err_code = self.library.Exposure(self.cameraId_c, ueye.IS_EXPOSURE_CMD_SET_EXPOSURE, byref(val_c), ctypes.sizeof(val_c))
+			err_code = self.library.Exposure(self.cameraId_c, enum.IS_EXPOSURE_CMD_SET_EXPOSURE, byref(val_c), ctypes.sizeof(val_c))
 			if err_code!=enum.SUCCESS:
 				raise Exception('Failed to set exposure time.')
 			self.verboseMessage('Done setting exposure time.')
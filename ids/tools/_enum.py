@@ -44,3 +44,28 @@ ACCESS_VIOLATION = 129
 SET_DM_DIB = c_int(1)
 SET_DM_DIRECT3D = c_int(4)
 SET_DM_OPENGL = c_int(8)
+
+
+############################################################
+### uEye API constants (as in uEye.h), so the driver does not need pyueye
+IS_DONT_WAIT = 0x0000
+IS_WAIT = 0x0001
+
+IS_CM_MONO8 = 6
+
+IS_SET_TRIGGER_CONTINUOUS = 0x1000
+IS_SET_TRIGGER_SOFTWARE = IS_SET_TRIGGER_CONTINUOUS | 0x0008
+
+# is_PixelClock commands
+IS_PIXELCLOCK_CMD_GET_NUMBER = 1
+IS_PIXELCLOCK_CMD_GET_LIST = 2
+IS_PIXELCLOCK_CMD_GET_RANGE = 3
+IS_PIXELCLOCK_CMD_GET_DEFAULT = 4
+IS_PIXELCLOCK_CMD_GET = 5
+IS_PIXELCLOCK_CMD_SET = 6
+
+# is_Exposure commands
+IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_MIN = 3
+IS_EXPOSURE_CMD_GET_EXPOSURE_RANGE_MAX = 4
+IS_EXPOSURE_CMD_GET_EXPOSURE = 7
+IS_EXPOSURE_CMD_SET_EXPOSURE = 12
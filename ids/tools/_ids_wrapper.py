@@ -1,6 +1,5 @@
 from ctypes import (
     Structure,
-    cdll,
     c_bool,
     c_short,
     c_int,
@@ -26,17 +25,15 @@ from ctypes import (
 c_word = c_ushort
 c_dword = c_ulong
 
-from ...ctools.tools import bind, null_function
+from ...ctools.tools import bind, LazyLibrary
 from . import _enum as enum
 
 # lib_api_path = r"C:\Windows\System32\uEye_api_64.dll"
 # lib_api = cdll.LoadLibrary(lib_api_path)
 
-from ...locateDll import locateDll
 libname = "uEye_api_64.dll"
 foldername = "System32"
-dllpath  = locateDll(libname,  foldername, "C:\\Windows")
-lib_api = cdll.LoadLibrary(dllpath.replace("\\","\\\\"))
+lib_api = LazyLibrary(libname, foldername, "C:\\Windows")
 
 
 class StructureEx(Structure):
@@ -1,51 +1,195 @@
 import os
-from .__init__ import initialize as check
-import pandas as pd
-from PyQt5.QtWidgets import QApplication, QFileDialog
+import json
+import csv
+import threading
+from . import configFolder
 
-configFullpath = check()
-confData = pd.read_csv(configFullpath)
+# When False, locateDll never imports PyQt5 nor asks the user to pick a folder. It raises instead.
+INTERACTIVE = True
+
+# File extensions recorded while scanning a vendor folder. Any other file name asked for is recorded too.
+INDEX_EXTENSIONS = ('.dll', '.xml')
+
+# Folders (and everything under them) where only the file asked for is recorded, not its siblings, so e.g. a lookup in System32 does not put every system DLL into the index.
+SYSTEM_ROOTS = [os.environ.get('SystemRoot', 'C:\\Windows')]
+
+indexFilename = 'dllindex.json'
+legacyFilename = 'dlllocations.csv'
 
 def openfile_dialog(foldername="a"):
+    from PyQt5.QtWidgets import QApplication, QFileDialog
     app = QApplication([dir])
     msg = "Select " + foldername +" folder"
     fname = QFileDialog.getExistingDirectory(None, msg, '/home')
     return str(fname)
 
-def locateDll(dllname, foldername, root="C:\\Program Files"):
 
-	# check from config file
-	subconfData = confData[confData['item']==dllname]
+class DllIndex(object):
+	"""
+	A persistent index of DLL (and other vendor file) locations, keyed by file name.
 
-	if subconfData.shape[0]==0 or not os.path.exists(subconfData['location'].values[0]): # i.e. if the dllname is not in the config file, we need try to locate that dllname.
+	Each entry keeps the path with the mtime and size seen when it was recorded. An entry whose file is gone or changed is dropped on lookup, and the index saved without it. A miss is resolved by scanning a vendor folder once and recording every matching file found in it, so later lookups of sibling DLLs are free. Under a system folder (see SYSTEM_ROOTS) only the file asked for is recorded.
 
-		fdList = os.listdir(root)
-		isExist = foldername in set(fdList)
+	INPUTS:
+	path -- a full path to the JSON index file.
+	"""
 
-		if not isExist: ## cannot find foldername in current root, will try to let user pick the location once.
-			folderpath = openfile_dialog(foldername)
-		else:
-			folderpath = os.path.join(root, foldername)
-
-		if folderpath!='' and os.path.exists(folderpath):
-			dllpath = ""
-			for nroot, dirs, files in os.walk(folderpath):
-				remain = set([dllname]).intersection(set(files))
-				if len(remain)>0:
-					dllpath = os.path.join(nroot, list(remain)[0])
-
-			if dllpath!="": # save to the config file
-				nrow = confData.shape[0]+1
-				confData.loc[nrow,:] = [dllname, dllpath]
-				confData.to_csv(configFullpath, index = False)
-				return dllpath
+	def __init__(self, path):
+		self._path = path
+		self._entries = None
+		self._lock = threading.RLock()
+
+	@property
+	def path(self):
+		return self._path
+
+	@property
+	def entries(self):
+		if self._entries is None:
+			self.load()
+		return self._entries
+
+	def load(self):
+		with self._lock:
+			entries = dict()
+			if os.path.exists(self.path):
+				try:
+					with open(self.path, 'r') as f:
+						entries = json.load(f)
+				except ValueError:
+					entries = dict()
 			else:
-				raise Exception('Fail to locate {}'.format(foldername))
+				entries = self._importLegacy()
+			self._entries = entries
+		return self._entries
 
-		else:
-			## cannot find foldername in current root, will try to let user pick the location once.
-			raise Exception('Fail to locate {} folder'.format(foldername))
+	def save(self):
+		with self._lock:
+			tmppath = self.path + '.tmp'
+			with open(tmppath, 'w') as f:
+				json.dump(self.entries, f, indent=1, sort_keys=True)
+			os.replace(tmppath, self.path)
+
+	def get(self, name):
+		"""
+		Return a recorded path of the given file name, or None if it is not recorded or the file changed since.
+		"""
+		with self._lock:
+			entry = self.entries.get(name)
+			if entry is None:
+				return None
+			try:
+				st = os.stat(entry['location'])
+			except OSError:
+				st = None
+			if st is None or (entry.get('mtime') is not None and (st.st_mtime != entry['mtime'] or st.st_size != entry['size'])):
+				del self.entries[name]
+				# persist the removal, or every run would find the stale entry again
+				self.save()
+				return None
+			return entry['location']
+
+	def add(self, name, location):
+		st = os.stat(location)
+		with self._lock:
+			self.entries[name] = {'location': location, 'mtime': st.st_mtime, 'size': st.st_size}
+
+	def scan(self, folderpath, extra=(), siblings=True):
+		"""
+		Walk folderpath once and record every file with an extension in INDEX_EXTENSIONS (or a name in extra). Return the number of recorded files.
+
+		siblings -- if False, record only the names in extra and stop walking once they are all found. Used for system folders.
+		"""
+		extra = set(extra)
+		found = dict()
+		for nroot, dirs, files in os.walk(folderpath):
+			for fname in files:
+				if fname in extra or (siblings and os.path.splitext(fname)[1].lower() in INDEX_EXTENSIONS):
+					found[fname] = os.path.join(nroot, fname)
+			if not siblings and extra.issubset(found):
+				break
+		with self._lock:
+			for fname, location in found.items():
+				try:
+					self.add(fname, location)
+				except OSError:
+					pass
+		return len(found)
 
+	def _importLegacy(self):
+		# seed from the old dlllocations.csv so existing machines do not need a rescan
+		entries = dict()
+		csvpath = os.path.join(os.path.dirname(self.path), legacyFilename)
+		if os.path.exists(csvpath):
+			with open(csvpath, 'r', newline='') as f:
+				for row in csv.DictReader(f):
+					if row.get('item') and row.get('location'):
+						entries[row['item']] = {'location': row['location'], 'mtime': None, 'size': None}
+		return entries
 
-	else: # i.e. if the dllname is in the config file, we return the path saved in the config file.
-		return subconfData['location'].values[0]
\ No newline at end of file
+
+_index = None
+_indexLock = threading.Lock()
+
+def getIndex():
+	"""
+	Return the default DllIndex stored in the .pylabinstrument folder.
+	"""
+	global _index
+	if _index is None:
+		with _indexLock:
+			if _index is None:
+				_index = DllIndex(os.path.join(configFolder(), indexFilename))
+	return _index
+
+
+def isSystemFolder(path):
+	"""
+	Return True if path is one of SYSTEM_ROOTS or under one.
+	"""
+	path = os.path.normcase(os.path.abspath(path))
+	for sysroot in SYSTEM_ROOTS:
+		sysroot = os.path.normcase(os.path.abspath(sysroot))
+		if path==sysroot or path.startswith(sysroot.rstrip(os.sep) + os.sep):
+			return True
+	return False
+
+
+def locateDll(dllname, foldername, root="C:\\Program Files", interactive=None, index=None):
+	"""
+	Return a full path of dllname, which is expected somewhere under root\\foldername.
+
+	INPUTS:
+	dllname -- a file name, such as "TLPM_64.dll".
+	foldername -- a folder under root to be scanned when dllname is not in the index.
+	root -- a root directory.
+	interactive -- if True and foldername is not in root, ask the user to pick the folder. None uses the module-level INTERACTIVE.
+	index -- a DllIndex to use. None uses the default one (see getIndex).
+	"""
+	if index is None:
+		index = getIndex()
+	if interactive is None:
+		interactive = INTERACTIVE
+
+	# check from the index
+	dllpath = index.get(dllname)
+	if dllpath is not None:
+		return dllpath
+
+	folderpath = os.path.join(root, foldername)
+	if not os.path.isdir(folderpath):
+		if not interactive:
+			raise Exception('Fail to locate {} folder'.format(foldername))
+		## cannot find foldername in current root, will try to let user pick the location once.
+		folderpath = openfile_dialog(foldername)
+
+	if folderpath!='' and os.path.exists(folderpath):
+		index.scan(folderpath, extra=[dllname], siblings=not isSystemFolder(folderpath))
+		dllpath = index.get(dllname)
+		index.save()
+		if dllpath is not None:
+			return dllpath
+		else:
+			raise Exception('Fail to locate {}'.format(foldername))
+	else:
+		raise Exception('Fail to locate {} folder'.format(foldername))
@@ -2,14 +2,33 @@ import win32com.client
 import time
 import numpy as np
 
-print("Performaing client dispatch to OphirLMMeasurement.CoLMMeasurement")
-try:
-    OphirCOM = win32com.client.Dispatch("OphirLMMeasurement.CoLMMeasurement")
-except:
-    raise Exception("Failed to perform client dispatch. Make sure ophir devices and drivers are properly installed and connected.")
+from ..ctools.stream import SampleStream, SAMPLE
+
+_OphirCOM = None
+
+def get_com():
+    """
+    Return the OphirLMMeasurement COM object, dispatching it on first use.
+    """
+    global _OphirCOM
+    if _OphirCOM is None:
+        print("Performaing client dispatch to OphirLMMeasurement.CoLMMeasurement")
+        try:
+            _OphirCOM = win32com.client.Dispatch("OphirLMMeasurement.CoLMMeasurement")
+        except:
+            raise Exception("Failed to perform client dispatch. Make sure ophir devices and drivers are properly installed and connected.")
+    return _OphirCOM
+
+
+def __getattr__(name):
+    # keep module.OphirCOM working without dispatching at import
+    if name == 'OphirCOM':
+        return get_com()
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
 
 
 def get_devicelist():
+    OphirCOM = get_com()
     OphirCOM.StopAllStreams()
     OphirCOM.CloseAll()
     # Scan for connected Devices
@@ -18,10 +37,12 @@ def get_devicelist():
 
 
 def close_all():
+    OphirCOM = get_com()
     OphirCOM.CloseAll()
 
 
 def stop_all_streams():
+    OphirCOM = get_com()
     OphirCOM.StopAllStreams()
 
 
@@ -34,6 +55,7 @@ class OphirPM:
         self.data_delay_time = data_delay_time
 
     def open(self):
+        OphirCOM = get_com()
         if self.device_handle is None:
             self.device_handle = OphirCOM.OpenUSBDevice(self.serial_no)
             OphirCOM.StartStream(self.device_handle, self.channel)
@@ -41,6 +63,7 @@ class OphirPM:
             raise Exception("Communication is already open.")
 
     def close(self):
+        OphirCOM = get_com()
         if self.device_handle is not None:
             OphirCOM.StopStream(self.device_handle, self.channel)
             OphirCOM.Close(self.device_handle)
@@ -51,6 +74,7 @@ class OphirPM:
         #     channel = self.channel
         # OphirCOM.StartStream(self.device_handle, channel)
         # time.sleep(self.data_delay_time)
+        OphirCOM = get_com()
         count = 0
         while True:
             data = OphirCOM.GetData(self.device_handle, self.channel)
@@ -65,6 +89,75 @@ class OphirPM:
                 return data
         return data
 
+    def stream(self, capacity=100000, interval=0.01, start=True):
+        """
+        Return an OphirStream that collects the samples of the open device on a background thread into a ring buffer, the same way PowerMeter.stream() does for Thorlabs meters.
+
+        INPUTS:
+        capacity -- number of (t, value) samples kept.
+        interval -- seconds between two GetData calls.
+        start -- start the acquisition thread now.
+        """
+        if self.device_handle is None:
+            raise Exception("Communication is not open. Run .open() first.")
+        stream = OphirStream(self, capacity, interval)
+        if start:
+            stream.start()
+        return stream
+
+
+class OphirStream(SampleStream):
+    """
+    Background acquisition of an OphirPM. The device streams on its own (see OphirPM.open); the thread fetches the new samples with GetData, keeps the valid ones (status 0) and writes them with their device time stamps, converted to time.time(), into a RingBuffer. See ctools.stream.SampleStream.
+
+    INPUTS:
+    pm -- an open OphirPM.
+    capacity -- number of samples kept.
+    interval -- seconds between two GetData calls.
+    """
+
+    def __init__(self, pm, capacity=100000, interval=0.01):
+        super().__init__(capacity, name='OphirStream')
+        self._pm = pm
+        self._interval = interval
+
+    @property
+    def pm(self):
+        return self._pm
+
+    def _prepare(self):
+        import pythoncom
+        if self._pm.device_handle is None:
+            raise Exception("Communication is not open. Run .open() first.")
+        # the COM object belongs to this thread's apartment; hand it over to the acquisition thread
+        stream = pythoncom.CoMarshalInterThreadInterfaceInStream(pythoncom.IID_IDispatch, get_com()._oleobj_)
+        return (stream,)
+
+    def _acquire(self, buffer, stop, comStream):
+        import pythoncom
+        pythoncom.CoInitialize()
+        try:
+            com = win32com.client.Dispatch(pythoncom.CoGetInterfaceAndReleaseStream(comStream, pythoncom.IID_IDispatch))
+            handle, channel = self._pm.device_handle, self._pm.channel
+            offset = None
+            while not stop.is_set():
+                data = com.GetData(handle, channel)
+                values = np.asarray(data[0], dtype=np.float64)
+                if values.size>0:
+                    stamps = np.asarray(data[1], dtype=np.float64)*1e-3
+                    valid = np.asarray(data[-1])==0
+                    if offset is None:
+                        # device time stamps are milliseconds from the start of its stream
+                        offset = time.time() - stamps[-1]
+                    block = np.empty(int(valid.sum()), dtype=SAMPLE)
+                    block['t'] = stamps[valid] + offset
+                    block['value'] = values[valid]
+                    if len(block)>0:
+                        buffer.extend(block)
+                stop.wait(self._interval)
+        finally:
+            pythoncom.CoUninitialize()
+
 
 def treat_data_func(data):
     values = np.array(data[0])
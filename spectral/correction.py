@@ -0,0 +1,184 @@
+"""
+Dark subtraction and flat-field (response) correction of spectra:
+
+    corrected = (raw - dark(integrationTime))/flat
+
+The dark reference depends on the integration time, so a SpectrumCorrection caches one per integration time and acquires a new one (with the acquireDark callable, e.g. from ccsDarkAcquirer) the first time a spectrum of a new integration time is corrected:
+
+    corr = SpectrumCorrection(3648, acquireDark=ccsDarkAcquirer(ccs, shutter=shutter), flat=response)
+    datas, wl = ccs.sweep(100)
+    corr.apply(datas, ccs.integrationTime)   # in place, all 100 spectra at once
+"""
+import threading
+from collections import OrderedDict
+from time import sleep
+import numpy as np
+
+
+def _key(integrationTime):
+    # integration times compared to the microsecond, so 0.01 and 0.010000000001 share a dark
+    return int(round(float(integrationTime)*1e6))
+
+
+class SpectrumCorrection(object):
+    """
+    INPUTS:
+    nPixels -- number of pixels of a spectrum.
+    acquireDark -- a callable f(integrationTime) returning a dark spectrum (nPixels values), called when no dark is cached for an integration time. None: darks must be given with setDark().
+    flat -- the relative response of each pixel, which corrected spectra are divided by. None does not correct the response.
+    maxDarks -- number of darks kept; the least recently used is dropped.
+    """
+
+    def __init__(self, nPixels, acquireDark=None, flat=None, maxDarks=8):
+        self._nPixels = int(nPixels)
+        self.acquireDark = acquireDark
+        self._maxDarks = maxDarks
+        self._darks = OrderedDict()
+        self._lock = threading.Lock()
+        self._gain = None
+        if flat is not None:
+            self.setFlat(flat)
+
+    @property
+    def nPixels(self):
+        return self._nPixels
+
+    #########################################
+    # Dark references
+
+    def setDark(self, integrationTime, dark):
+        """
+        Cache dark (nPixels values) as the dark reference of integrationTime in seconds. Return the cached (read-only) copy.
+        """
+        dark = np.array(dark, dtype=np.float64)
+        if dark.shape!=(self._nPixels,):
+            raise ValueError('dark must have {} values, got shape {}.'.format(self._nPixels, dark.shape))
+        dark.flags.writeable = False
+        with self._lock:
+            self._darks[_key(integrationTime)] = dark
+            self._darks.move_to_end(_key(integrationTime))
+            while len(self._darks)>self._maxDarks:
+                self._darks.popitem(last=False)
+        return dark
+
+    def getDark(self, integrationTime):
+        """
+        Return the (read-only) dark reference of integrationTime in seconds, acquiring it with acquireDark if it is not cached.
+        """
+        key = _key(integrationTime)
+        with self._lock:
+            dark = self._darks.get(key)
+            if dark is not None:
+                self._darks.move_to_end(key)
+                return dark
+        if self.acquireDark is None:
+            raise Exception('No dark reference for integration time {} s and no acquireDark to take one.'.format(integrationTime))
+        return self.setDark(integrationTime, self.acquireDark(integrationTime))
+
+    def hasDark(self, integrationTime):
+        return _key(integrationTime) in self._darks
+
+    def invalidateDarks(self):
+        """
+        Drop every cached dark, e.g. after the detector temperature changed.
+        """
+        with self._lock:
+            self._darks.clear()
+
+    #########################################
+    # Flat field
+
+    def setFlat(self, flat, minResponse=1e-6):
+        """
+        Set the relative response of each pixel. Pixels with a response below minResponse are set to 0 in corrected spectra.
+        """
+        if flat is None:
+            self._gain = None
+            return
+        flat = np.asarray(flat, dtype=np.float64)
+        if flat.shape!=(self._nPixels,):
+            raise ValueError('flat must have {} values, got shape {}.'.format(self._nPixels, flat.shape))
+        # multiply by the reciprocal: cheaper than dividing every spectrum
+        gain = np.zeros(self._nPixels)
+        valid = flat>=minResponse
+        gain[valid] = 1.0/flat[valid]
+        self._gain = gain
+
+    @property
+    def flat(self):
+        if self._gain is None:
+            return None
+        with np.errstate(divide='ignore'):
+            return np.where(self._gain>0, 1.0/self._gain, 0.0)
+
+    #########################################
+
+    def apply(self, spectra, integrationTime, copy=False):
+        """
+        Correct a spectrum (nPixels) or a batch of spectra (N x nPixels) measured at integrationTime seconds. Return the corrected spectra.
+
+        INPUTS:
+        spectra -- the raw spectra.
+        integrationTime -- integration time in seconds, which selects the dark reference.
+        copy -- with False, spectra (a writable float64 array) is corrected in place. With True it is left as it is.
+        """
+        dark = self.getDark(integrationTime)
+        if copy or not isinstance(spectra, np.ndarray) or spectra.dtype!=np.float64 or not spectra.flags.writeable:
+            spectra = np.array(spectra, dtype=np.float64)
+        np.subtract(spectra, dark, out=spectra)
+        if self._gain is not None:
+            np.multiply(spectra, self._gain, out=spectra)
+        return spectra
+
+
+#############################################################
+### Dark acquisition for the spectrometers of this package
+
+def ccsDarkAcquirer(ccs, avgN=10, shutter=None, settle=0.05):
+    """
+    Return an acquireDark callable for a CCS: it averages avgN scans at the requested integration time with the light blocked, and puts the integration time back.
+
+    INPUTS:
+    ccs -- an open thorlabs.spectrometer.CCS.
+    avgN -- number of scans averaged.
+    shutter -- an open KCubeSolenoid.Motor closed during the dark. None: the light must be blocked some other way.
+    settle -- seconds waited after closing the shutter.
+    """
+    def acquireDark(integrationTime):
+        previous = ccs.integrationTime
+        if _key(integrationTime)!=_key(previous):
+            ccs.setIntegrationTime(integrationTime)
+        if shutter is not None:
+            shutter.shutterOff()
+            sleep(settle)
+        try:
+            (dark, _) = ccs.sweepAvg(avgN)
+        finally:
+            if shutter is not None:
+                shutter.shutterOn()
+            if _key(integrationTime)!=_key(previous):
+                ccs.setIntegrationTime(previous)
+        return dark
+    return acquireDark
+
+
+def oceanDarkAcquirer(spectrometer, avgN=10, shutter=None, settle=0.05):
+    """
+    Return an acquireDark callable for an oceanoptics Spectrometer: it sets the integration time, then averages avgN spectra with the light blocked. The spectrometer is left at the requested integration time.
+
+    See ccsDarkAcquirer for the inputs.
+    """
+    def acquireDark(integrationTime):
+        spectrometer.integration_time_micros(integrationTime*1e6)
+        if shutter is not None:
+            shutter.shutterOff()
+            sleep(settle)
+        try:
+            dark = np.zeros(len(spectrometer.get_wavelength()))
+            for i in range(avgN):
+                dark += spectrometer.measure(verbose=False)
+        finally:
+            if shutter is not None:
+                shutter.shutterOn()
+        return dark/avgN
+    return acquireDark
@@ -0,0 +1,359 @@
+"""
+An append-only spectral cube (time x pixel) on disk, for long time-resolved runs that do not fit in memory.
+
+A cube is a folder:
+    meta.json       -- number of pixels, dtype of the spectra, user attributes
+    wavelength.npy  -- the wavelength axis
+    spectra.bin     -- the spectra, one row of nPixels after the other
+    frames.bin      -- per frame: time.time() and integration time in seconds (FRAME records)
+
+A CubeWriter collects spectra into chunks and a background thread appends full chunks to the files, so the acquisition loop never waits for the disk (unless it is slower than the acquisition). A SpectralCube memory-maps the files for reading, also while they are still being written: a frame is visible once its FRAME record is on disk, and refresh() picks up new frames.
+
+    with CubeWriter('run1', ccs.getWavelength(), attrs={'sample': 'A'}) as writer:
+        writer.follow(ccs.stream())         # or writer.append(spectrum, t, integrationTime)
+        ...
+    cube = SpectralCube('run1')
+    cube.band(630, 635)[-1000:]             # the last 1000 frames of a band, read from disk on access
+"""
+import json
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+VERSION = 1
+META = 'meta.json'
+WAVELENGTH = 'wavelength.npy'
+SPECTRA = 'spectra.bin'
+FRAMES = 'frames.bin'
+
+# one frame record of frames.bin
+FRAME = np.dtype([('t', '<f8'), ('integrationTime', '<f8')])
+
+
+def _readMeta(path):
+    with open(os.path.join(path, META), 'r') as f:
+        return json.load(f)
+
+
+class CubeWriter(object):
+    """
+    INPUTS:
+    path -- folder of the cube.
+    wavelength -- the wavelength axis of the spectra. Not needed with mode 'a'.
+    dtype -- dtype the spectra are stored with, e.g. float32 to halve the file size.
+    chunk -- number of frames written to disk at once.
+    buffers -- number of chunk buffers. append() blocks when all of them wait for the disk.
+    attrs -- a dict of user attributes (JSON serializable) stored in meta.json.
+    mode -- 'w' creates a new cube (the folder must not hold one), 'a' appends to an existing cube.
+    """
+
+    def __init__(self, path, wavelength=None, dtype=np.float64, chunk=64, buffers=4, attrs=None, mode='w'):
+        self._path = path
+        if mode=='w':
+            if os.path.exists(os.path.join(path, META)):
+                raise Exception('A cube already exists in {}. Use mode=\'a\' to append to it.'.format(path))
+            if wavelength is None:
+                raise ValueError('wavelength is needed to create a cube.')
+            wavelength = np.asarray(wavelength, dtype=np.float64)
+            os.makedirs(path, exist_ok=True)
+            self._meta = {'version': VERSION, 'nPixels': len(wavelength), 'dtype': np.dtype(dtype).str,
+                          'created': time.time(), 'attrs': attrs if attrs is not None else {}}
+            np.save(os.path.join(path, WAVELENGTH), wavelength)
+            self._writeMeta()
+            fmode = 'wb'
+        elif mode=='a':
+            self._meta = _readMeta(path)
+            if attrs is not None:
+                self._meta['attrs'].update(attrs)
+            fmode = 'ab'
+        else:
+            raise ValueError("mode must be 'w' or 'a'.")
+
+        self._nPixels = self._meta['nPixels']
+        self._dtype = np.dtype(self._meta['dtype'])
+        self._spectraFile = open(os.path.join(path, SPECTRA), fmode)
+        self._framesFile = open(os.path.join(path, FRAMES), fmode)
+        if mode=='a':
+            # drop a partly written frame left by a crash
+            frameBytes = self._nPixels*self._dtype.itemsize
+            self._count = min(os.path.getsize(os.path.join(path, SPECTRA))//frameBytes, os.path.getsize(os.path.join(path, FRAMES))//FRAME.itemsize)
+            self._spectraFile.truncate(self._count*frameBytes)
+            self._framesFile.truncate(self._count*FRAME.itemsize)
+        else:
+            self._count = 0
+
+        self._chunk = int(chunk)
+        self._free = queue.Queue()
+        for i in range(buffers):
+            self._free.put((np.empty((self._chunk, self._nPixels), dtype=self._dtype), np.empty(self._chunk, dtype=FRAME)))
+        self._full = queue.Queue()
+        self._current = None
+        self._n = 0
+        self._error = None
+        self._followers = []
+        self._thread = threading.Thread(target=self._write, name='CubeWriter', daemon=True)
+        self._thread.start()
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def nPixels(self):
+        return self._nPixels
+
+    @property
+    def count(self):
+        """
+        Number of frames appended, including those not yet on disk.
+        """
+        return self._count
+
+    def _writeMeta(self):
+        tmp = os.path.join(self._path, META + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self._meta, f, indent=1)
+        os.replace(tmp, os.path.join(self._path, META))
+
+    #########################################
+    # Appending (one thread)
+
+    def append(self, spectrum, t=None, integrationTime=np.nan):
+        """
+        Append one spectrum (nPixels values).
+
+        INPUTS:
+        t -- time.time() of the spectrum. None takes the current time.
+        integrationTime -- integration time in seconds.
+        """
+        if self._current is None:
+            self._next()
+        spectra, frames = self._current
+        spectra[self._n] = spectrum
+        frames[self._n] = (time.time() if t is None else t, integrationTime)
+        self._n += 1
+        self._count += 1
+        if self._n==self._chunk:
+            self._push()
+
+    def appendBatch(self, spectra, t, integrationTime=np.nan):
+        """
+        Append a batch of spectra (N x nPixels) with their times t (N) and integration time(s) in seconds.
+        """
+        spectra = np.asarray(spectra)
+        t = np.broadcast_to(np.asarray(t, dtype=np.float64), (len(spectra),))
+        integrationTime = np.broadcast_to(np.asarray(integrationTime, dtype=np.float64), (len(spectra),))
+        i = 0
+        while i<len(spectra):
+            if self._current is None:
+                self._next()
+            buf, frames = self._current
+            n = min(len(spectra) - i, self._chunk - self._n)
+            buf[self._n:self._n+n] = spectra[i:i+n]
+            frames['t'][self._n:self._n+n] = t[i:i+n]
+            frames['integrationTime'][self._n:self._n+n] = integrationTime[i:i+n]
+            self._n += n
+            self._count += n
+            i += n
+            if self._n==self._chunk:
+                self._push()
+
+    def _next(self):
+        if self._error is not None:
+            raise self._error
+        self._current = self._free.get()
+        self._n = 0
+
+    def _push(self):
+        self._full.put((self._current, self._n))
+        self._current = None
+        self._n = 0
+
+    def flush(self):
+        """
+        Write the frames appended so far to disk and wait until they are there.
+        """
+        if self._current is not None and self._n>0:
+            self._push()
+        self._full.join()
+        if self._error is not None:
+            raise self._error
+
+    #########################################
+    # Writer thread
+
+    def _write(self):
+        while True:
+            item = self._full.get()
+            try:
+                if item is None:
+                    return
+                (spectra, frames), n = item
+                if self._error is None:
+                    try:
+                        # spectra first: a frame record only points at a spectrum already on disk
+                        self._spectraFile.write(spectra[:n].tobytes())
+                        self._spectraFile.flush()
+                        self._framesFile.write(frames[:n].tobytes())
+                        self._framesFile.flush()
+                    except Exception as e:
+                        self._error = e
+                self._free.put((spectra, frames))
+            finally:
+                self._full.task_done()
+
+    #########################################
+
+    def follow(self, stream, integrationTime=None):
+        """
+        Append every scan of a started CCSStream on a background thread, until the stream stops or the writer is closed.
+
+        integrationTime -- integration time in seconds stored with the frames. None takes the integration time of the stream's CCS.
+        """
+        if integrationTime is None:
+            integrationTime = stream.ccs.integrationTime
+        stop = threading.Event()
+
+        def run():
+            for t, spectra in stream.iterBlocks(timeout=0.5, copy=False):
+                if len(spectra)>0:
+                    self.appendBatch(spectra, t, integrationTime)
+                if stop.is_set():
+                    return
+
+        thread = threading.Thread(target=run, name='CubeWriter.follow', daemon=True)
+        self._followers.append((thread, stop))
+        thread.start()
+        return thread
+
+    def close(self):
+        for thread, stop in self._followers:
+            stop.set()
+            thread.join()
+        self._followers = []
+        if self._thread is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self._full.put(None)
+            self._thread.join()
+            self._thread = None
+            self._spectraFile.close()
+            self._framesFile.close()
+            self._meta['count'] = self._count
+            self._writeMeta()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class SpectralCube(object):
+    """
+    Read access to a cube written by CubeWriter, while it is being written or after. The spectra are memory-mapped: indexing reads only the frames and pixels asked for.
+
+    INPUTS:
+    path -- folder of the cube.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._meta = _readMeta(path)
+        self._nPixels = self._meta['nPixels']
+        self._dtype = np.dtype(self._meta['dtype'])
+        self._wavelength = np.load(os.path.join(path, WAVELENGTH))
+        self._wavelength.flags.writeable = False
+        self._count = -1
+        self._spectra = None
+        self._frames = None
+        self.refresh()
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def attrs(self):
+        return self._meta['attrs']
+
+    @property
+    def wavelength(self):
+        return self._wavelength
+
+    @property
+    def nPixels(self):
+        return self._nPixels
+
+    def refresh(self):
+        """
+        Map the frames written since the last refresh. Return the number of frames.
+        """
+        frameBytes = self._nPixels*self._dtype.itemsize
+        count = min(os.path.getsize(os.path.join(self._path, SPECTRA))//frameBytes,
+                    os.path.getsize(os.path.join(self._path, FRAMES))//FRAME.itemsize)
+        if count!=self._count:
+            if count==0:
+                self._spectra = np.empty((0, self._nPixels), dtype=self._dtype)
+                self._frames = np.empty(0, dtype=FRAME)
+            else:
+                self._spectra = np.memmap(os.path.join(self._path, SPECTRA), dtype=self._dtype, mode='r', shape=(count, self._nPixels))
+                self._frames = np.memmap(os.path.join(self._path, FRAMES), dtype=FRAME, mode='r', shape=(count,))
+            self._count = count
+        return count
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def spectra(self):
+        """
+        The (frames x nPixels) spectra, memory-mapped.
+        """
+        return self._spectra
+
+    @property
+    def times(self):
+        return self._frames['t']
+
+    @property
+    def integrationTimes(self):
+        return self._frames['integrationTime']
+
+    def __getitem__(self, key):
+        return self._spectra[key]
+
+    def pixels(self, wlMin, wlMax):
+        """
+        Return the slice of the pixels between wlMin and wlMax.
+        """
+        lo, hi = np.searchsorted(self._wavelength, (wlMin, wlMax))
+        return slice(lo, hi)
+
+    def band(self, wlMin, wlMax):
+        """
+        Return a memory-mapped (frames x pixels) view of the wavelength band wlMin to wlMax.
+        """
+        return self._spectra[:, self.pixels(wlMin, wlMax)]
+
+    def frames(self, tStart=None, tStop=None):
+        """
+        Return the slice of the frames with time.time() from tStart (included) to tStop (excluded). None leaves that side open.
+        """
+        times = self.times
+        start = 0 if tStart is None else int(np.searchsorted(times, tStart, side='left'))
+        stop = len(times) if tStop is None else int(np.searchsorted(times, tStop, side='left'))
+        return slice(start, stop)
+
+    def timeSlice(self, tStart=None, tStop=None, wlMin=None, wlMax=None):
+        """
+        Return (t, spectra) of the frames from tStart to tStop, optionally restricted to the band wlMin to wlMax. spectra is memory-mapped.
+        """
+        frames = self.frames(tStart, tStop)
+        pixels = slice(None) if wlMin is None and wlMax is None else self.pixels(-np.inf if wlMin is None else wlMin, np.inf if wlMax is None else wlMax)
+        return self.times[frames], self._spectra[frames, pixels]
@@ -0,0 +1,109 @@
+"""
+Peak position, height, FWHM and area of every spectrum of a batch in one call, e.g. to follow a laser line while a spectrometer scans continuously:
+
+    datas, wl = ccs.sweep(100, continuous=True)
+    peaks = findPeaks(datas, wl, window=(630, 635))
+    peaks.wavelength, peaks.fwhm
+
+Everything is computed with whole-array operations over the batch; there is no Python loop over spectra.
+"""
+from collections import namedtuple
+import numpy as np
+
+# one value per spectrum. index is the pixel of the maximum; wavelength, fwhm and area are in the units of the wavelength axis.
+Peaks = namedtuple('Peaks', ['index', 'wavelength', 'height', 'fwhm', 'area'])
+
+
+def _pixelToWavelength(wavelength, position):
+    """
+    Return the wavelength at fractional pixel positions, linear between pixels. NaN positions stay NaN.
+    """
+    valid = np.isfinite(position)
+    i = np.clip(np.floor(np.where(valid, position, 0)).astype(np.intp), 0, len(wavelength)-2)
+    frac = np.where(valid, position, 0) - i
+    return np.where(valid, wavelength[i] + frac*(wavelength[i+1] - wavelength[i]), np.nan)
+
+
+def findPeaks(spectra, wavelength, window=None, method='parabolic', halfWidth=3, baseline=None):
+    """
+    Find the highest peak of each spectrum. Return Peaks of arrays of N (or scalars for a single spectrum).
+
+    INPUTS:
+    spectra -- a spectrum (P) or a batch (N x P).
+    wavelength -- the wavelength axis (P), increasing, e.g. CCS.getWavelength().
+    window -- (min, max) wavelength to search in. Only these pixels are looked at. None searches the whole spectrum.
+    method -- how the peak position is refined below a pixel: 'parabolic' fits a parabola through the maximum and its two neighbours; 'centroid' takes the centroid of the 2*halfWidth+1 pixels around the maximum above the baseline.
+    halfWidth -- half width in pixels of the centroid.
+    baseline -- the level the height, FWHM and area are taken from: a number, or an array of N. None uses the minimum of each spectrum in the window.
+
+    The FWHM is interpolated between the pixels where the spectrum crosses half the height on each side of the maximum; it is NaN if a side does not fall to half the height within the window. The area is the trapezoidal integral of the spectrum above the baseline over the window.
+    """
+    spectra = np.asarray(spectra, dtype=np.float64)
+    wavelength = np.asarray(wavelength, dtype=np.float64)
+    single = spectra.ndim==1
+    spectra = np.atleast_2d(spectra)
+
+    lo, hi = 0, spectra.shape[1]
+    if window is not None:
+        lo, hi = np.searchsorted(wavelength, window)
+        if hi - lo < 3:
+            raise ValueError('window {} covers fewer than 3 pixels.'.format(window))
+    y = spectra[:, lo:hi]
+    wl = wavelength[lo:hi]
+    n, p = y.shape
+    rows = np.arange(n)
+    cols = np.arange(p)
+
+    i = np.argmax(y, axis=1)
+    if baseline is None:
+        base = y.min(axis=1)
+    else:
+        base = np.broadcast_to(np.asarray(baseline, dtype=np.float64), (n,))
+
+    # sub-pixel position and height
+    if method=='parabolic':
+        im = np.clip(i, 1, p-2)
+        y0, ym, yp = y[rows, im], y[rows, im-1], y[rows, im+1]
+        denom = ym - 2*y0 + yp
+        with np.errstate(divide='ignore', invalid='ignore'):
+            offset = np.where(denom<0, 0.5*(ym - yp)/denom, 0.0)
+        offset = np.clip(offset, -0.5, 0.5)
+        position = im + offset
+        height = y0 - 0.25*(ym - yp)*offset
+    elif method=='centroid':
+        k = np.arange(-halfWidth, halfWidth+1)
+        idx = np.clip(i[:, None] + k, 0, p-1)
+        w = np.clip(y[rows[:, None], idx] - base[:, None], 0, None)
+        total = w.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            position = np.where(total>0, (w*idx).sum(axis=1)/total, i)
+        height = y[rows, i]
+    else:
+        raise ValueError("method must be 'parabolic' or 'centroid'.")
+
+    # half maximum crossings, interpolated between the pixels on either side
+    half = base + 0.5*(height - base)
+    below = y < half[:, None]
+    left = np.where(below & (cols < i[:, None]), cols, -1).max(axis=1)
+    right = np.where(below & (cols > i[:, None]), cols, p).min(axis=1)
+    found = (left>=0) & (right<p)
+    l0 = np.clip(left, 0, p-2)
+    r0 = np.clip(right, 1, p-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        leftPos = l0 + (half - y[rows, l0])/(y[rows, l0+1] - y[rows, l0])
+        rightPos = r0 - (half - y[rows, r0])/(y[rows, r0-1] - y[rows, r0])
+    leftPos = np.where(found, leftPos, np.nan)
+    rightPos = np.where(found, rightPos, np.nan)
+    fwhm = _pixelToWavelength(wl, rightPos) - _pixelToWavelength(wl, leftPos)
+
+    # trapezoidal weights of the (non-uniform) wavelength axis
+    dwl = np.diff(wl)
+    weights = np.zeros(p)
+    weights[:-1] += 0.5*dwl
+    weights[1:] += 0.5*dwl
+    area = (y - base[:, None]).dot(weights)
+
+    result = Peaks(i + lo, _pixelToWavelength(wl, position), height, fwhm, area)
+    if single:
+        return Peaks(*(np.asarray(v)[0] for v in result))
+    return result
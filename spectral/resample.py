@@ -0,0 +1,108 @@
+"""
+Resampling of spectra from an instrument's (non-uniform) wavelength axis onto a chosen grid, e.g. a uniform one for FFT analysis or one shared by two spectrometers.
+
+A Resampler works out once, for every grid point, the two neighbouring pixels and their linear-interpolation weights. Each batch of spectra is then mapped with two gathers and a multiply-add, which gives the same result as np.interp on every spectrum:
+
+    rs = Resampler(ccs.getWavelength(), uniformGrid(400, 700, 0.1))
+    datas, wl = ccs.sweep(100)
+    resampled = rs.apply(datas)       # (100 x len(rs.grid))
+"""
+import numpy as np
+
+
+def uniformGrid(start, stop, step):
+    """
+    Return a uniform wavelength grid from start to stop (included if it falls on the grid) with spacing step.
+    """
+    n = int(np.floor((stop - start)/float(step) + 1e-9)) + 1
+    return start + step*np.arange(n)
+
+
+def commonGrid(wavelengths, step=None):
+    """
+    Return a uniform grid over the wavelength range covered by every axis in wavelengths.
+
+    INPUTS:
+    wavelengths -- a list of wavelength axes, e.g. of a CCS and an Ocean Optics spectrometer.
+    step -- spacing of the grid. None takes the coarsest median pixel spacing of the axes, so no instrument is oversampled.
+    """
+    start = max(np.min(wl) for wl in wavelengths)
+    stop = min(np.max(wl) for wl in wavelengths)
+    if stop<=start:
+        raise ValueError('The wavelength axes do not overlap.')
+    if step is None:
+        step = max(np.median(np.diff(wl)) for wl in wavelengths)
+    return uniformGrid(start, stop, step)
+
+
+class Resampler(object):
+    """
+    INPUTS:
+    wavelength -- the instrument's wavelength axis (P), increasing.
+    grid -- the wavelengths to resample onto.
+    fill -- value of the grid points outside the instrument's axis.
+    """
+
+    def __init__(self, wavelength, grid, fill=np.nan):
+        wavelength = np.asarray(wavelength, dtype=np.float64)
+        grid = np.asarray(grid, dtype=np.float64)
+        if np.any(np.diff(wavelength)<=0):
+            raise ValueError('wavelength must be increasing.')
+        self._wavelength = wavelength
+        self._grid = grid
+        self._fill = fill
+
+        i0 = np.clip(np.searchsorted(wavelength, grid, side='right') - 1, 0, len(wavelength)-2)
+        w1 = (grid - wavelength[i0])/(wavelength[i0+1] - wavelength[i0])
+        inside = (grid>=wavelength[0]) & (grid<=wavelength[-1])
+        self._i0 = i0
+        self._i1 = i0 + 1
+        self._w0 = np.where(inside, 1.0 - w1, 0.0)
+        self._w1 = np.where(inside, w1, 0.0)
+        self._outside = None if inside.all() else ~inside
+
+    @property
+    def wavelength(self):
+        return self._wavelength
+
+    @property
+    def grid(self):
+        return self._grid
+
+    def apply(self, spectra, out=None):
+        """
+        Return spectra (P, or N x P) resampled onto the grid.
+
+        INPUTS:
+        spectra -- a spectrum or a batch of spectra on the instrument's axis.
+        out -- an array of len(grid) (or N x len(grid)) to write the result into. None returns a new array.
+        """
+        spectra = np.asarray(spectra, dtype=np.float64)
+        shape = spectra.shape[:-1] + self._grid.shape
+        if out is None:
+            out = np.empty(shape)
+        elif out.shape!=shape:
+            raise ValueError('out must have shape {}, got {}.'.format(shape, out.shape))
+        np.take(spectra, self._i0, axis=-1, out=out)
+        out *= self._w0
+        out += np.take(spectra, self._i1, axis=-1)*self._w1
+        if self._outside is not None:
+            out[..., self._outside] = self._fill
+        return out
+
+    __call__ = apply
+
+
+def merge(data, grid=None, step=None, fill=np.nan):
+    """
+    Resample the spectra of several instruments onto one grid. Return (grid, list of resampled spectra), in the order of data.
+
+    INPUTS:
+    data -- a list of (spectra, wavelength), e.g. [(ccsDatas, ccs.getWavelength()), (ooSpectrum, oo.get_wavelength())]. spectra are P or N x P on their wavelength axis.
+    grid -- the grid to resample onto. None uses commonGrid() of the axes with step.
+    step -- see commonGrid.
+    fill -- see Resampler.
+    """
+    if grid is None:
+        grid = commonGrid([wl for (_, wl) in data], step)
+    return grid, [Resampler(wl, grid, fill).apply(spectra) for (spectra, wl) in data]
@@ -0,0 +1,164 @@
+"""
+Running per-pixel statistics of spectra, e.g. for long averages of weak signals.
+
+Scans are folded into the statistics as they arrive (Welford's algorithm, or Chan's update for a batch), so memory is constant however many scans are averaged:
+
+    stats = SpectrumStats(3648, saturation=1.0)
+    while not stats.isConverged(1e-4):
+        stats.add(ccs.readScan(buf))
+    stats.mean, stats.stderr, stats.saturated
+"""
+import numpy as np
+
+
+class SpectrumStats(object):
+    """
+    Per-pixel count, mean, variance, min, max and saturated-scan count of the spectra added so far.
+
+    INPUTS:
+    nPixels -- number of pixels of a spectrum.
+    saturation -- value at and above which a pixel is counted as saturated. None does not count.
+    """
+
+    def __init__(self, nPixels, saturation=None):
+        self._nPixels = int(nPixels)
+        self._saturation = saturation
+        self._mean = np.zeros(self._nPixels)
+        self._m2 = np.zeros(self._nPixels)
+        self._min = np.zeros(self._nPixels)
+        self._max = np.zeros(self._nPixels)
+        self._saturated = np.zeros(self._nPixels, dtype=np.int64)
+        # scratch arrays, so add() does not allocate
+        self._delta = np.zeros(self._nPixels)
+        self._scratch = np.zeros(self._nPixels)
+        self._mask = np.zeros(self._nPixels, dtype=bool)
+        self._count = 0
+
+    @property
+    def nPixels(self):
+        return self._nPixels
+
+    @property
+    def saturation(self):
+        return self._saturation
+
+    @property
+    def count(self):
+        """
+        Number of spectra added.
+        """
+        return self._count
+
+    @property
+    def mean(self):
+        return self._mean
+
+    @property
+    def variance(self):
+        """
+        Sample variance (ddof=1) of each pixel. NaN with fewer than 2 spectra.
+        """
+        if self._count<2:
+            return np.full(self._nPixels, np.nan)
+        return self._m2/(self._count - 1)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    @property
+    def stderr(self):
+        """
+        Standard error of the mean of each pixel.
+        """
+        return np.sqrt(self.variance/self._count) if self._count>0 else np.full(self._nPixels, np.nan)
+
+    @property
+    def min(self):
+        return self._min
+
+    @property
+    def max(self):
+        return self._max
+
+    @property
+    def saturated(self):
+        """
+        Number of spectra in which each pixel was saturated.
+        """
+        return self._saturated
+
+    def reset(self):
+        self._count = 0
+        for a in (self._mean, self._m2, self._min, self._max, self._saturated):
+            a[...] = 0
+
+    def add(self, spectrum):
+        """
+        Fold one spectrum (an array of nPixels) into the statistics.
+        """
+        x = spectrum
+        self._count += 1
+        if self._count==1:
+            self._mean[:] = x
+            self._min[:] = x
+            self._max[:] = x
+        else:
+            delta, scratch = self._delta, self._scratch
+            np.subtract(x, self._mean, out=delta)
+            np.divide(delta, self._count, out=scratch)
+            self._mean += scratch
+            # M2 += (x - old mean)*(x - new mean)
+            np.subtract(x, self._mean, out=scratch)
+            scratch *= delta
+            self._m2 += scratch
+            np.minimum(self._min, x, out=self._min)
+            np.maximum(self._max, x, out=self._max)
+        if self._saturation is not None:
+            np.greater_equal(x, self._saturation, out=self._mask)
+            self._saturated += self._mask
+
+    def addBatch(self, spectra):
+        """
+        Fold a batch of spectra, an (N x nPixels) array, into the statistics.
+        """
+        spectra = np.asarray(spectra)
+        n = len(spectra)
+        if n==0:
+            return
+        if n==1:
+            self.add(spectra[0])
+            return
+        mean = spectra.mean(axis=0)
+        m2 = ((spectra - mean)**2).sum(axis=0)
+        if self._count==0:
+            self._mean[:] = mean
+            self._m2[:] = m2
+            self._min[:] = spectra.min(axis=0)
+            self._max[:] = spectra.max(axis=0)
+        else:
+            # Chan et al. update of two partitions
+            total = self._count + n
+            delta = mean - self._mean
+            self._m2 += m2 + delta**2*self._count*n/total
+            self._mean += delta*n/total
+            np.minimum(self._min, spectra.min(axis=0), out=self._min)
+            np.maximum(self._max, spectra.max(axis=0), out=self._max)
+        self._count += n
+        if self._saturation is not None:
+            self._saturated += (spectra>=self._saturation).sum(axis=0)
+
+    def isConverged(self, targetStderr, pixels=None):
+        """
+        Return True once the standard error of the mean of every pixel is at most targetStderr. Needs at least 2 spectra.
+
+        INPUTS:
+        targetStderr -- the target standard error, in the units of the spectra.
+        pixels -- a slice, index array or boolean mask of the pixels to check, e.g. the band of a weak line. None checks all.
+        """
+        n = self._count
+        if n<2:
+            return False
+        m2 = self._m2 if pixels is None else self._m2[pixels]
+        # stderr**2 = M2/(n-1)/n, compared without the square root
+        return m2.max() <= targetStderr**2*n*(n - 1)
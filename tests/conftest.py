@@ -0,0 +1,11 @@
+import importlib.util
+import os
+import sys
+
+# The repository root is the pylabinstrument package itself; make it importable under that name.
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if 'pylabinstrument' not in sys.modules:
+    _spec = importlib.util.spec_from_file_location('pylabinstrument', os.path.join(_root, '__init__.py'), submodule_search_locations=[_root])
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules['pylabinstrument'] = _module
+    _spec.loader.exec_module(_module)
@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('visa')
+
+from pylabinstrument.ctools import simulators
+from pylabinstrument.thorlabs.spectrometer.CCS import CCS, PIX_NUM
+
+
+@pytest.fixture
+def ccs():
+    ccs = CCS('USB0::0x1313::0x8089::M00000001::RAW')
+    ccs.verbose = False
+    sim = simulators.use(ccs, 'tlccs', readoutTime=0.002)
+    ccs.open()
+    yield ccs, sim
+    ccs.close()
+
+
+def session(sim):
+    (state,) = sim.sessions.values()
+    return state
+
+
+def test_continuous_sweep_reads_every_frame_with_few_status_reads(ccs):
+    ccs, sim = ccs
+    ccs.setIntegrationTime(0.002)
+    sim.calls.clear()
+    n = 300
+    (datas, wl) = ccs.sweep(n, continuous=True)
+    assert datas.shape==(n, PIX_NUM)
+    # the expected time of the next scan follows the frames (integration + readout) instead of drifting ahead
+    assert sim.calls['GetDeviceStatus']<3*n
+    assert session(sim)['framesRead']<=1.02*n
+
+
+@pytest.mark.parametrize('method', ['sweep', 'sweepAvg', 'sweepStats'])
+def test_continuous_scanning_stops_on_timeout(ccs, method):
+    ccs, sim = ccs
+    sim.readoutTime = 1.0
+    with pytest.raises(Exception, match='not ready'):
+        getattr(ccs, method)(3, continuous=True, timeout=0.05)
+    assert not session(sim)['continuous']
+    assert not ccs.isContinuous
+
+
+def test_sweepAvg_starts_each_scan_by_default(ccs):
+    ccs, sim = ccs
+    sim.calls.clear()
+    (mean, wl) = ccs.sweepAvg(4)
+    assert mean.shape==(PIX_NUM,)
+    assert sim.calls.get('StartScan')==4 and 'StartScanCont' not in sim.calls
@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('visa')
+
+from pylabinstrument.thorlabs.spectrometer import CCSStream as module
+
+
+class FakeCCS(object):
+    """
+    Fills every scan with its scan number; the stream's clock returns the number of scans read, so a timestamp must equal the first pixel of its spectrum.
+    """
+    integrationTime = 0.001
+
+    def __init__(self):
+        self.scans = 0
+
+    def isInSession(self):
+        return True
+
+    def getWavelength(self):
+        return np.arange(module.PIX_NUM, dtype=np.float64)
+
+    def startContinuous(self):
+        pass
+
+    def stopContinuous(self):
+        pass
+
+    def startScan(self):
+        pass
+
+    def readScan(self, out, timeout):
+        time.sleep(0.0005)
+        out[:] = self.scans
+        self.scans += 1
+
+    def clock(self):
+        return float(self.scans - 1)
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    ccs = FakeCCS()
+    monkeypatch.setattr(module, 'time', type('clock', (), {'time': staticmethod(ccs.clock)}))
+    s = module.CCSStream(ccs, capacity=5)
+    s.start()
+    yield s
+    s.stop()
+
+
+def test_latest_keeps_times_aligned_when_full(stream):
+    while stream.count<20:
+        time.sleep(0.001)
+    for i in range(200):
+        t, spectra = stream.latest()
+        assert len(t)==5
+        assert list(t)==list(spectra[:, 0])
+
+
+def test_blocks_keep_times_aligned(stream):
+    got = 0
+    for t, spectra in stream.iterBlocks(copy=True):
+        assert list(t)==list(spectra[:, 0])
+        assert len(spectra)<=stream.capacity
+        got += len(spectra)
+        if got>=100:
+            break
+        # fall behind, so blocks come from a full buffer
+        time.sleep(0.005)
+    assert stream.dropped>0
@@ -0,0 +1,73 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('visa')
+
+from pylabinstrument.ctools import simulators
+from pylabinstrument.thorlabs.motion.KCubeSolenoid import Motor
+from pylabinstrument.thorlabs.powermeter.PMSeries import PowerMeter
+from pylabinstrument.thorlabs.procedures.LockIn import ShutterLockIn
+
+SERIAL = '68000001'
+BASE = 1e-3
+AMPLITUDE = 2e-6
+PERIOD = 0.1
+
+
+@pytest.fixture
+def bench():
+    shutter = Motor(SERIAL)
+    shutter.verbose = False
+    solenoid = simulators.use(shutter, 'kcubesolenoid', serials=[SERIAL], switchTime=0.005)
+    shutter.open()
+
+    # a square wave: the light adds AMPLITUDE while the shutter is open
+    def signal(t, wavelength):
+        return BASE + (AMPLITUDE if solenoid.GetSolenoidState(SERIAL)==solenoid.OPEN else 0.0)
+
+    meter = PowerMeter('USB0::0x1313::0x8078::P0000001::INSTR')
+    meter.verbose = False
+    simulators.use(meter, 'tlpm', signal=signal, noise=1e-3, seed=0, latency={'MeasurePower': 0.001})
+    meter.open()
+    stream = meter.stream()
+    yield stream, shutter, solenoid
+    stream.stop()
+    meter.close()
+    shutter.close()
+
+
+def test_recovers_amplitude_and_phase_of_a_square_wave(bench, capsys):
+    stream, shutter, solenoid = bench
+    lockin = ShutterLockIn(stream, shutter, period=PERIOD, settle=0.01)
+    shutter.verbose = True
+    capsys.readouterr()
+    result = lockin.run(nCycles=20)
+
+    # one summary instead of a message per switch, and the messages are back on
+    assert capsys.readouterr().out.count('\n')==1
+    assert shutter.verbose
+    assert result['nCycles']>=20 and lockin.error is None
+    # in phase with the shutter: positive, the open halves are the bright ones
+    assert result['signal']==pytest.approx(AMPLITUDE, rel=0.1)
+    assert result['noise']<0.1*AMPLITUDE
+    assert result['open']==pytest.approx(BASE + AMPLITUDE, rel=1e-3)
+    assert result['closed']==pytest.approx(BASE, rel=1e-3)
+
+    switches = lockin.switches
+    assert [opened for t, opened in switches[:4]]==[True, False, True, False]
+    np.testing.assert_allclose(np.diff([t for t, opened in switches]), PERIOD/2.0, atol=0.005)
+    # the shutter is left closed
+    assert solenoid.history(SERIAL)[-1][1]==solenoid.INACTIVE
+
+
+def test_a_failing_shutter_stops_the_run(bench):
+    stream, shutter, solenoid = bench
+
+    def SetOperatingState(serial, state):
+        raise RuntimeError('shutter disconnected')
+
+    solenoid.SetOperatingState = SetOperatingState
+    lockin = ShutterLockIn(stream, shutter, period=PERIOD, settle=0.01)
+    with pytest.raises(RuntimeError, match='shutter disconnected'):
+        lockin.run(duration=5.0)
+    assert not lockin.isRunning()
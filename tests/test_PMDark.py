@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('visa')
+
+from pylabinstrument.ctools import simulators
+from pylabinstrument.thorlabs.powermeter.PMSeries import PowerMeter
+from pylabinstrument.thorlabs.powermeter.PMDark import DarkAdjustMonitor
+
+
+@pytest.fixture
+def meters():
+    sim = simulators.create('tlpm', darkAdjustTime=0.2, seed=0)
+    meters = []
+    for i in range(3):
+        meter = PowerMeter('USB0::0x1313::0x8078::P000000{}::INSTR'.format(i))
+        meter.verbose = False
+        simulators.use(meter, sim)
+        meter.open()
+        meters.append(meter)
+    monitor = DarkAdjustMonitor()
+    yield meters, sim, monitor
+    monitor.stop()
+    for meter in meters:
+        meter.close()
+
+
+def test_adjustments_run_together_and_resolve_with_the_offset(meters):
+    meters, sim, monitor = meters
+    start = time.perf_counter()
+    futures = [monitor.submit(meter) for meter in meters]
+    offsets = [f.result(timeout=2.0) for f in futures]
+    # one after another would take 0.6 s
+    assert time.perf_counter()-start<0.4
+    assert offsets==[meter.getDarkOffset() for meter in meters]
+    assert len(set(offsets))==3
+    assert monitor.pending()==0
+
+
+def test_timeout_cancels_the_adjustment(meters):
+    meters, sim, monitor = meters
+    future = monitor.submit(meters[0], timeout=0.05)
+    with pytest.raises(TimeoutError, match='did not finish in time'):
+        future.result(timeout=2.0)
+    assert not meters[0].isDarkAdjustRunning()
+    assert sim.calls['CancelDarkAdjust']==1
+
+
+def test_cancelled_future_cancels_the_adjustment(meters):
+    meters, sim, monitor = meters
+    cancelled, kept = monitor.submit(meters[0]), monitor.submit(meters[1])
+    assert cancelled.cancel()
+    assert kept.result(timeout=2.0)==meters[1].getDarkOffset()
+    assert sim.calls['CancelDarkAdjust']==1
+
+
+def test_stop_cancels_pending_futures(meters):
+    meters, sim, monitor = meters
+    future = monitor.submit(meters[0])
+    monitor.stop()
+    assert future.cancelled()
+    # a new submit starts the thread again
+    assert monitor.submit(meters[1]).result(timeout=2.0)==meters[1].getDarkOffset()
+
+
+def test_performDarkFuture(meters):
+    meters, sim, monitor = meters
+    future = meters[0].performDarkFuture()
+    assert future.result(timeout=2.0)==meters[0].getDarkOffset()
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+pytest.importorskip('visa')
+
+from pylabinstrument.ctools import simulators
+from pylabinstrument.thorlabs.powermeter.DeviceManager import DeviceManager
+
+
+def device(i):
+    return ('USB0::0x1313::0x8078::P000000{}::INSTR'.format(i), 'PM100D', 'P000000{}'.format(i))
+
+
+@pytest.fixture
+def manager():
+    dm = DeviceManager(ttl=60.0)
+    sim = simulators.use(dm, 'tlpm', devices=[device(1), device(2), device(3)])
+    events = []
+    dm.addListener(lambda event, info: events.append((event, info['serialNo'])))
+    return dm, sim, events
+
+
+def test_refresh_queries_only_new_devices(manager):
+    dm, sim, events = manager
+    added, removed = dm.refresh()
+    assert sim.calls['GetResourceInfo']==3
+    assert len(added)==3 and removed==[]
+
+    added, removed = dm.refresh()
+    assert sim.calls['GetResourceInfo']==3
+    assert (added, removed)==([], [])
+
+    sim.devices.insert(0, device(4))
+    added, removed = dm.refresh()
+    assert sim.calls['GetResourceInfo']==4
+    assert [info['serialNo'] for info in added]==[b'P0000004']
+    # the devices after the new one moved up an index
+    assert [info['index'] for info in dm.discover()]==[0, 1, 2, 3]
+    assert dm.getBySerial('P0000001')['index']==1
+
+
+def test_added_and_removed_events(manager):
+    dm, sim, events = manager
+    dm.refresh()
+    assert events==[('added', b'P0000001'), ('added', b'P0000002'), ('added', b'P0000003')]
+    del events[:]
+    del sim.devices[1]
+    added, removed = dm.refresh()
+    assert events==[('removed', b'P0000002')]
+    assert dm.getBySerial('P0000002') is None
+    assert dm.getBySerial(b'P0000003')['index']==1
+
+
+def test_discover_within_ttl_does_not_query(manager):
+    dm, sim, events = manager
+    dm.ttl = 0.05
+    dm.discover()
+    dm.discover()
+    dm.getBySerial('P0000001')
+    assert sim.calls['FindResources']==1
+    time.sleep(0.06)
+    dm.discover()
+    assert sim.calls['FindResources']==2
+    assert dm.discover(maxAge=0) and sim.calls['FindResources']==3
+
+
+def test_refresh_availability(manager):
+    dm, sim, events = manager
+    assert dm.getBySerial('P0000002')['deviceAvailable']==1
+    sim.sessions[99] = sim._newState(device(2)[0])
+    calls = sim.calls['GetResourceInfo']
+    assert dm.refreshAvailability('P0000002')['deviceAvailable']==0
+    assert sim.calls['GetResourceInfo']==calls+1
+    assert dm.getBySerial('P0000002')['deviceAvailable']==0
+    assert dm.refreshAvailability('P0000009') is None
+
+
+def test_returns_copies(manager):
+    dm, sim, events = manager
+    dm.discover()[0]['deviceAvailable'] = 5
+    dm.getBySerial('P0000001')['index'] = 7
+    info = dm.getBySerial('P0000001')
+    assert info['deviceAvailable']==1 and info['index']==0
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('visa')
+
+from pylabinstrument.ctools import simulators
+from pylabinstrument.thorlabs.powermeter.PMGroup import PowerMeterGroup
+
+LATENCY = 0.005
+
+
+@pytest.fixture
+def group():
+    devices = [('USB0::0x1313::0x8078::P000000{}::INSTR'.format(i), 'PM100D', 'P000000{}'.format(i)) for i in range(4)]
+    sim = simulators.create('tlpm', devices=devices, signal=lambda t, wavelength: wavelength*1e-6, latency={'MeasurePower': LATENCY})
+    group = PowerMeterGroup(library=sim)
+    group.verbose = False
+    group.open()
+    # tell the meters apart by their wavelength
+    for j, meter in enumerate(group.meters):
+        meter.setWavelength(500 + 100*j)
+    yield group, sim
+    group.close()
+
+
+def test_opens_every_meter_found(group):
+    group, sim = group
+    assert len(group)==4 and len(sim.sessions)==4
+    assert group.resourceNames[3]=='USB0::0x1313::0x8078::P0000003::INSTR'
+
+
+def test_read_samples_every_meter_together(group):
+    group, sim = group
+    n = 20
+    start = time.time()
+    data, timestamps, stats = group.read(n)
+    assert data.shape==(n, 4)
+    np.testing.assert_allclose(data, np.tile([500e-6, 600e-6, 700e-6, 800e-6], (n, 1)))
+    assert timestamps.shape==(n,) and start<timestamps[0] and np.all(np.diff(timestamps)>0)
+    assert stats['skew'].shape==(n,) and stats['duration'].shape==(n, 4)
+    assert np.all(stats['duration']>=LATENCY)
+    # read one after another, the last meter would be 3 readings behind the first
+    assert stats['meanSkew']<LATENCY
+    assert stats['meanSkew']<=stats['p95Skew']<=stats['maxSkew']
+    np.testing.assert_allclose(group.measure(), data[0])
+
+
+def test_read_at_an_interval(group):
+    group, sim = group
+    data, timestamps, stats = group.read(5, interval=0.02)
+    np.testing.assert_allclose(np.diff(timestamps), 0.02, atol=0.004)
+
+
+def test_a_failing_meter_stops_the_read(group):
+    group, sim = group
+    power = sim.power
+    handle = group.meters[2].instrumentHandle.value
+
+    def failing(h):
+        if h==handle:
+            raise RuntimeError('sensor unplugged')
+        return power(h)
+
+    sim.power = failing
+    # the other meters are released from the barrier instead of waiting for the timeout
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError, match='sensor unplugged'):
+        group.read(3, timeout=5.0)
+    assert time.perf_counter()-start<1.0
@@ -0,0 +1,226 @@
+import array
+import time
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('visa')
+
+from pylabinstrument.ctools import simulators
+from pylabinstrument.thorlabs.powermeter.PMSeries import PowerMeter
+
+
+@pytest.fixture
+def pm():
+    meter = PowerMeter('USB0::0x1313::0x8078::P0000001::INSTR')
+    meter.verbose = False
+    sim = simulators.use(meter, 'tlpm', signal=2e-3, noise=0.01, seed=1)
+    meter.open()
+    yield meter, sim
+    meter.close()
+
+
+def test_reader_reads_what_measure_reads(pm):
+    meter, sim = pm
+    reader = meter.reader()
+    sim.random.seed(5)
+    fast = [reader.read() for i in range(5)]
+    sim.random.seed(5)
+    slow = [meter.measure() for i in range(5)]
+    assert fast==slow
+    assert len(set(fast))==5
+
+    sim.random.seed(5)
+    out = np.zeros(8)
+    assert reader.readInto(out, 5) is out
+    np.testing.assert_array_equal(out[:5], slow)
+    assert np.all(out[5:]==0)
+    assert list(reader.readInto(array.array('d', [0.0]*3)))!=[0.0]*3
+
+
+def test_reader_rejects_bad_buffers(pm):
+    meter, sim = pm
+    reader = meter.reader()
+    with pytest.raises(ValueError):
+        reader.readInto(np.zeros(3, dtype=np.float32))
+    with pytest.raises(ValueError):
+        reader.readInto(np.zeros((2, 2)))
+    with pytest.raises(ValueError):
+        reader.readInto(np.zeros(3), 4)
+    readonly = np.zeros(3)
+    readonly.flags.writeable = False
+    with pytest.raises(ValueError):
+        reader.readInto(readonly)
+
+
+def test_reader_needs_a_session():
+    meter = PowerMeter('USB0::0x1313::0x8078::P0000001::INSTR')
+    with pytest.raises(Exception, match='not in session'):
+        meter.reader()
+
+
+def test_reader_raises_on_errors_only(pm):
+    meter, sim = pm
+    measure = sim.MeasurePower
+    # a positive status is a VISA warning (here VI_WARN_NSUP_ID_QUERY); the reading is valid
+    status = [0x3FFC0101]
+
+    def MeasurePower(handle, pPower):
+        measure(handle, pPower)
+        return status[0]
+
+    sim.MeasurePower = MeasurePower
+    reader = meter.reader()
+    assert reader.read()==pytest.approx(2e-3, rel=0.1)
+    status[0] = -1073807346
+    with pytest.raises(Exception, match='Failed to measure power'):
+        reader.read()
+    with pytest.raises(Exception, match='Failed to measure power'):
+        reader.readInto(np.zeros(2))
+
+
+def calls(sim, prefix):
+    return dict((name, n) for name, n in sim.calls.items() if name.startswith(prefix))
+
+
+def test_setters_use_the_settings_cache(pm):
+    meter, sim = pm
+    meter.refreshSettings()
+    sim.calls.clear()
+    # within sensorCheckInterval nothing is read from the meter
+    assert meter.getCachedSetting('wavelength')['maxValue']==1100.0
+    meter.setWavelength(800)
+    meter.setWavelength(800)
+    meter.setAttn(3.0)
+    meter.setAttn(3.0)
+    meter.setAvgTime(0.01)
+    meter.setPowerRange(0.1)
+    meter.setPowerRange(0.1)
+    with pytest.raises(ValueError):
+        meter.setWavelength(1200)
+    assert calls(sim, 'Set')=={'SetWavelength': 1, 'SetAttn': 1, 'SetAvgTime': 1, 'SetPowerRange': 1}
+    # only the read back of the new wavelength
+    assert calls(sim, 'Get')=={'GetWavelength': 1}
+    assert sim.sessions[meter.instrumentHandle.value]['attn'][0]==3.0
+
+
+def test_a_new_sensor_refreshes_the_cache(pm):
+    meter, sim = pm
+    meter.sensorCheckInterval = None
+    meter.setWavelength(800)
+    sim.swapSensor(meter.instrumentHandle.value, 'S122C', '00000002', wavelength=(700.0, 1800.0))
+    # not checked: the cached limits of the old sensor apply
+    with pytest.raises(ValueError):
+        meter.setWavelength(1500)
+    meter.sensorCheckInterval = 0
+    meter.setWavelength(1500)
+    assert meter.getWavelength()==1500
+    assert meter.getCachedSetting('wavelength')['maxValue']==1800.0
+
+
+def test_a_failed_set_drops_the_cache(pm):
+    meter, sim = pm
+    sim.SetAttn = lambda handle, db: -1073807346
+    with pytest.raises(Exception, match='Failed to set attenuation'):
+        meter.setAttn(1.0)
+    sim.calls.clear()
+    assert meter.getCachedSetting('attn')['written'] is None
+    assert sim.calls['GetAttn']==3
+
+
+def test_open_closes_the_session_if_reading_the_settings_fails():
+    meter = PowerMeter('USB0::0x1313::0x8078::P0000001::INSTR')
+    meter.verbose = False
+    sim = simulators.use(meter, 'tlpm')
+    sim.GetSensorInfo = lambda *args: -1073807346
+    with pytest.raises(Exception, match='sensor information'):
+        meter.open()
+    assert not meter.isInSession()
+    assert sim.sessions=={}
+
+
+def lagging(sim, seconds):
+    """
+    Make the simulated meter apply a new wavelength only after seconds.
+    """
+    import threading
+    setWavelength = sim.SetWavelength
+
+    def SetWavelength(handle, wl):
+        threading.Timer(seconds, setWavelength, (handle, wl)).start()
+        return 0
+
+    sim.SetWavelength = SetWavelength
+
+
+def test_waitWavelength_polls_until_the_meter_reports_it(pm):
+    meter, sim = pm
+    lagging(sim, 0.05)
+    meter.setWavelength(800, timeout=0.5)
+    assert meter.getWavelength()==800
+
+    sim.calls.clear()
+    meter.library.SetWavelength(meter.instrumentHandle, 900.0)
+    start = time.perf_counter()
+    assert not meter.waitWavelength(900, timeout=0.02)
+    assert 0.02<=time.perf_counter()-start<0.1
+    # the poll interval grows from 1 ms to 20 ms
+    assert 3<=sim.calls['GetWavelength']<=8
+    assert meter.waitWavelength(900, timeout=0.1)
+
+
+def test_setWavelength_times_out(pm):
+    meter, sim = pm
+    lagging(sim, 0.2)
+    with pytest.raises(Exception, match='Failed to set wavelength'):
+        meter.setWavelength(800, timeout=0.05)
+    # the cache is dropped, so the next set writes again
+    assert meter._settings is None
+    time.sleep(0.2)
+
+
+def test_sweepWavelengths(pm):
+    meter, sim = pm
+    sim.signal = lambda t, wavelength: wavelength*1e-6
+    sim.noise = 0
+    wavelengths = [500, 600.5, 700]
+    np.testing.assert_allclose(meter.sweepWavelengths(wavelengths, nAvg=3), np.array(wavelengths)*1e-6)
+    raw = meter.sweepWavelengths(wavelengths, nAvg=3, verify='after', raw=True)
+    assert raw.shape==(3, 3)
+    np.testing.assert_allclose(raw, np.repeat(np.array(wavelengths)[:, None]*1e-6, 3, axis=1))
+    # the cache knows the last wavelength, so setting it again writes nothing
+    sim.calls.clear()
+    meter.setWavelength(700)
+    assert 'SetWavelength' not in sim.calls
+    with pytest.raises(ValueError):
+        meter.sweepWavelengths([500, 1200])
+
+
+def test_sweepWavelengths_verifies_after_measuring(pm):
+    meter, sim = pm
+    sim.signal = lambda t, wavelength: wavelength*1e-6
+    sim.noise = 0
+    lagging(sim, 0.02)
+    readings = meter.sweepWavelengths([500, 700], verify='after', timeout=0.5)
+    # a point measured before the meter changed wavelength is measured again
+    np.testing.assert_allclose(readings, [500e-6, 700e-6])
+    with pytest.raises(Exception, match='Failed to set wavelength'):
+        meter.sweepWavelengths([800], verify='before', timeout=0.005)
+    time.sleep(0.05)
+
+
+def test_measureBurst(pm):
+    meter, sim = pm
+    start = time.time()
+    sim.signal = lambda t, wavelength: t - start
+    sim.noise = 0
+    (t, power) = meter.measureBurst(250)
+    assert t.shape==power.shape==(250,)
+    # rounded up to 300 samples, of which the first 250 are returned
+    assert sim.sessions[meter.instrumentHandle.value]['sequence']['baseTime']==3
+    assert t[0]==0
+    np.testing.assert_allclose(np.diff(t), sim.SEQUENCE_SAMPLE_TIME)
+    # the power follows the time base of the samples
+    np.testing.assert_allclose(power - power[0], t, atol=1e-6)
+    with pytest.raises(ValueError):
+        meter.measureBurst(10001)
@@ -0,0 +1,74 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('visa')
+
+from pylabinstrument.ctools import simulators
+from pylabinstrument.thorlabs.motion.KCubeDCServo import Rotator
+from pylabinstrument.thorlabs.powermeter.PMSeries import PowerMeter
+from pylabinstrument.thorlabs.procedures.PowerStabilizer import PowerStabilizer, MalusModel
+
+SERIAL = '27000001'
+# the simulated bench: a half-wave plate on the rotator in front of a polarizer
+TRUE_MODEL = MalusModel(1e-3, 10.0, 2e-5)
+
+
+@pytest.fixture
+def bench():
+    rotator = Rotator(SERIAL)
+    rotator.verbose = False
+    motion = simulators.use(rotator, 'kcubedcservo', serials=[SERIAL], velocity=200)
+    rotator.open()
+
+    def signal(t, wavelength):
+        return float(TRUE_MODEL.power(motion.position(SERIAL)))
+
+    meter = PowerMeter('USB0::0x1313::0x8078::P0000001::INSTR')
+    meter.verbose = False
+    simulators.use(meter, 'tlpm', signal=signal, noise=1e-3, latency={'MeasurePower': 0.002})
+    meter.open()
+    yield meter, rotator
+    meter.close()
+    rotator.close()
+
+
+def test_calibrate_fits_the_malus_model(bench):
+    meter, rotator = bench
+    stabilizer = PowerStabilizer(meter, rotator, 0.4e-3, MalusModel(1e-3))
+    model = stabilizer.calibrate()
+    assert model.amplitude==pytest.approx(TRUE_MODEL.amplitude, rel=0.02)
+    assert model.angle0==pytest.approx(TRUE_MODEL.angle0, abs=0.5)
+    assert model.offset==pytest.approx(TRUE_MODEL.offset, abs=2e-5)
+
+
+def test_pid_converges_with_a_wrong_feedforward(bench, capsys):
+    meter, rotator = bench
+    setpoint = 0.4e-3
+    # 20% off in amplitude and 2 degrees off in angle: the integrator has to make up for it
+    stabilizer = PowerStabilizer(meter, rotator, setpoint, MalusModel(1.2e-3, 8.0, 0.0))
+    rotator.verbose = True
+    capsys.readouterr()
+    result = stabilizer.run(2.0)
+
+    # no message per move while the loop runs, and the flags are restored
+    assert capsys.readouterr().out==''
+    assert rotator.verbose and rotator.wait
+    assert result['moves']>0
+    settled = stabilizer.results(settleTime=1.0)
+    assert abs(settled['meanError'])<0.01*setpoint
+    assert settled['relativeRmsError']<0.03
+
+
+def test_a_failing_move_stops_the_run(bench):
+    meter, rotator = bench
+    stabilizer = PowerStabilizer(meter, rotator, 0.4e-3, TRUE_MODEL)
+
+    def MoveToPosition(serial, deviceUnit):
+        raise RuntimeError('rotator disconnected')
+
+    rotator.library.MoveToPosition = MoveToPosition
+    rotator.verbose = True
+    with pytest.raises(RuntimeError, match='rotator disconnected'):
+        stabilizer.run(5.0)
+    assert not stabilizer.isRunning()
+    assert rotator.verbose and rotator.wait
@@ -0,0 +1,66 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pylabinstrument.spectral.stats import SpectrumStats
+
+
+@pytest.fixture
+def spectra():
+    rng = np.random.RandomState(0)
+    # a large offset, where the naive sum of squares would lose the variance
+    return 1e4 + rng.standard_normal((40, 16))*np.linspace(0.1, 2.0, 16)
+
+
+def check(stats, spectra):
+    assert stats.count==len(spectra)
+    np.testing.assert_allclose(stats.mean, np.mean(spectra, axis=0), rtol=1e-12)
+    np.testing.assert_allclose(stats.variance, np.var(spectra, axis=0, ddof=1), rtol=1e-9)
+    np.testing.assert_allclose(stats.stderr, np.std(spectra, axis=0, ddof=1)/np.sqrt(len(spectra)), rtol=1e-9)
+    np.testing.assert_array_equal(stats.min, spectra.min(axis=0))
+    np.testing.assert_array_equal(stats.max, spectra.max(axis=0))
+
+
+def test_add_matches_numpy(spectra):
+    stats = SpectrumStats(16)
+    for spectrum in spectra:
+        stats.add(spectrum)
+    check(stats, spectra)
+
+
+@pytest.mark.parametrize('sizes', [[40], [1, 39], [7, 13, 20], [2, 1, 30, 1, 6]])
+def test_batches_match_numpy(spectra, sizes):
+    stats = SpectrumStats(16)
+    for batch in np.split(spectra, np.cumsum(sizes)[:-1]):
+        stats.addBatch(batch)
+    check(stats, spectra)
+
+
+def test_single_scans_and_batches_mixed(spectra):
+    stats = SpectrumStats(16)
+    stats.add(spectra[0])
+    stats.addBatch(spectra[1:25])
+    stats.add(spectra[25])
+    stats.addBatch(spectra[26:])
+    check(stats, spectra)
+
+
+def test_saturated_count_and_reset():
+    stats = SpectrumStats(3, saturation=1.0)
+    stats.add(np.array([0.5, 1.0, 2.0]))
+    stats.addBatch(np.array([[1.0, 0.0, 1.5], [0.0, 0.0, 1.0]]))
+    np.testing.assert_array_equal(stats.saturated, [1, 1, 3])
+    stats.reset()
+    assert stats.count==0 and not stats.saturated.any()
+    assert np.isnan(stats.variance).all()
+
+
+def test_isConverged_follows_stderr(spectra):
+    stats = SpectrumStats(16)
+    assert not stats.isConverged(1.0)
+    stats.addBatch(spectra)
+    worst = stats.stderr.max()
+    assert stats.isConverged(worst*1.001)
+    assert not stats.isConverged(worst*0.999)
+    # the first pixels are the least noisy
+    assert stats.isConverged(stats.stderr[:4].max()*1.001, pixels=slice(0, 4))
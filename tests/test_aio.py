@@ -0,0 +1,38 @@
+import asyncio
+
+from pylabinstrument.ctools import aio
+
+
+class Instrument(object):
+    pass
+
+
+def test_lock_is_per_event_loop():
+    instrument = Instrument()
+
+    async def use():
+        async with aio.lockOf(instrument):
+            await asyncio.sleep(0)
+        return aio.lockOf(instrument)
+
+    # a lock bound to the first loop must not be reused by the second
+    first = asyncio.run(use())
+    second = asyncio.run(use())
+    assert first is not second
+
+
+def test_lock_serializes_calls_in_one_loop():
+    instrument = Instrument()
+    order = []
+
+    async def call(name):
+        async with aio.lockOf(instrument):
+            order.append(name + ' start')
+            await asyncio.sleep(0.01)
+            order.append(name + ' end')
+
+    async def main():
+        await asyncio.gather(call('a'), call('b'))
+
+    asyncio.run(main())
+    assert order==['a start', 'a end', 'b start', 'b end']
@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pylabinstrument.ctools import alarm
+
+
+def block(values, t0=0.0, dt=0.01):
+    values = np.asarray(values, dtype=np.float64)
+    return t0 + dt*np.arange(len(values)), values
+
+
+def changes(events):
+    return [(event.rule, event.state, event.value) for event in events]
+
+
+def test_latch_keeps_state_and_set_wins():
+    setMask = np.array([0, 1, 0, 0, 1, 0], bool)
+    clearMask = np.array([0, 0, 0, 1, 1, 0], bool)
+    np.testing.assert_array_equal(alarm.latch(setMask, clearMask, True), [1, 1, 1, 0, 1, 1])
+    np.testing.assert_array_equal(alarm.latch(setMask, clearMask, False), [0, 1, 1, 0, 1, 1])
+    assert len(alarm.latch(np.zeros(0, bool), np.zeros(0, bool), True))==0
+
+
+def test_threshold_on_block_edges_and_latched_across_blocks():
+    rule = alarm.Threshold('low', 1.0, 'below', hysteresis=0.2)
+    monitor = alarm.AlarmMonitor(None, [rule])
+    # fires on the first sample of a block
+    assert changes(monitor.evaluate(*block([0.5, 0.9, 1.1]))) == [('low', 'alarm', 0.5)]
+    # inside the hysteresis band the latch stays set, also over a whole block
+    assert monitor.evaluate(*block([1.1, 1.19, 0.95, 1.0]))==[]
+    assert rule.active
+    # clears on the last sample of a block
+    assert changes(monitor.evaluate(*block([1.1, 1.2]))) == [('low', 'clear', 1.2)]
+    # fires on the last sample of a block, and clears on the first of the next
+    assert changes(monitor.evaluate(*block([1.5, 1.5, 0.99]))) == [('low', 'alarm', 0.99)]
+    assert changes(monitor.evaluate(*block([1.3, 0.5]))) == [('low', 'clear', 1.3), ('low', 'alarm', 0.5)]
+    assert monitor.active()=={'low': True}
+
+
+def test_threshold_above():
+    rule = alarm.Threshold('high', 1.0, 'above', hysteresis=0.1)
+    states = rule.evaluate(*block([0.5, 1.01, 0.95, 0.9, 1.2]))
+    np.testing.assert_array_equal(states, [0, 1, 1, 0, 1])
+
+
+def test_rate_of_change_across_block_boundary():
+    rule = alarm.RateOfChange('jump', maxRate=10.0, hysteresis=5.0)
+    monitor = alarm.AlarmMonitor(None, [rule])
+    # 0.01 s between samples: a step of 0.2 is 20/s
+    assert monitor.evaluate(*block([1.0, 1.0, 1.0], t0=0.0))==[]
+    # the step is between the last sample of the previous block and the first of this one
+    events = monitor.evaluate(*block([1.2, 1.2, 1.2], t0=0.03))
+    assert changes(events)==[('jump', 'alarm', 1.2), ('jump', 'clear', 1.2)]
+    # on the last sample of a block; a rate between maxRate-hysteresis and maxRate keeps it set into the next block
+    events = monitor.evaluate(*block([1.2, 1.2, 1.4], t0=0.06))
+    assert changes(events)==[('jump', 'alarm', 1.4)]
+    assert monitor.evaluate(*block([1.47], t0=0.09))==[]
+    assert rule.active
+    events = monitor.evaluate(*block([1.47], t0=0.10))
+    assert changes(events)==[('jump', 'clear', 1.47)]
+
+
+def test_monitor_on_simulated_power_meter():
+    pytest.importorskip('visa')
+    from pylabinstrument.ctools import simulators
+    from pylabinstrument.thorlabs.powermeter.PMSeries import PowerMeter
+
+    meter = PowerMeter('USB0::0x1313::0x8078::P0000001::INSTR')
+    meter.verbose = False
+    t0 = time.time()
+
+    def signal(t, wavelength):
+        # drops below the limit, then comes back into the hysteresis band only
+        return 1e-3 if t-t0<0.1 else (0.5e-3 if t-t0<0.2 else 0.85e-3)
+
+    simulators.use(meter, 'tlpm', signal=signal, latency={'MeasurePower': 0.001})
+    meter.open()
+    stream = meter.stream()
+    alarms = []
+    rule = alarm.Threshold('low', 0.8e-3, 'below', hysteresis=0.1e-3)
+    monitor = alarm.AlarmMonitor(stream, [rule], onAlarm=alarms.append, onClear=alarms.append)
+    monitor.start()
+    try:
+        time.sleep(0.4)
+    finally:
+        monitor.stop()
+        stream.stop()
+        meter.close()
+    assert monitor.error is None
+    assert [(event.state, event.value) for event in alarms]==[('alarm', 0.5e-3)]
+    assert rule.active
+    assert 0.1<=alarms[0].t-t0<0.15
@@ -0,0 +1,84 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pylabinstrument.spectral.correction import SpectrumCorrection
+
+
+class Darks(object):
+    """
+    acquireDark that returns integrationTime*(1, 2, ..., n) and counts its calls.
+    """
+
+    def __init__(self, nPixels):
+        self.nPixels = nPixels
+        self.calls = []
+
+    def __call__(self, integrationTime):
+        self.calls.append(integrationTime)
+        return integrationTime*np.arange(1, self.nPixels+1)
+
+
+def test_dark_is_acquired_once_per_integration_time():
+    darks = Darks(4)
+    corr = SpectrumCorrection(4, acquireDark=darks)
+    raw = np.full((3, 4), 10.0)
+    np.testing.assert_allclose(corr.apply(raw, 0.01, copy=True), 10.0 - 0.01*np.arange(1, 5)*np.ones((3, 1)))
+    corr.apply(raw, 0.010000000001, copy=True)
+    corr.apply(raw, 0.02, copy=True)
+    assert darks.calls==[0.01, 0.02]
+    corr.invalidateDarks()
+    corr.apply(raw, 0.01, copy=True)
+    assert darks.calls==[0.01, 0.02, 0.01]
+
+
+def test_least_recently_used_dark_is_dropped():
+    darks = Darks(2)
+    corr = SpectrumCorrection(2, acquireDark=darks, maxDarks=2)
+    corr.getDark(1.0)
+    corr.getDark(2.0)
+    corr.getDark(1.0)
+    corr.getDark(3.0)
+    assert corr.hasDark(1.0) and corr.hasDark(3.0) and not corr.hasDark(2.0)
+
+
+def test_flat_in_place_and_copy():
+    corr = SpectrumCorrection(3, flat=[2.0, 0.5, 0.0])
+    corr.setDark(0.1, [1.0, 1.0, 1.0])
+    raw = np.array([[5.0, 3.0, 9.0]])
+    out = corr.apply(raw, 0.1, copy=True)
+    np.testing.assert_allclose(out, [[2.0, 4.0, 0.0]])
+    np.testing.assert_array_equal(raw, [[5.0, 3.0, 9.0]])
+    assert corr.apply(raw, 0.1) is raw
+    np.testing.assert_allclose(raw, [[2.0, 4.0, 0.0]])
+    # integers and read-only arrays are copied, not corrected in place
+    ints = np.array([5, 3, 9])
+    np.testing.assert_allclose(corr.apply(ints, 0.1), [2.0, 4.0, 0.0])
+    np.testing.assert_array_equal(ints, [5, 3, 9])
+
+
+def test_missing_dark_raises_without_acquirer():
+    corr = SpectrumCorrection(3)
+    with pytest.raises(Exception, match='No dark reference'):
+        corr.apply(np.zeros(3), 0.1)
+    with pytest.raises(ValueError):
+        corr.setDark(0.1, np.zeros(4))
+
+
+def test_ccs_dark_acquirer_restores_the_integration_time():
+    pytest.importorskip('visa')
+    from pylabinstrument.ctools import simulators
+    from pylabinstrument.spectral.correction import ccsDarkAcquirer
+    from pylabinstrument.thorlabs.spectrometer.CCS import CCS, PIX_NUM
+
+    ccs = CCS('USB0::0x1313::0x8089::M00000001::RAW')
+    ccs.verbose = False
+    simulators.use(ccs, 'tlccs', readoutTime=0.0)
+    ccs.open()
+    try:
+        corr = SpectrumCorrection(PIX_NUM, acquireDark=ccsDarkAcquirer(ccs, avgN=2))
+        dark = corr.getDark(0.005)
+        assert dark.shape==(PIX_NUM,) and not dark.flags.writeable
+        assert ccs.integrationTime==0.01 and ccs.getIntegrationTime()==0.01
+    finally:
+        ccs.close()
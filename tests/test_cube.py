@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pylabinstrument.spectral import cube as C
+
+N_PIXELS = 32
+WL = 400 + 0.5*np.arange(N_PIXELS)
+
+
+def frames(n, seed=0):
+    rng = np.random.RandomState(seed)
+    return rng.standard_normal((n, N_PIXELS)), 1000.0 + 0.01*np.arange(n)
+
+
+def test_append_close_reopen_bit_exact(tmp_path):
+    path = str(tmp_path / 'run')
+    spectra, t = frames(23)
+    # 23 frames in chunks of 8: the last chunk is partial
+    with C.CubeWriter(path, WL, chunk=8, buffers=2, attrs={'sample': 'A'}) as writer:
+        for i in range(10):
+            writer.append(spectra[i], t[i], 0.01)
+        writer.appendBatch(spectra[10:], t[10:], 0.02)
+        assert writer.count==23
+    cube = C.SpectralCube(path)
+    assert len(cube)==23 and cube.attrs=={'sample': 'A'}
+    assert isinstance(cube.spectra, np.memmap)
+    np.testing.assert_array_equal(cube.spectra, spectra)
+    np.testing.assert_array_equal(cube.times, t)
+    np.testing.assert_array_equal(cube.integrationTimes, [0.01]*10 + [0.02]*13)
+    np.testing.assert_array_equal(cube.wavelength, WL)
+
+
+def test_float32_storage(tmp_path):
+    path = str(tmp_path / 'run')
+    spectra, t = frames(5)
+    with C.CubeWriter(path, WL, dtype=np.float32) as writer:
+        writer.appendBatch(spectra, t)
+    cube = C.SpectralCube(path)
+    assert cube.spectra.dtype==np.float32
+    np.testing.assert_array_equal(cube.spectra, spectra.astype(np.float32))
+    assert os.path.getsize(os.path.join(path, C.SPECTRA))==5*N_PIXELS*4
+
+
+def test_partly_written_frame_is_ignored_and_dropped_on_append(tmp_path):
+    path = str(tmp_path / 'run')
+    spectra, t = frames(12)
+    with C.CubeWriter(path, WL, chunk=4) as writer:
+        writer.appendBatch(spectra[:7], t[:7])
+    # a crash in the middle of a frame: half a spectrum and no frame record
+    with open(os.path.join(path, C.SPECTRA), 'ab') as f:
+        f.write(spectra[7, :N_PIXELS//2].tobytes())
+    cube = C.SpectralCube(path)
+    assert len(cube)==7
+    np.testing.assert_array_equal(cube.spectra, spectra[:7])
+
+    with C.CubeWriter(path, mode='a', chunk=4) as writer:
+        assert writer.count==7
+        writer.appendBatch(spectra[7:], t[7:])
+    cube = C.SpectralCube(path)
+    assert len(cube)==12
+    np.testing.assert_array_equal(cube.spectra, spectra)
+    np.testing.assert_array_equal(cube.times, t)
+
+
+def test_read_while_writing_and_slices(tmp_path):
+    path = str(tmp_path / 'run')
+    spectra, t = frames(20)
+    writer = C.CubeWriter(path, WL, chunk=4)
+    try:
+        cube = C.SpectralCube(path)
+        assert len(cube)==0 and cube.spectra.shape==(0, N_PIXELS)
+        writer.appendBatch(spectra[:10], t[:10])
+        writer.flush()
+        assert cube.refresh()==10
+        np.testing.assert_array_equal(cube[2:5], spectra[2:5])
+        writer.appendBatch(spectra[10:], t[10:])
+    finally:
+        writer.close()
+    assert cube.refresh()==20
+    band = cube.band(WL[3], WL[7])
+    np.testing.assert_array_equal(band, spectra[:, 3:7])
+    assert cube.frames(t[5], t[9])==slice(5, 9)
+    times, sub = cube.timeSlice(t[5], t[9], WL[3], WL[7])
+    np.testing.assert_array_equal(times, t[5:9])
+    np.testing.assert_array_equal(sub, spectra[5:9, 3:7])
+
+
+def test_mode_w_refuses_an_existing_cube(tmp_path):
+    path = str(tmp_path / 'run')
+    C.CubeWriter(path, WL).close()
+    with pytest.raises(Exception, match='already exists'):
+        C.CubeWriter(path, WL)
+    with pytest.raises(ValueError):
+        C.CubeWriter(str(tmp_path / 'other'))
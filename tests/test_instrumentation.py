@@ -0,0 +1,60 @@
+import time
+import types
+
+import pytest
+
+from pylabinstrument.ctools import instrumentation
+from pylabinstrument.ctools.tools import LazyLibrary, bind
+
+
+@pytest.fixture
+def function():
+    def nap(seconds):
+        time.sleep(seconds)
+        return seconds
+
+    lib = LazyLibrary('Fake.dll', 'Fake')
+    lib.load = lambda: types.SimpleNamespace(nap=nap)
+    f = bind(lib, 'nap')
+    instrumentation.reset()
+    yield f
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_off_by_default_and_records_nothing(function):
+    assert not instrumentation.isEnabled()
+    assert function(0.0)==0.0
+    assert ('Fake.dll', 'nap') not in instrumentation.snapshot()
+
+
+def test_records_calls_while_enabled(function):
+    function(0.0)
+    instrumentation.enable()
+    for seconds in [0.001, 0.002, 0.004, 0.002]:
+        function(seconds)
+    instrumentation.disable()
+    function(0.001)
+
+    stats = instrumentation.snapshot()[('Fake.dll', 'nap')]
+    assert stats['count']==4
+    assert stats['min']>=0.001 and stats['total']>=0.009
+    assert stats['mean']==pytest.approx(stats['total']/4)
+    for q in ['p50', 'p95', 'p99']:
+        assert stats['min']<=stats[q]<=stats['max']
+    assert stats['p50']<=stats['p95']<=stats['p99']
+
+    instrumentation.reset()
+    assert ('Fake.dll', 'nap') not in instrumentation.snapshot()
+
+
+def test_timer_and_record(function):
+    with instrumentation.timer('glue', 'block'):
+        pass
+    assert instrumentation.snapshot()=={}
+    instrumentation.enable()
+    with instrumentation.timer('glue', 'block'):
+        time.sleep(0.001)
+    instrumentation.record('glue', 'block', 0.5)
+    stats = instrumentation.snapshot()[('glue', 'block')]
+    assert stats['count']==2 and stats['max']==0.5
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from pylabinstrument import locateDll as L
+
+
+def makeTree(root):
+    """
+    A fake vendor folder with two DLLs and a settings file, and a fake system folder.
+    """
+    vendor = root / 'Program Files' / 'Vendor'
+    (vendor / 'bin').mkdir(parents=True)
+    (vendor / 'bin' / 'A_64.dll').write_bytes(b'a')
+    (vendor / 'bin' / 'B_64.dll').write_bytes(b'b')
+    (vendor / 'Settings.xml').write_bytes(b'<x/>')
+    (vendor / 'readme.txt').write_bytes(b'')
+    system = root / 'Windows' / 'System32'
+    system.mkdir(parents=True)
+    for name in ['kernel.dll', 'user.dll', 'cam_api_64.dll']:
+        (system / name).write_bytes(b'x')
+    return vendor, system
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    vendor, system = makeTree(tmp_path)
+    monkeypatch.setattr(L, 'SYSTEM_ROOTS', [str(tmp_path / 'Windows')])
+    index = L.DllIndex(str(tmp_path / 'dllindex.json'))
+    return tmp_path, vendor, system, index
+
+
+def locate(index, name, folder, root):
+    return L.locateDll(name, folder, str(root), interactive=False, index=index)
+
+
+def test_vendor_scan_records_siblings(tree):
+    tmp_path, vendor, system, index = tree
+    path = locate(index, 'A_64.dll', 'Vendor', tmp_path / 'Program Files')
+    assert path==str(vendor / 'bin' / 'A_64.dll')
+    saved = json.load(open(index.path))
+    assert sorted(saved)==['A_64.dll', 'B_64.dll', 'Settings.xml']
+
+    # a sibling is found from the saved index, without looking at the folder
+    reloaded = L.DllIndex(index.path)
+    assert locate(reloaded, 'B_64.dll', 'NoSuchVendor', tmp_path) == str(vendor / 'bin' / 'B_64.dll')
+
+
+def test_system_scan_records_only_the_requested_name(tree):
+    tmp_path, vendor, system, index = tree
+    path = locate(index, 'cam_api_64.dll', 'System32', tmp_path / 'Windows')
+    assert path==str(system / 'cam_api_64.dll')
+    assert sorted(json.load(open(index.path)))==['cam_api_64.dll']
+
+
+def test_stale_entry_is_removed_and_saved(tree):
+    tmp_path, vendor, system, index = tree
+    locate(index, 'A_64.dll', 'Vendor', tmp_path / 'Program Files')
+    (vendor / 'bin' / 'B_64.dll').write_bytes(b'changed size')
+
+    reloaded = L.DllIndex(index.path)
+    assert reloaded.get('B_64.dll') is None
+    assert 'B_64.dll' not in json.load(open(index.path))
+
+
+def test_missing_folder_raises_when_not_interactive(tree):
+    tmp_path, vendor, system, index = tree
+    with pytest.raises(Exception):
+        locate(index, 'X.dll', 'NoSuchVendor', tmp_path / 'Program Files')
@@ -0,0 +1,61 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pylabinstrument.spectral.peaks import findPeaks
+
+# a non-uniform axis like a grating's, about 0.1 nm per pixel
+PIXELS = np.arange(2000)
+WL = 400 + 0.1*PIXELS + 2e-6*PIXELS**2
+FWHM_PER_SIGMA = 2*np.sqrt(2*np.log(2))
+
+
+def gaussian(centre, sigma, amplitude=2.0, background=0.1):
+    return background + amplitude*np.exp(-0.5*((WL - centre)/sigma)**2)
+
+
+@pytest.fixture
+def centres():
+    # steps of a fraction of a pixel
+    return np.linspace(450.0, 451.0, 7)
+
+
+def test_parabolic_sub_pixel_centre_height_fwhm_area(centres):
+    sigma = 1.0
+    spectra = np.array([gaussian(c, sigma) for c in centres])
+    peaks = findPeaks(spectra, WL, baseline=0.1)
+    np.testing.assert_allclose(peaks.wavelength, centres, atol=1e-3)
+    assert np.all(np.diff(peaks.wavelength)>0)
+    np.testing.assert_allclose(peaks.height, 2.1, atol=2e-5)
+    np.testing.assert_allclose(peaks.fwhm, FWHM_PER_SIGMA*sigma, rtol=2e-3)
+    np.testing.assert_allclose(peaks.area, 2.0*sigma*np.sqrt(2*np.pi), rtol=1e-6)
+    np.testing.assert_array_equal(peaks.index, np.argmax(spectra, axis=1))
+
+
+def test_narrow_peak_parabolic_and_centroid(centres):
+    # sigma of about 1.4 pixels
+    sigma = 0.15
+    spectra = np.array([gaussian(c, sigma) for c in centres])
+    parabolic = findPeaks(spectra, WL, baseline=0.1)
+    centroid = findPeaks(spectra, WL, method='centroid', halfWidth=8, baseline=0.1)
+    np.testing.assert_allclose(parabolic.wavelength, centres, atol=5e-3)
+    np.testing.assert_allclose(centroid.wavelength, centres, atol=1e-3)
+    np.testing.assert_allclose(centroid.fwhm, FWHM_PER_SIGMA*sigma, atol=0.02)
+
+
+def test_window_and_single_spectrum():
+    spectrum = gaussian(450.0, 0.5) + gaussian(600.0, 0.5, amplitude=1.0, background=0.0)
+    peaks = findPeaks(spectrum, WL, window=(590, 610))
+    assert np.ndim(peaks.wavelength)==0
+    assert abs(peaks.wavelength - 600.0)<1e-3
+    assert WL[peaks.index]==pytest.approx(600.0, abs=0.1)
+
+
+def test_fwhm_is_nan_when_a_side_is_cut():
+    spectrum = gaussian(450.0, 1.0)
+    peaks = findPeaks(spectrum, WL, window=(449.0, 455.0))
+    assert np.isnan(peaks.fwhm)
+    with pytest.raises(ValueError):
+        findPeaks(spectrum, WL, window=(450.0, 450.1))
+    with pytest.raises(ValueError):
+        findPeaks(spectrum, WL, method='gauss')
@@ -0,0 +1,57 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pylabinstrument.spectral.resample import Resampler, commonGrid, merge, uniformGrid
+
+PIXELS = np.arange(500)
+WL = 400 + 0.5*PIXELS + 4e-4*PIXELS**2
+
+
+@pytest.fixture
+def spectra():
+    return np.random.RandomState(1).standard_normal((6, len(WL)))
+
+
+def test_matches_np_interp_on_a_non_uniform_grid(spectra):
+    # a non-uniform grid that also falls on pixels and on both ends
+    grid = np.concatenate(([WL[0]], np.sort(np.random.RandomState(2).uniform(WL[0], WL[-1], 300)), [WL[10], WL[-1]]))
+    rs = Resampler(WL, grid)
+    out = rs.apply(spectra)
+    assert out.shape==(6, len(grid))
+    for spectrum, resampled in zip(spectra, out):
+        np.testing.assert_allclose(resampled, np.interp(grid, WL, spectrum), rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(rs(spectra[0]), out[0])
+
+
+def test_out_of_range_fill(spectra):
+    grid = np.array([300.0, WL[0] - 1e-9, WL[0], 500.0, WL[-1], WL[-1] + 1.0])
+    out = Resampler(WL, grid).apply(spectra)
+    inside = np.array([False, False, True, True, True, False])
+    assert np.isnan(out[:, ~inside]).all()
+    np.testing.assert_allclose(out[:, inside], [np.interp(grid[inside], WL, s) for s in spectra])
+    assert (Resampler(WL, grid, fill=-1.0).apply(spectra)[:, ~inside]==-1.0).all()
+
+
+def test_out_argument(spectra):
+    rs = Resampler(WL, uniformGrid(420, 500, 0.25))
+    out = np.empty((6, len(rs.grid)))
+    assert rs.apply(spectra, out=out) is out
+    with pytest.raises(ValueError):
+        rs.apply(spectra, out=np.empty(len(rs.grid)))
+
+
+def test_grids_and_merge():
+    np.testing.assert_allclose(uniformGrid(400, 401, 0.25), [400, 400.25, 400.5, 400.75, 401])
+    other = np.linspace(450, 800, 200)
+    grid = commonGrid([WL, other])
+    assert grid[0]==450 and grid[-1]<=WL[-1]
+    np.testing.assert_allclose(np.diff(grid), np.diff(other)[0])
+    with pytest.raises(ValueError):
+        commonGrid([WL, np.linspace(900, 1000, 10)])
+    grid, (a, b) = merge([(WL**2, WL), (other**2, other)], step=1.0)
+    # within the error of linear interpolation
+    np.testing.assert_allclose(a, grid**2, rtol=1e-4)
+    np.testing.assert_allclose(b, grid**2, rtol=1e-4)
+    with pytest.raises(ValueError):
+        Resampler(WL[::-1], grid)
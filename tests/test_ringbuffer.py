@@ -0,0 +1,32 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pylabinstrument.ctools.ringbuffer import RingBuffer
+
+
+def test_since_and_latest_across_wraps():
+    r = RingBuffer(5)
+    for k in range(23):
+        r.append(k)
+        for seq in range(max(0, r.count-5), r.count+1):
+            items, nextSeq, dropped = r.since(seq)
+            assert list(items)==list(range(seq, r.count))
+            assert nextSeq==r.count and dropped==0
+        assert list(r.latest())==list(range(max(0, r.count-5), r.count))
+    items, nextSeq, dropped = r.since(0)
+    assert list(items)==[18, 19, 20, 21, 22] and dropped==18
+
+
+def test_view_rejects_items_not_held():
+    r = RingBuffer(5)
+    r.extend(np.arange(8))
+    assert list(r.view(3, 8))==[3, 4, 5, 6, 7]
+    assert len(r.view(8, 8))==0
+    # 2 has been overwritten by 7, 8 is not written yet
+    with pytest.raises(IndexError):
+        r.view(2, 7)
+    with pytest.raises(IndexError):
+        r.view(4, 9)
+    with pytest.raises(IndexError):
+        r.view(5, 4)
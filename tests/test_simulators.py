@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pylabinstrument.ctools import simulators
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match='Unknown backend'):
+        simulators.create('nope')
+
+
+def test_tlpm_drives_the_power_meter():
+    pytest.importorskip('visa')
+    from pylabinstrument.thorlabs.powermeter.PMSeries import PowerMeter
+
+    meter = PowerMeter('USB0::0x1313::0x8078::P0000001::INSTR')
+    meter.verbose = False
+    sim = simulators.use(meter, 'tlpm', signal=lambda t, wavelength: wavelength*1e-6)
+    meter.open()
+    try:
+        assert meter.measure()==pytest.approx(635e-6)
+        meter.setWavelength(800)
+        assert meter.getWavelength()==800
+        assert meter.measure()==pytest.approx(800e-6)
+        # out of the sensor's range
+        with pytest.raises(ValueError):
+            meter.setWavelength(2000)
+        assert sim.calls['MeasurePower']==2
+    finally:
+        meter.close()
+    assert sim.sessions=={}
+
+
+def test_tlccs_scan_shows_the_line():
+    pytest.importorskip('visa')
+    from pylabinstrument.thorlabs.spectrometer.CCS import CCS
+
+    ccs = CCS('USB0::0x1313::0x8089::M00000001::RAW')
+    ccs.verbose = False
+    simulators.use(ccs, 'tlccs')
+    ccs.open()
+    try:
+        ccs.setIntegrationTime(0.01)
+        (data, wl) = ccs.sweepAvg(1)
+        # the default spectrum is a 632.8 nm line
+        assert wl[np.argmax(data)]==pytest.approx(632.8, abs=0.5)
+    finally:
+        ccs.close()
+
+
+def test_kcubedcservo_moves_at_its_velocity():
+    from pylabinstrument.thorlabs.motion.KCubeDCServo import Rotator
+
+    rotator = Rotator(27000001)
+    rotator.verbose = False
+    sim = simulators.use(rotator, 'kcubedcservo', velocity=100)
+    rotator.open()
+    try:
+        start = time.time()
+        rotator.moveToPosition(30)
+        assert time.time()-start>=0.3
+        assert rotator.getPosition()==pytest.approx(30, abs=1e-3)
+        assert not sim.isMoving('27000001')
+    finally:
+        rotator.close()
+
+
+def test_kcubesolenoid_follows_the_operating_state():
+    from pylabinstrument.thorlabs.motion.KCubeSolenoid import Motor
+
+    shutter = Motor(68000001)
+    shutter.verbose = False
+    sim = simulators.use(shutter, 'kcubesolenoid', switchTime=0.01)
+    shutter.open()
+    try:
+        shutter.shutterOn()
+        assert shutter.getOperatingState()=='On'
+        # the solenoid lags the operating state by switchTime
+        assert sim.GetSolenoidState('68000001')==sim.CLOSED
+        time.sleep(0.02)
+        assert sim.GetSolenoidState('68000001')==sim.OPEN
+        shutter.shutterOff()
+        assert [state for (t, state) in sim.history('68000001')]==[sim.ACTIVE, sim.INACTIVE]
+    finally:
+        shutter.close()
+
+
+def test_ueye_captures_a_frame():
+    from pylabinstrument.ids.IDS import Camera
+
+    camera = Camera(1)
+    camera.verbose = False
+    sim = simulators.use(camera, 'ueye', size=(320, 240), seed=0)
+    camera.open()
+    try:
+        image = camera.captureSingle()
+    finally:
+        camera.close()
+    assert image.shape==(240, 320)
+    # the spot is in the middle of the frame
+    (y, x) = np.unravel_index(np.argmax(image), image.shape)
+    assert abs(y-120)<20 and abs(x-160)<20
+    assert sim.calls['FreezeVideo']==1 and sim.calls['CopyImageMem']==1
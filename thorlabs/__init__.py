@@ -0,0 +1,3 @@
+from ..ctools.lazy import lazyImporter
+
+__getattr__, __dir__ = lazyImporter(__name__, ['motion', 'powermeter', 'procedures', 'spectrometer', 'templates'])
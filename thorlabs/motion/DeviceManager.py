@@ -1,48 +1,58 @@
-from ctypes import cdll
-from .. .ctools.tools import bind, null_function
+from ...ctools.tools import LazyLibrary
 import xml.etree.ElementTree as ET
-from . import KCubeDCServo as kdc
 from .tools import _supported_devices as supDv
 
-
-from ...locateDll import locateDll
 libname0 = "Thorlabs.MotionControl.DeviceManager.dll"
 foldername = "Thorlabs"
-dllpath0 = locateDll(libname0, foldername)
-lib = cdll.LoadLibrary(dllpath0.replace("\\","\\\\"))
+lib = LazyLibrary(libname0, foldername)
 
 filename = "ThorlabsDefaultSettings.xml"
-_filepath = locateDll(filename, foldername)
 
+_settings = None
+
+def _defaultSettings():
+    """
+    Locate and parse ThorlabsDefaultSettings.xml on first use. Return a dict with
+    deviceslist_et, devicesettingslist_et -- the XML elements of the device types and of the stage settings
+    devicetype_to_id -- a dict of device type name --> ID
+    deviceslist -- a list of device type names
+    devicesettingslist -- a list of stage (settings) names
+    """
+    global _settings
+    if _settings is None:
+        from ...locateDll import locateDll
+        root = ET.parse(locateDll(filename, foldername)).getroot()
+        deviceslist_et = list(root)[1]
+        devicesettingslist_et = list(root)[2]
+
+        # list device types by name
+        devicetype_to_id = dict()
+        for e in deviceslist_et:
+            devicetype_to_id[e.attrib['Name']] = e.attrib['ID']
 
-tree = ET.parse(_filepath)
-root = tree.getroot()
-root.getchildren()
-deviceslist_et = root.getchildren()[1]
-devicesettingslist_et = root.getchildren()[2]
+        _settings = {'deviceslist_et': deviceslist_et,
+                     'devicesettingslist_et': devicesettingslist_et,
+                     'devicetype_to_id': devicetype_to_id,
+                     'deviceslist': list(devicetype_to_id.keys()),
+                     'devicesettingslist': [e.attrib['Name'] for e in devicesettingslist_et]}
+    return _settings
 
-# list device types by name
-devicetype_to_id = dict()
-for e in deviceslist_et.getchildren():
-    name = e.attrib['Name']
-    devicetype_to_id[name] = e.attrib['ID']
 
-deviceslist = list(devicetype_to_id.keys())
-    
-devicesettingslist = []
-for e in devicesettingslist_et.getchildren():
-    name = e.attrib['Name']
-    devicesettingslist.append(name)
+def __getattr__(name):
+    # module attributes of the parsed settings, e.g. devicetype_to_id, are only built when first accessed
+    if name in ('deviceslist_et', 'devicesettingslist_et', 'devicetype_to_id', 'deviceslist', 'devicesettingslist'):
+        return _defaultSettings()[name]
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
 
 
 
 class DeviceManager(object):
 
     def getDevicesList(self):
-        return deviceslist
+        return _defaultSettings()['deviceslist']
 
     def getDeviceSettingsList(self):
-        return devicesettingslist
+        return _defaultSettings()['devicesettingslist']
 
     def getAvailableSettings(self, devicename):
         """
@@ -50,14 +60,14 @@ class DeviceManager(object):
         Inputs:
         devicename -- a string of name of the controller, such as KDC101, KSC101
         """
-        if devicename not in list(devicetype_to_id.keys()):
+        if devicename not in _defaultSettings()['devicetype_to_id']:
             raise ValueError('Invalid device types. Get device types by .getDevicesList().')
         
-        root = deviceslist_et.find("./DeviceType[@Name='{}']".format(devicename))
-        root = root.getchildren()[0]
+        root = _defaultSettings()['deviceslist_et'].find("./DeviceType[@Name='{}']".format(devicename))
+        root = list(root)[0]
 
         settings = []
-        for e in root.getchildren():
+        for e in root:
             name = e.attrib['Name']
             settings.append(name)
         
@@ -71,8 +81,8 @@ class DeviceManager(object):
         Outputs:
         setting_dict -- a dictionary of settings for the stage name
         """
-        assert stagename in devicesettingslist, "{} is not in the available device list of.".format(stagename)
-        root = devicesettingslist_et.findall(".//DeviceSettingsDefinition[@Name='{}']".format(stagename))
+        assert stagename in _defaultSettings()['devicesettingslist'], "{} is not in the available device list of.".format(stagename)
+        root = _defaultSettings()['devicesettingslist_et'].findall(".//DeviceSettingsDefinition[@Name='{}']".format(stagename))
         if len(root)>1:
             raise Exception("Found more than one matching of {}. There should be one. Contact the code author.".format(stagename))
         root = root[0]
@@ -132,8 +142,8 @@ class DeviceManager(object):
         settings_dict -- a dict of settings of a particular stage. settings_dict can be obtained from .getDeviceSettings(stagename)
         """
         speedparams = dict()
-        speedparams['maxVelocity'] = settings['Physical']['MaxVel']
-        speedparams['maxAcceleration'] = settings['Physical']['MaxAccn']
+        speedparams['maxVelocity'] = settings_dict['Physical']['MaxVel']
+        speedparams['maxAcceleration'] = settings_dict['Physical']['MaxAccn']
         return speedparams
 
     def discoverByType(self, typename):
@@ -142,6 +152,7 @@ class DeviceManager(object):
         typename -- a name of the device type to discover. For supported device, call .supportedDevices().
         '''
         assert typename.lower() in self.supportedDevices(), 'typename must be a member of {}'.format(self.supportedDevices())
+        from . import KCubeDCServo as kdc
         result = kdc.discover(supDv.name_to_num[typename.lower()])
         return result
 
@@ -158,8 +169,8 @@ def extractor(root):
     root -- a starting XML element whose children will be converted into a dict.
     """
     result = dict()
-    for child in root.getchildren():
-        if len(child.getchildren())==0:
+    for child in root:
+        if len(child)==0:
             try:
                 result[child.tag] = float(child.text)
             except:
@@ -26,7 +26,7 @@ c_word = c_ushort
 c_dword = c_ulong
 
 from .tools import _enumeration as enum
-from time import sleep
+from time import sleep, monotonic
 from .tools import _KCubeDCServo as K
 from .tools import _motor
 from .tools import _supported_devices as supDv
@@ -116,9 +116,10 @@ class Motor(_motor.Motor):
             # self.clearMessageQueue()
             self.verboseMessage('Moving to position...')
             err_code = self.library.MoveToPosition(self.serial_no_c, self.getDeviceUnitFromRealValue(realpos))
-            sleep(0.1)
             if err_code==0:
                 if self.wait:
+                    # the status bits show the move after up to one polling period
+                    sleep(0.1)
                     while isMoving(self.getStatus()):
                         sleep(0.1)
                     self.verboseMessage('Done moving to position.')
@@ -128,6 +129,63 @@ class Motor(_motor.Motor):
             raise self.notInSessionMsg()
 
 
+    async def moveToPositionAsync(self, realpos, timeout=None):
+        """
+        Awaitable moveToPosition() that always waits for the move to finish. The status is polled without blocking the event loop.
+        """
+        if self.isInSession:
+            from ...ctools import aio
+            async with aio.lockOf(self):
+                self.verboseMessage('Moving to position...')
+                deviceUnit = await aio.runBlocking(self.getDeviceUnitFromRealValue, realpos)
+                err_code = await aio.runBlocking(self.library.MoveToPosition, self.serial_no_c, deviceUnit)
+                if err_code==0:
+                    await aio.pollUntil(self._moveDone(deviceUnit), interval=0.02, maxInterval=0.1, timeout=timeout)
+                    self.verboseMessage('Done moving to position.')
+                else:
+                    raise Exception('Error trying to move. Error code {}'.format(err_code))
+        else:
+            raise self.notInSessionMsg()
+
+    async def homeAsync(self, timeout=None):
+        """
+        Awaitable home() that always waits for homing to finish.
+        """
+        if self.isInSession:
+            from ...ctools import aio
+            async with aio.lockOf(self):
+                canhome = await aio.runBlocking(self.library.CanHome, self.serial_no_c)
+                if canhome:
+                    self.verboseMessage('Homing...')
+                    err_code = await aio.runBlocking(self.library.Home, self.serial_no_c)
+                    if err_code==0:
+                        await aio.pollUntil(self._moveDone(0), interval=0.05, maxInterval=0.2, timeout=timeout)
+                        self.verboseMessage('Done homing.')
+                    else:
+                        raise Exception('Error when homing. Error code {}.'.format(err_code))
+                else:
+                    self.verboseMessage('Device cannot perform home.')
+        else:
+            raise self.notInSessionMsg()
+
+    def _moveDone(self, deviceUnit, tolerance=2, settle=0.3):
+        """
+        Return a predicate telling whether a move to deviceUnit is done. The status bits lag the move command by up to a polling period, so the move is done once the stage is stopped at the target, or has stayed stopped for settle seconds (e.g. at a travel limit).
+        """
+        stoppedSince = []
+
+        def done():
+            if isMoving(self.getStatus()):
+                del stoppedSince[:]
+                return False
+            if abs(self.library.GetPosition(self.serial_no_c) - deviceUnit)<=tolerance:
+                return True
+            if not stoppedSince:
+                stoppedSince.append(monotonic())
+            return monotonic()-stoppedSince[0]>=settle
+        return done
+
+
     def getPosition(self):
         if self.isInSession:
             err_code = self.library.RequestPosition(self.serial_no_c)
@@ -368,6 +426,10 @@ class Rotator(Motor):
         pos = np.mod(realpos, 360)
         super().moveToPosition(pos)
 
+    async def moveToPositionAsync(self, realpos, timeout=None):
+        pos = np.mod(realpos, 360)
+        await super().moveToPositionAsync(pos, timeout)
+
     def home(self):
         self.moveToPosition(0)
         super().home()
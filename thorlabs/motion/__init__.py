@@ -1 +1,3 @@
-from . import DeviceManager, KCubeDCServo, KCubeSolenoid
\ No newline at end of file
+from ...ctools.lazy import lazyImporter
+
+__getattr__, __dir__ = lazyImporter(__name__, ['DeviceManager', 'KCubeDCServo', 'KCubeSolenoid', 'tools'])
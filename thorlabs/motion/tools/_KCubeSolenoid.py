@@ -1,6 +1,5 @@
 from ctypes import (
     Structure,
-    cdll,
     c_bool,
     c_short,
     c_int,
@@ -22,22 +21,18 @@ from ctypes import (
 c_word = c_ushort
 c_dword = c_ulong
 
-from .. ..ctools.tools import bind, null_function
+from .. ..ctools.tools import bind, LazyLibrary
 from ._enumeration import *
 
-from comtypes import _safearray
 import ctypes
 from ctypes import byref, pointer
 from time import sleep
 
-from ....locateDll import locateDll
 libname0 = "Thorlabs.MotionControl.DeviceManager.dll"
 libname = "Thorlabs.MotionControl.KCube.Solenoid.dll"
 foldername = "Thorlabs"
-dllpath0 = locateDll(libname0, foldername)
-dllpath  = locateDll(libname,  foldername)
-lib0 = cdll.LoadLibrary(dllpath0.replace("\\","\\\\"))
-lib = cdll.LoadLibrary(dllpath.replace("\\","\\\\"))
+lib0 = LazyLibrary(libname0, foldername)
+lib = LazyLibrary(libname, foldername, depends=[lib0])
 
 class StructureEx(Structure):
 
@@ -25,14 +25,33 @@ from ctypes import (
 from ...ctools import _visa_enum as enum
 from .tools import _TLPM_wrapper as K
 from visa import constants as vicons
-from time import sleep
+from time import sleep, monotonic
+import threading
 
 class DeviceManager(object):
+    """
+    Finds the TLPM power meters connected to the computer.
 
-    def __init__(self):
+    The devices found are kept in a registry: discover() returns the registry while it is younger than ttl seconds, and refresh() finds the devices again, querying only the ones that appeared. getBySerial() looks a device up by serial number, and refreshAvailability() queries a device for its current deviceAvailable (it changes when another process opens a meter). startWatching() refreshes the registry periodically on a background thread and calls the listeners with ('added', info) and ('removed', info) events.
+
+    INPUTS:
+    ttl -- seconds the registry is considered up to date.
+    """
+
+    def __init__(self, ttl=5.0):
         self._library = K
         self._numOfResources = 0
 
+        # registry
+        self._ttl = ttl
+        self._devices = dict()       # resource name --> info dict
+        self._bySerial = dict()      # serial number (str) --> info dict
+        self._refreshed = None
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._watcher = None
+        self._stopWatching = threading.Event()
+
     @property
     def library(self):
         return self._library
@@ -41,6 +60,14 @@ class DeviceManager(object):
     def library(self, lib):
         self._library = lib
     
+    @property
+    def ttl(self):
+        return self._ttl
+
+    @ttl.setter
+    def ttl(self, sec):
+        self._ttl = sec
+
     @property
     def numOfResources(self):
         return self._numOfResources
@@ -53,10 +80,137 @@ class DeviceManager(object):
 
     ###############################################
 
-    def discover(self):
-        self.findResources()
-        rlist = self.getResourceList()
-        return rlist
+    def discover(self, maxAge=None):
+        """
+        Return a list of info dicts (index, modelName, serialNo, manufacturer, deviceAvailable, resourceName) of the connected devices. The dicts are copies of the registry's; deviceAvailable is as of when the device was found or refreshAvailability() was last called for it.
+
+        INPUTS:
+        maxAge -- return the registry without asking the devices if it was refreshed less than maxAge seconds ago. Default is ttl; 0 always refreshes.
+        """
+        maxAge = self._ttl if maxAge is None else maxAge
+        with self._lock:
+            if self._refreshed is None or monotonic()-self._refreshed>=maxAge:
+                self.refresh()
+            return [dict(info) for info in sorted(self._devices.values(), key=lambda info: info['index'])]
+
+
+    def refresh(self):
+        """
+        Find the connected devices again and update the registry. Only the devices that appeared are queried for their info; the others keep theirs (see refreshAvailability()).
+
+        OUTPUT:
+        (added, removed) -- lists of info dicts (copies) of the devices that appeared and disappeared.
+        """
+        with self._lock:
+            n = self.findResources()
+            names = []
+            for r in range(0, n):
+                names.append(self.getResourceName(r))
+
+            added = []
+            devices = dict()
+            for index, name in enumerate(names):
+                info = self._devices.get(name)
+                if info is None:
+                    info = self.getResourceInfo(index)
+                    info['resourceName'] = name
+                    added.append(dict(info))
+                else:
+                    # the index of a device shifts when one before it is unplugged
+                    info['index'] = index
+                devices[name] = info
+            removed = [dict(info) for name, info in self._devices.items() if name not in devices]
+
+            self._devices = devices
+            self._bySerial = dict((_str(info['serialNo']), info) for info in devices.values())
+            self._refreshed = monotonic()
+
+        for info in added:
+            self._emit('added', info)
+        for info in removed:
+            self._emit('removed', info)
+        return (added, removed)
+
+
+    def refreshAvailability(self, serialNo):
+        """
+        Query the device with the serial number (str or b-string) for its deviceAvailable, which changes when another process opens the meter, and update the registry.
+
+        OUTPUT:
+        (a copy of) the updated info dict, or None if the device is not connected.
+        """
+        with self._lock:
+            info = self.getBySerial(serialNo)
+            if info is None:
+                return None
+            if self.getResourceName(info['index'])!=info['resourceName']:
+                # the devices changed since the last refresh
+                self.refresh()
+                info = self._bySerial.get(_str(serialNo))
+                if info is None:
+                    return None
+            current = self.getResourceInfo(info['index'])
+            registered = self._devices[info['resourceName']]
+            registered['deviceAvailable'] = current['deviceAvailable']
+            return dict(registered)
+
+
+    def getBySerial(self, serialNo):
+        """
+        Return (a copy of) the info dict of the device with the serial number (str or b-string), or None if it is not connected. The registry is refreshed first if it is older than ttl. deviceAvailable is as of when the device was found; see refreshAvailability().
+        """
+        with self._lock:
+            if self._refreshed is None or monotonic()-self._refreshed>=self._ttl:
+                self.refresh()
+            info = self._bySerial.get(_str(serialNo))
+            return dict(info) if info is not None else None
+
+
+    ###############################################
+    # Hot-plug watcher
+
+    def addListener(self, callback):
+        """
+        callback -- called as callback(event, info) with event 'added' or 'removed' whenever refresh() finds a change. It runs on the thread that refreshed, e.g. the watcher thread.
+        """
+        self._listeners.append(callback)
+
+    def removeListener(self, callback):
+        self._listeners.remove(callback)
+
+    def _emit(self, event, info):
+        for callback in list(self._listeners):
+            try:
+                callback(event, info)
+            except Exception as e:
+                print('DeviceManager -- listener {} failed on {} event: {}'.format(callback, event, e))
+
+    def startWatching(self, interval=2.0):
+        """
+        Refresh the registry every interval seconds on a background thread until stopWatching().
+        """
+        if self.isWatching():
+            return
+        self._stopWatching.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name='DeviceManagerWatcher', daemon=True)
+        self._watcher.start()
+
+    def stopWatching(self):
+        self._stopWatching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def isWatching(self):
+        return self._watcher is not None and self._watcher.is_alive()
+
+    def _watch(self, interval):
+        while not self._stopWatching.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print('DeviceManager -- failed to refresh devices: {}'.format(e))
+            self._stopWatching.wait(interval)
 
 
     ###############################################
@@ -102,3 +256,19 @@ class DeviceManager(object):
             return name.value
         if status==vicons.VI_ERROR_INV_OBJECT:
             raise Exception('Index specifies an invalid object. Found {} resources.'.format(self.numOfResources))
+
+
+def _str(value):
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+_shared = None
+
+def getDeviceManager():
+    """
+    Return a DeviceManager shared within the process, so repeated discovery within its ttl does not query the devices again.
+    """
+    global _shared
+    if _shared is None:
+        _shared = DeviceManager()
+    return _shared
@@ -0,0 +1,134 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from ...ctools.worker import Worker
+
+
+class DarkAdjustMonitor(Worker):
+    """
+    Watches the dark current adjustments of any number of power meters from one thread.
+
+    submit() starts the adjustment of a meter and returns a concurrent.futures.Future that resolves with the meter's dark offset once the adjustment is done. All running adjustments are polled in one loop whose interval starts at minInterval and grows towards maxInterval while nothing finishes, so short adjustments are noticed quickly without a tight loop during long ones. Cancelling a future cancels the adjustment of its meter.
+
+    INPUTS:
+    minInterval -- shortest time between two polls in seconds.
+    maxInterval -- longest time between two polls in seconds.
+    """
+
+    def __init__(self, minInterval=0.01, maxInterval=0.1):
+        super().__init__('DarkAdjustMonitor')
+        self.minInterval = minInterval
+        self.maxInterval = maxInterval
+        self._pending = []
+        self._cond = threading.Condition()
+
+    def submit(self, meter, timeout=None):
+        """
+        Start the dark current adjustment of an open PowerMeter. Return a Future of its dark offset.
+
+        INPUTS:
+        meter -- an open PowerMeter.
+        timeout -- seconds after which the adjustment is cancelled and the future fails with TimeoutError. None waits forever.
+        """
+        future = Future()
+        meter.startDarkAdjust()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._pending.append((meter, future, deadline))
+            self.start()
+            self._cond.notify()
+        return future
+
+    def pending(self):
+        """
+        Return the number of adjustments still running.
+        """
+        with self._cond:
+            return len(self._pending)
+
+    def stop(self, timeout=None):
+        """
+        Stop the monitor thread. Adjustments still running are left as they are and their futures are cancelled. The thread starts again on the next submit().
+        """
+        with self._cond:
+            self._stop.set()
+            self._cond.notify()
+        super().stop(timeout)
+
+    def _loop(self):
+        interval = self.minInterval
+        while True:
+            with self._cond:
+                while not self._pending and not self._stop.is_set():
+                    interval = self.minInterval
+                    self._cond.wait()
+                if self._stop.is_set():
+                    for meter, future, deadline in self._pending:
+                        future.cancel()
+                    self._pending = []
+                    return
+                pending = list(self._pending)
+
+            finished = []
+            for item in pending:
+                if self._poll(*item):
+                    finished.append(item)
+
+            with self._cond:
+                for item in finished:
+                    self._pending.remove(item)
+                # poll faster again when something finished or was submitted meanwhile
+                if finished or len(self._pending)>len(pending)-len(finished):
+                    interval = self.minInterval
+                else:
+                    interval = min(1.5*interval, self.maxInterval)
+                if self._pending and not self._stop.is_set():
+                    self._cond.wait(interval)
+
+    def _poll(self, meter, future, deadline):
+        """
+        Check one adjustment. Return True once its future is resolved.
+        """
+        try:
+            if future.cancelled():
+                meter.cancelDarkAdjust()
+                return True
+            if not meter.isDarkAdjustRunning():
+                offset = meter.getDarkOffset()
+                meter.verboseMessage('Done performing dark current adjust.')
+                future.set_result(offset)
+                return True
+            if deadline is not None and time.monotonic()>=deadline:
+                meter.cancelDarkAdjust()
+                future.set_exception(TimeoutError('Dark current adjust of device {} did not finish in time.'.format(meter.name)))
+                return True
+            return False
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return True
+
+
+_monitor = None
+_monitorLock = threading.Lock()
+
+
+def getMonitor():
+    """
+    Return the DarkAdjustMonitor shared by PowerMeter.performDarkFuture() and performDarkAll().
+    """
+    global _monitor
+    if _monitor is None:
+        with _monitorLock:
+            if _monitor is None:
+                _monitor = DarkAdjustMonitor()
+    return _monitor
+
+
+def performDarkAll(meters, timeout=None):
+    """
+    Start the dark current adjustment of every meter at once. Return a list of Futures of their dark offsets, in the order of meters.
+    """
+    monitor = getMonitor()
+    return [monitor.submit(meter, timeout) for meter in meters]
@@ -0,0 +1,217 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from .PMSeries import PowerMeter
+from .DeviceManager import DeviceManager
+
+
+class PowerMeterGroup(object):
+    """
+    A set of power meters read together. Every meter has its own worker thread; for each sample the workers wait at a common barrier and then read at once, so the meters are sampled within a fraction of one reading time instead of one after another.
+
+    INPUTS:
+    resourceNames -- a list of resource names (str) of the meters. None opens every meter found by DeviceManager.discover().
+    library -- the library (wrapper module or simulator) to use for discovery and for every meter. None uses the TLPM wrapper.
+    names -- a list of names of the meters, used in messages. Default is the serial number or the index.
+    """
+
+    def __init__(self, resourceNames=None, library=None, names=None):
+        self._resourceNames = list(resourceNames) if resourceNames is not None else None
+        self._library = library
+        self._names = names
+        self._meters = []
+        self._readers = []
+        self._pool = None
+        self._verbose = True
+
+    @property
+    def meters(self):
+        return self._meters
+
+    @property
+    def resourceNames(self):
+        return self._resourceNames
+
+    @property
+    def verbose(self):
+        return self._verbose
+
+    @verbose.setter
+    def verbose(self, value):
+        self._verbose = value
+        for meter in self._meters:
+            meter._verbose = value
+
+    def __len__(self):
+        return len(self._meters)
+
+    def __getitem__(self, i):
+        return self._meters[i]
+
+    #########################################
+
+    def discover(self):
+        """
+        Return the list of resource names (str) found by DeviceManager.
+        """
+        dm = DeviceManager()
+        if self._library is not None:
+            dm.library = self._library
+        rlist = dm.discover()
+        return [r['resourceName'].decode() if isinstance(r['resourceName'], bytes) else r['resourceName'] for r in rlist]
+
+    def open(self):
+        """
+        Open a session with every meter, in parallel. If any fails, the ones already open are closed again.
+        """
+        if self._resourceNames is None:
+            self._resourceNames = self.discover()
+        if len(self._resourceNames)==0:
+            raise Exception('No power meter found.')
+        self.verboseMessage('Opening {} power meters...'.format(len(self._resourceNames)))
+
+        names = self._names if self._names is not None else [str(i) for i in range(len(self._resourceNames))]
+        meters = []
+        for rsrc, name in zip(self._resourceNames, names):
+            meter = PowerMeter(rsrc, name=name)
+            meter._verbose = self._verbose
+            if self._library is not None:
+                meter.library = self._library
+            meters.append(meter)
+
+        pool = ThreadPoolExecutor(max_workers=len(meters), thread_name_prefix='PowerMeterGroup')
+        futures = [pool.submit(meter.open) for meter in meters]
+        errors = [f.exception() for f in futures]
+        if any(e is not None for e in errors):
+            for meter, e in zip(meters, errors):
+                if e is None:
+                    meter.close()
+            pool.shutdown()
+            raise next(e for e in errors if e is not None)
+
+        self._meters = meters
+        self._readers = [meter.reader() for meter in meters]
+        self._pool = pool
+        self.verboseMessage('Done opening power meters.')
+
+    def close(self):
+        for meter in self._meters:
+            meter.close()
+        if self._pool is not None:
+            self._pool.shutdown()
+        self._meters = []
+        self._readers = []
+        self._pool = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    #########################################
+
+    def read(self, nSamples=1, interval=0.0, timeout=10.0):
+        """
+        Read every meter nSamples times, all meters together.
+
+        INPUTS:
+        nSamples -- number of samples.
+        interval -- time between the starts of two samples in seconds. 0 starts the next sample as soon as every meter has been read.
+        timeout -- seconds a worker waits at the barrier for the others before giving up.
+        OUTPUT:
+        (data, timestamps, stats)
+        data -- an array (nSamples, nMeters) of power.
+        timestamps -- an array (nSamples,) of the time (time.time()) of each sample, the mean of the middles of its readings.
+        stats -- a dict with skew, an array (nSamples,) of the spread of the middles of the readings of a sample in seconds; meanSkew, maxSkew and p95Skew over the samples; and duration, an array (nSamples, nMeters) of how long each reading took.
+        """
+        if self.isInSession():
+            nMeters = len(self._meters)
+            data = np.empty((nSamples, nMeters))
+            start = np.empty((nSamples, nMeters))
+            stop = np.empty((nSamples, nMeters))
+            barrier = threading.Barrier(nMeters, timeout=timeout)
+            t0 = time.perf_counter()
+            clockOffset = time.time() - t0
+
+            def worker(j):
+                read = self._readers[j].read
+                column, tstart, tstop = data[:, j], start[:, j], stop[:, j]
+                clock = time.perf_counter
+                try:
+                    for k in range(nSamples):
+                        if interval>0:
+                            wait = t0 + k*interval - clock()
+                            if wait>0:
+                                time.sleep(wait)
+                        barrier.wait()
+                        tstart[k] = clock()
+                        column[k] = read()
+                        tstop[k] = clock()
+                except threading.BrokenBarrierError:
+                    pass
+                except Exception:
+                    # release the other workers instead of leaving them at the barrier
+                    barrier.abort()
+                    raise
+
+            futures = [self._pool.submit(worker, j) for j in range(nMeters)]
+            errors = [f.exception() for f in futures]
+            for e in errors:
+                if e is not None:
+                    raise e
+            if barrier.broken:
+                raise Exception('Power meters did not meet at the barrier within {} seconds.'.format(timeout))
+
+            middle = (start + stop)/2.0
+            skew = middle.max(axis=1) - middle.min(axis=1)
+            timestamps = middle.mean(axis=1) + clockOffset
+            stats = {'skew': skew, 'meanSkew': float(skew.mean()), 'maxSkew': float(skew.max()),
+                     'p95Skew': float(np.percentile(skew, 95)), 'duration': stop - start}
+            return (data, timestamps, stats)
+        else:
+            raise self.notInSessionMsg()
+
+    def measure(self):
+        """
+        Read every meter once, all together. Return an array (nMeters,) of power.
+        """
+        data, timestamps, stats = self.read(1)
+        return data[0]
+
+    def performDark(self, wait=True, timeout=None):
+        """
+        Run the dark current adjustment of every meter at once. See PMDark.
+
+        INPUTS:
+        wait -- wait for every adjustment to finish.
+        timeout -- seconds after which an adjustment is cancelled.
+        OUTPUT:
+        an array (nMeters,) of dark offsets if wait, otherwise a list of Futures of them.
+        """
+        if self.isInSession():
+            from .PMDark import performDarkAll
+            self.verboseMessage('Performing dark current adjust of {} power meters...'.format(len(self._meters)))
+            futures = performDarkAll(self._meters, timeout)
+            if wait:
+                return np.array([f.result() for f in futures])
+            return futures
+        else:
+            raise self.notInSessionMsg()
+
+    #########################################
+    ## UTILITIES FUNCTION
+
+    def verboseMessage(self, message):
+        if self._verbose:
+            print('PowerMeterGroup -- {}'.format(message))
+
+    def isInSession(self):
+        return self._pool is not None and all(meter.isInSession() for meter in self._meters)
+
+    def notInSessionMsg(self):
+        return Exception('The power meter group is not in session. Run .open() first.')
@@ -23,9 +23,10 @@ from ctypes import (
 )
 
 from ...ctools import _visa_enum as enum
+from ...ctools.tools import LazyFunction
 from .tools import _TLPM_wrapper as K
 from visa import constants as vicons
-from time import sleep
+from time import sleep, perf_counter
 
 
 
@@ -50,6 +51,11 @@ class PowerMeter(object):
         self._resetDevice = None
         self._instrumentHandle = None
 
+        # settings cache, see refreshSettings()
+        self._settings = None
+        self._sensorChecked = 0.0
+        self._sensorCheckInterval = 1.0
+
 
     @property
     def modelName(self):
@@ -115,6 +121,17 @@ class PowerMeter(object):
     @library.setter
     def library(self, lib):
         self._library = lib
+
+    @property
+    def sensorCheckInterval(self):
+        return self._sensorCheckInterval
+
+    @sensorCheckInterval.setter
+    def sensorCheckInterval(self, sec):
+        """
+        sec -- the setters check at most this often (in seconds) whether the sensor was changed, which invalidates the settings cache. 0 checks on every set; None never checks.
+        """
+        self._sensorCheckInterval = sec
     
 
     #########################################
@@ -137,9 +154,20 @@ class PowerMeter(object):
             self.resetDevice = resetDevice
 
             # initialization procedure
-            self.setTimeout(1000)
+            try:
+                self.setTimeout(1000)
+                self.refreshSettings()
+            except Exception:
+                # do not leave a half-initialized session open
+                try:
+                    self.close()
+                except Exception:
+                    pass
+                self.instrumentHandle = None
+                self._settings = None
+                raise
         else:
-            raise Exception('Failed to establish session with device. Error code: {} : {}.'.format(status, ViErrors(status).getMessage()))
+            raise Exception('Failed to establish session with device. Error code: {} : {}.'.format(status, ViErrors(status, library=self.library).getMessage()))
 
         return status
 
@@ -156,6 +184,7 @@ class PowerMeter(object):
                 self.idQuery = None
                 self.resetDevice = None
                 self.instrumentHandle = None
+                self._settings = None
 
 
     ######################################
@@ -174,6 +203,91 @@ class PowerMeter(object):
             raise self.notInSessionMsg()
 
 
+    def measureBurst(self, nSamples=10000, autoTriggerDelay=0):
+        """
+        Capture a burst of samples into the meter's internal buffer at its native rate and transfer them in one call (measurement sequence; PM103, PM5020 and similar meters). The meter captures 100 samples per unit of base time, so nSamples is rounded up to a multiple of 100, at most 10000.
+
+        INPUTS:
+        nSamples -- number of samples, 1 to 10000.
+        autoTriggerDelay -- milliseconds after which the capture is triggered by software if no trigger came.
+        OUTPUT:
+        (t, power)
+        t -- a numpy array of the time of each sample in seconds from the first one, from the time stamps of the meter (microseconds).
+        power -- a numpy array of the power of each sample.
+        """
+        if self.isInSession():
+            import numpy as np
+
+            if not 1<=nSamples<=10000:
+                raise ValueError('nSamples must be between 1 and 10000.')
+            baseTime = -(-int(nSamples)//100)
+            n = 100*baseTime
+
+            status = self.library.ConfPowerMeasurementSequence(self.instrumentHandle, enum.ViUInt32(baseTime))
+            if status!=vicons.VI_SUCCESS:
+                raise Exception('Failed to configure measurement sequence. Error  code: {} : {}.'.format(status, ViErrors(status, library=self.library).getMessage()))
+
+            triggerForced = enum.ViBoolean()
+            status = self.library.StartMeasurementSequence(self.instrumentHandle, enum.ViUInt32(autoTriggerDelay), byref(triggerForced))
+            if status!=vicons.VI_SUCCESS:
+                raise Exception('Failed to start measurement sequence. Error  code: {} : {}.'.format(status, ViErrors(status, library=self.library).getMessage()))
+
+            timeStamps = (enum.ViReal32*n)()
+            values = (enum.ViReal32*n)()
+            values2 = (enum.ViReal32*n)()
+            status = self.library.GetMeasurementSequence(self.instrumentHandle, enum.ViUInt32(baseTime), timeStamps, values, values2)
+            if status!=vicons.VI_SUCCESS:
+                raise Exception('Failed to get measurement sequence. Error  code: {} : {}.'.format(status, ViErrors(status, library=self.library).getMessage()))
+
+            t = np.ctypeslib.as_array(timeStamps)[:nSamples].astype(np.float64)
+            t = (t - t[0])*1e-6
+            power = np.ctypeslib.as_array(values)[:nSamples].astype(np.float64)
+            return (t, power)
+        else:
+            raise self.notInSessionMsg()
+
+
+    async def measureAsync(self):
+        """
+        Awaitable measure(). The DLL call runs in the thread pool of ctools.aio.
+        """
+        if self.isInSession():
+            from ...ctools import aio
+            async with aio.lockOf(self):
+                return await aio.runBlocking(self.measure)
+        else:
+            raise self.notInSessionMsg()
+
+
+    def reader(self):
+        """
+        Return a PowerReader, a fast-read path for polling the power at high rates. The session must be open; get a new reader after reopening the session or changing the library.
+        """
+        if self.isInSession():
+            return PowerReader(self)
+        else:
+            raise self.notInSessionMsg()
+
+
+    def stream(self, capacity=100000, interval=0.0, start=True):
+        """
+        Return a PowerMeterStream that measures continuously on a background thread into a ring buffer. See PMStream.
+
+        INPUTS:
+        capacity -- number of (t, value) samples kept.
+        interval -- minimum time between readings in seconds. 0 reads as fast as possible.
+        start -- start the acquisition thread now.
+        """
+        if self.isInSession():
+            from .PMStream import PowerMeterStream
+            stream = PowerMeterStream(self, capacity, interval)
+            if start:
+                stream.start()
+            return stream
+        else:
+            raise self.notInSessionMsg()
+
+
 
     ######################################
     # Measure --> Configure --> Average
@@ -185,19 +299,23 @@ class PowerMeter(object):
         if self.isInSession():
 
             # check against limits
-            avgtimes = self.getAvgTimes()
-            minval = avgtimes['minValue']
-            maxval = avgtimes['maxValue']
+            setting = self.getCachedSetting('avgTime')
+            minval = setting['minValue']
+            maxval = setting['maxValue']
 
             if not minval<=sec<=maxval:
                 raise ValueError('Average time must be between {} sec and {} sec.'.format(minval, maxval))
+            if sec==setting['written']:
+                return
 
             self.verboseMessage('Setting average time to {} seconds ...'.format(sec))
             status = self.library.SetAvgTime(self.instrumentHandle, enum.ViReal64(sec))
             if status==vicons.VI_SUCCESS:
+                setting['setValue'] = setting['written'] = sec
                 self.verboseMessage('Done setting average time.')
             else:
-                raise Exception('Failed to set average time. Error  code: {} : {}.'.format(status, ViErrors(status).getMessage()))
+                self.invalidateSettings()
+                raise Exception('Failed to set average time. Error  code: {} : {}.'.format(status, ViErrors(status, library=self.library).getMessage()))
         else:
             raise self.notInSessionMsg()
 
@@ -261,7 +379,7 @@ class PowerMeter(object):
                 if status==vicons.VI_SUCCESS:
                     self.verboseMessage('Done setting average count.')
                 else:
-                    raise Exception('Failed to set average count. Error  code: {} : {}.'.format(status, ViErrors(status).getMessage()))
+                    raise Exception('Failed to set average count. Error  code: {} : {}.'.format(status, ViErrors(status, library=self.library).getMessage()))
             else:
                 raise ValueError('count must be integer >=1.')
         else:
@@ -308,19 +426,22 @@ class PowerMeter(object):
             raise self.notInSessionMsg()
 
 
-    def setWavelength(self, wl):
+    def setWavelength(self, wl, timeout=0.5):
         """
-        wl -- attenuation value in nanometer
+        wl -- correction wavelength in nanometer
+        timeout -- seconds to wait for the meter to report the new wavelength.
         """
         if self.isInSession():
 
             # check against limits
-            wls = self.getWavelengths()
-            minval = wls['minValue']
-            maxval = wls['maxValue']
+            setting = self.getCachedSetting('wavelength')
+            minval = setting['minValue']
+            maxval = setting['maxValue']
 
             if not minval<=wl<=maxval:
                 raise ValueError('wavelength must be between {} to {} nm.'.format(minval, maxval))
+            if wl==setting['written']:
+                return
 
             self.verboseMessage('Setting wavelength to {} nm...'.format(wl))
 
@@ -330,18 +451,92 @@ class PowerMeter(object):
             # if status==vicons.VI_SUCCESS:
             #     self.verboseMessage('Done setting wavelength.')
             # else:
-            #     raise Exception('Failed to set wavelength. Error  code: {} : {}.'.format(status, ViErrors(status).getMessage()))
-            sleep(0.1)
-            wl_now = self.getWavelength(0)
-            if abs(wl_now-wl)<1e-5:
+            #     raise Exception('Failed to set wavelength. Error  code: {} : {}.'.format(status, ViErrors(status, library=self.library).getMessage()))
+            if self.waitWavelength(wl, timeout):
+                setting['setValue'] = setting['written'] = wl
                 self.verboseMessage('Done setting wavelength.')
             else:
+                self.invalidateSettings()
                 raise Exception('Failed to set wavelength.')
 
         else:
             raise self.notInSessionMsg()
 
 
+    def waitWavelength(self, wl, timeout=0.5):
+        """
+        Poll the set wavelength until it equals wl (within 1e-5 nm) or timeout seconds passed. The first read back is immediate and the poll interval grows from 1 ms to 20 ms.
+
+        OUTPUT:
+        True if the meter reports wl, False on timeout.
+        """
+        if self.isInSession():
+            deadline = perf_counter() + timeout
+            interval = 0.001
+            value = enum.ViReal64()
+            while True:
+                self.library.GetWavelength(self.instrumentHandle, c_int16(0), byref(value))
+                if abs(value.value-wl)<1e-5:
+                    return True
+                remaining = deadline - perf_counter()
+                if remaining<=0:
+                    return False
+                sleep(min(interval, remaining))
+                interval = min(2*interval, 0.02)
+        else:
+            raise self.notInSessionMsg()
+
+
+    def sweepWavelengths(self, wavelengths, nAvg=1, verify='before', timeout=0.5, raw=False):
+        """
+        Measure the power at each correction wavelength, e.g. for a responsivity run.
+
+        INPUTS:
+        wavelengths -- a sequence of wavelengths in nm, all within the sensor's limits.
+        nAvg -- number of readings at each wavelength.
+        verify -- 'before' polls until the meter reports the wavelength before measuring (see waitWavelength). 'after' measures right after setting and reads the wavelength back afterwards, re-measuring the point if it does not match. None does not verify.
+        timeout -- seconds to wait for each wavelength when verifying.
+        raw -- return every reading instead of the mean at each wavelength.
+        OUTPUT:
+        a numpy array of the mean power at each wavelength, or of shape (len(wavelengths), nAvg) if raw.
+        """
+        if self.isInSession():
+            import numpy as np
+
+            if verify not in ('before', 'after', None):
+                raise ValueError("verify must be 'before', 'after' or None.")
+            wavelengths = np.asarray(wavelengths, dtype=np.float64).ravel()
+            setting = self.getCachedSetting('wavelength')
+            if len(wavelengths)>0 and not (setting['minValue']<=wavelengths.min() and wavelengths.max()<=setting['maxValue']):
+                raise ValueError('wavelengths must be between {} to {} nm.'.format(setting['minValue'], setting['maxValue']))
+
+            self.verboseMessage('Sweeping {} wavelengths...'.format(len(wavelengths)))
+            reader = self.reader()
+            setWavelength = self.library.SetWavelength
+            readings = np.empty((len(wavelengths), int(nAvg)))
+            try:
+                for i, wl in enumerate(wavelengths):
+                    setWavelength(self.instrumentHandle, enum.ViReal64(wl))
+                    if verify=='before' and not self.waitWavelength(wl, timeout):
+                        raise Exception('Failed to set wavelength to {} nm.'.format(wl))
+                    reader.readInto(readings[i])
+                    if verify=='after' and not self.waitWavelength(wl, 0):
+                        setWavelength(self.instrumentHandle, enum.ViReal64(wl))
+                        if not self.waitWavelength(wl, timeout):
+                            raise Exception('Failed to set wavelength to {} nm.'.format(wl))
+                        reader.readInto(readings[i])
+            except Exception:
+                self.invalidateSettings()
+                raise
+            if len(wavelengths)>0:
+                setting['setValue'] = setting['written'] = float(wavelengths[-1])
+            self.verboseMessage('Done sweeping wavelengths.')
+
+            return readings if raw else readings.mean(axis=1)
+        else:
+            raise self.notInSessionMsg()
+
+
     def getAttn(self, attr=0):
         """
         INPUT:
@@ -390,20 +585,24 @@ class PowerMeter(object):
         if self.isInSession():
 
             # check against limits
-            attns = self.getAttns()
-            minval = attns['minValue']
-            maxval = attns['maxValue']
+            setting = self.getCachedSetting('attn')
+            minval = setting['minValue']
+            maxval = setting['maxValue']
 
             if not minval<=db<=maxval:
                 raise ValueError('Attenuation must be between {} to {} dB.'.format(minval, maxval))
+            if db==setting['written']:
+                return
 
             self.verboseMessage('Setting attenuation to {} db...'.format(db))
 
             status = self.library.SetAttn(self.instrumentHandle, enum.ViReal64(db))
             if status==vicons.VI_SUCCESS:
+                setting['setValue'] = setting['written'] = db
                 self.verboseMessage('Done setting attenuation.')
             else:
-                raise Exception('Failed to set attenuation. Error  code: {} : {}.'.format(status, ViErrors(status).getMessage()))
+                self.invalidateSettings()
+                raise Exception('Failed to set attenuation. Error  code: {} : {}.'.format(status, ViErrors(status, library=self.library).getMessage()))
         else:
             raise self.notInSessionMsg()
 
@@ -417,6 +616,38 @@ class PowerMeter(object):
             raise self.notInSessionMsg()
 
 
+    async def performDarkAsync(self, timeout=None):
+        """
+        Awaitable performDark(). The state of the adjustment is polled without blocking the event loop.
+
+        OUTPUT:
+        the dark offset after the adjustment.
+        """
+        if self.isInSession():
+            from ...ctools import aio
+            async with aio.lockOf(self):
+                await aio.runBlocking(self.startDarkAdjust)
+                await aio.pollUntil(lambda: not self.isDarkAdjustRunning(), interval=0.05, maxInterval=0.5, timeout=timeout)
+                self.verboseMessage('Done performing dark current adjust.')
+                return await aio.runBlocking(self.getDarkOffset)
+        else:
+            raise self.notInSessionMsg()
+
+
+    def performDarkFuture(self, timeout=None):
+        """
+        Start the dark current adjustment and return at once. The adjustment is watched by the shared monitor thread of PMDark.
+
+        OUTPUT:
+        a concurrent.futures.Future that resolves with the dark offset (see getDarkOffset) when the adjustment is done.
+        """
+        if self.isInSession():
+            from .PMDark import getMonitor
+            return getMonitor().submit(self, timeout)
+        else:
+            raise self.notInSessionMsg()
+
+
     def getDarkOffset(self):
         if self.isInSession():
             darkOffset = enum.ViReal64()
@@ -470,6 +701,8 @@ class PowerMeter(object):
         if self.isInSession():
             self.verboseMessage('Setting auto range to {}.'.format(tf))
             status = self.library.SetPowerAutoRange(self.instrumentHandle, enum.ViBoolean(tf))
+            if self._settings is not None and 'powerRange' in self._settings:
+                self._settings['powerRange']['written'] = None
             print(status)
         else:
             raise self.notInSessionMsg()
@@ -502,20 +735,26 @@ class PowerMeter(object):
         """
         if self.isInSession():
             # check against limits
-            powers = self.getPowerRange()
-            minval = powers['minValue']
-            maxval = powers['maxValue']
+            setting = self.getCachedSetting('powerRange')
+            minval = setting['minValue']
+            maxval = setting['maxValue']
 
             if not minval<=power<=maxval:
                 raise ValueError('Power range (max) must be between {} to {} watts.'.format(minval, maxval))
+            if power==setting['written']:
+                return
 
             self.verboseMessage('Setting power range to {} watts...'.format(power))
 
             status = self.library.SetPowerRange(self.instrumentHandle, enum.ViReal64(power))
             if status==vicons.VI_SUCCESS:
+                # the meter rounds to its discrete ranges, so only the written value is known
+                setting['written'] = power
+                setting['setValue'] = None
                 self.verboseMessage('Done setting power range.')
             else:
-                raise Exception('Failed to set power range. Error  code: {} : {}.'.format(status, ViErrors(status).getMessage()))
+                self.invalidateSettings()
+                raise Exception('Failed to set power range. Error  code: {} : {}.'.format(status, ViErrors(status, library=self.library).getMessage()))
         else:
             raise self.notInSessionMsg()
 
@@ -545,6 +784,92 @@ class PowerMeter(object):
             raise self.notInSessionMsg()
 
 
+    #######################################
+    # Sensor and settings cache
+
+    def getSensorInfo(self):
+        """
+        OUTPUT:
+        a dict of the connected sensor: name, serialNo and message (b-strings), type, subtype and flags (integers, see TLPM.h).
+        """
+        if self.isInSession():
+            name = (enum.ViChar*256)()
+            serialNo = (enum.ViChar*256)()
+            message = (enum.ViChar*256)()
+            stype = enum.ViInt16()
+            subtype = enum.ViInt16()
+            flags = enum.ViInt16()
+            status = self.library.GetSensorInfo(self.instrumentHandle, name, serialNo, message, byref(stype), byref(subtype), byref(flags))
+            if status==vicons.VI_SUCCESS:
+                return {'name': name.value, 'serialNo': serialNo.value, 'message': message.value, 'type': stype.value, 'subtype': subtype.value, 'flags': flags.value}
+            else:
+                raise Exception('Failed to get sensor information. Error  code: {} : {}.'.format(status, ViErrors(status, library=self.library).getMessage()))
+        else:
+            raise self.notInSessionMsg()
+
+
+    def refreshSettings(self):
+        """
+        Read the sensor, and the limits and set values of average time, wavelength, attenuation and power range into the settings cache. The setters validate against the cache and skip writing a value equal to the last one written, instead of reading the limits from the meter every time.
+
+        It is called by open(), and again by the setters when they notice another sensor was plugged in (see sensorCheckInterval). Call it after changing settings on the front panel.
+
+        A setting the meter or sensor does not support (a read fails) is left out of the cache; its setter then writes without checking limits.
+
+        OUTPUT:
+        the settings cache, a dict of name --> dict of setValue, minValue, maxValue and written (the last value written by this object, or None).
+        """
+        if self.isInSession():
+            settings = dict()
+            settings['sensor'] = self._sensorKey()
+            for name, func in [('avgTime', self.library.GetAvgTime), ('wavelength', self.library.GetWavelength),
+                               ('attn', self.library.GetAttn), ('powerRange', self.library.GetPowerRange)]:
+                setting = dict()
+                for attr, key in enumerate(['setValue', 'minValue', 'maxValue']):
+                    value = enum.ViReal64()
+                    status = func(self.instrumentHandle, c_int16(attr), byref(value))
+                    if status!=vicons.VI_SUCCESS:
+                        self.verboseMessage('{} is not supported (error code {}). It is not cached.'.format(name, status))
+                        break
+                    setting[key] = value.value
+                else:
+                    setting['written'] = None
+                    settings[name] = setting
+            self._settings = settings
+            self._sensorChecked = perf_counter()
+            return settings
+        else:
+            raise self.notInSessionMsg()
+
+
+    def invalidateSettings(self):
+        """
+        Drop the settings cache. It is read again on the next set.
+        """
+        self._settings = None
+
+
+    def getCachedSetting(self, name):
+        """
+        Return the cached dict of a setting ('avgTime', 'wavelength', 'attn' or 'powerRange'), refreshing the cache if it is empty or the sensor changed. A setting left out of the cache (not supported, see refreshSettings) gets a new dict without limits, so it is written unchecked.
+        """
+        if self._settings is None:
+            self.refreshSettings()
+        elif self._sensorCheckInterval is not None and perf_counter()-self._sensorChecked>=self._sensorCheckInterval:
+            self._sensorChecked = perf_counter()
+            if self._sensorKey()!=self._settings['sensor']:
+                self.verboseMessage('Sensor changed. Refreshing settings...')
+                self.refreshSettings()
+        if name not in self._settings:
+            return {'setValue': None, 'minValue': float('-inf'), 'maxValue': float('inf'), 'written': None}
+        return self._settings[name]
+
+
+    def _sensorKey(self):
+        info = self.getSensorInfo()
+        return (info['name'], info['serialNo'])
+
+
     #######################################
     ## UTILITIES FUNCTION
     def verboseMessage(self, message):
@@ -589,11 +914,78 @@ class PowerMeter(object):
 
 
 
+class PowerReader(object):
+    """
+    A prepared reading path of an open PowerMeter. The measure function, the session handle and the output buffer are looked up once, so a reading is a single DLL call with no allocation and no session check. A failed call (e.g. after the session is closed) raises an exception from its status code.
+
+    The reader binds the call path at creation: create it after enabling instrumentation to have its calls recorded.
+
+    INPUTS:
+    meter -- an open PowerMeter.
+    """
+
+    __slots__ = ('_meter', '_measure', '_handle', '_power', '_pPower')
+
+    def __init__(self, meter):
+        if not meter.isInSession():
+            raise meter.notInSessionMsg()
+        measure = meter.library.MeasurePower
+        if isinstance(measure, LazyFunction):
+            measure = measure.target()
+        self._meter = meter
+        self._measure = measure
+        self._handle = meter.instrumentHandle
+        self._power = c_double(0.0)
+        self._pPower = byref(self._power)
+
+    @property
+    def meter(self):
+        return self._meter
+
+    def read(self):
+        """
+        Measure once and return the power as a float.
+        """
+        status = self._measure(self._handle, self._pPower)
+        if status<0:
+            self._raise(status)
+        return self._power.value
+
+    def readInto(self, out, n=None):
+        """
+        Fill out with n consecutive readings in one call.
+
+        INPUTS:
+        out -- a writable 1-D float64 buffer, e.g. numpy.empty(n) or array.array('d', ...).
+        n -- number of readings to take into out[0:n]. Default is len(out).
+        OUTPUT:
+        out
+        """
+        buf = memoryview(out)
+        if buf.readonly or buf.ndim!=1 or buf.format not in ('d', '<d', '=d'):
+            raise ValueError('out must be a writable 1-D float64 array.')
+        if n is None:
+            n = len(buf)
+        elif not 0<=n<=len(buf):
+            raise ValueError('n must be between 0 and len(out)={}.'.format(len(buf)))
+
+        measure, handle, power, pPower = self._measure, self._handle, self._power, self._pPower
+        for i in range(n):
+            status = measure(handle, pPower)
+            if status<0:
+                self._raise(status)
+            buf[i] = power.value
+        return out
+
+    def _raise(self, status):
+        raise Exception('Failed to measure power. Error code: {} : {}.'.format(status, ViErrors(status, library=self._meter.library).getMessage()))
+
+
 class ViErrors(object):
 
-    def __init__(self, err_code, instrumentHandle=0):
+    def __init__(self, err_code, instrumentHandle=0, library=None):
         self._err_code = err_code
-        self._library = K
+        self._library = library if library is not None else K
         self._instrumentHandle = instrumentHandle
 
     @property
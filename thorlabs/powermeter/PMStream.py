@@ -0,0 +1,47 @@
+import time
+
+from ...ctools.stream import SampleStream
+
+
+class PowerMeterStream(SampleStream):
+    """
+    Background acquisition of a PowerMeter. A dedicated thread measures the power continuously and writes (t, value) samples into a RingBuffer, where t is time.time() at the end of the reading. Memory is bounded by capacity samples however long the stream runs.
+
+    Consumers either look at the latest samples (latest(n), a zero-copy view), or iterate: iterBlocks() yields the new samples as arrays, and iterating the stream itself yields one (t, value) at a time. See ctools.stream.SampleStream.
+
+    While the stream runs, the thread owns the session: do not call other measurement functions of the meter from other threads.
+
+    INPUTS:
+    meter -- an open PowerMeter.
+    capacity -- number of samples kept.
+    interval -- minimum time between readings in seconds. 0 reads as fast as the meter allows.
+    """
+
+    def __init__(self, meter, capacity=100000, interval=0.0):
+        super().__init__(capacity, name='PowerMeterStream')
+        self._meter = meter
+        self._interval = interval
+
+    @property
+    def meter(self):
+        return self._meter
+
+    def _prepare(self):
+        return (self._meter.reader(),)
+
+    def _acquire(self, buffer, stop, reader):
+        read = reader.read
+        append = buffer.append
+        interval = self._interval
+        clock = time.time
+        next_t = clock()
+        while not stop.is_set():
+            value = read()
+            append((clock(), value))
+            if interval>0:
+                next_t += interval
+                wait = next_t - clock()
+                if wait>0:
+                    stop.wait(wait)
+                else:
+                    next_t = clock()
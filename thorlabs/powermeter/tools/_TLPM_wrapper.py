@@ -1,6 +1,5 @@
 from ctypes import (
     Structure,
-    cdll,
     c_bool,
     c_short,
     c_int,
@@ -24,15 +23,12 @@ c_word = c_ushort
 c_dword = c_ulong
 
 
-from ....locateDll import locateDll
+from ....ctools.tools import bind, LazyLibrary
 libname = "TLPM_64.dll"
 foldername = "IVI Foundation"
-dllpath  = locateDll(libname,  foldername)
-lib = cdll.LoadLibrary(dllpath.replace("\\","\\\\"))
+lib = LazyLibrary(libname, foldername)
 
 
-
-from ....ctools.tools import bind, null_function
 from ....ctools._visa_enum import *
 
 Init = bind(lib, "TLPM_init", [ViRsrc, ViBoolean, ViBoolean, ViPSession], ViStatus)
@@ -48,6 +44,9 @@ ErrorMessage = bind(lib, "TLPM_errorMessage", [ViSession, ViStatus, c_char_p], V
 SetTimeout = bind(lib, "TLPM_setTimeoutValue", [ViSession, ViUInt32], ViStatus)
 GetTimeout = bind(lib, "TLPM_getTimeoutValue", [ViSession, POINTER(ViUInt32)], ViStatus)
 
+# Utility --> Sensor
+GetSensorInfo = bind(lib, "TLPM_getSensorInfo", [ViSession, 256*ViChar, 256*ViChar, 256*ViChar, POINTER(ViInt16), POINTER(ViInt16), POINTER(ViInt16)], ViStatus)
+
 # Measure --> Configure --> Average
 SetAvgTime = bind(lib, "TLPM_setAvgTime", [ViSession, ViReal64], ViStatus)
 GetAvgTime = bind(lib, "TLPM_getAvgTime", [ViSession, ViInt16, POINTER(ViReal64)], ViStatus)
@@ -76,3 +75,8 @@ GetPowerUnit = bind(lib, "TLPM_getPowerUnit", [ViSession, POINTER(ViInt16)], ViS
 
 # Measure --> Read
 MeasurePower = bind(lib, "TLPM_measPower", [ViSession, POINTER(ViReal64)], ViStatus)
+
+# Measure --> Read --> Measurement sequence (array mode, e.g. PM103, PM5020). Arrays hold 100*baseTime samples.
+ConfPowerMeasurementSequence = bind(lib, "TLPM_confPowerMeasurementSequence", [ViSession, ViUInt32], ViStatus)
+StartMeasurementSequence = bind(lib, "TLPM_startMeasurementSequence", [ViSession, ViUInt32, POINTER(ViBoolean)], ViStatus)
+GetMeasurementSequence = bind(lib, "TLPM_getMeasurementSequence", [ViSession, ViUInt32, POINTER(ViReal32), POINTER(ViReal32), POINTER(ViReal32)], ViStatus)
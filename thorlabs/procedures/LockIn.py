@@ -0,0 +1,194 @@
+import threading
+import time
+import numpy as np
+
+from ...ctools.tools import quiet
+from ...ctools.worker import Worker
+
+
+class ShutterLockIn(Worker):
+    """
+    Software lock-in with a shutter: the shutter is opened and closed on a fixed schedule while a power stream runs, every sample is tagged with the shutter state at its time stamp, and the difference of the mean power with the shutter open and closed is taken for every cycle. The signal is the mean of these differences and the noise its standard error, both updated after each cycle.
+
+    A scheduler thread switches the shutter at precise perf_counter deadlines (a timed wait, then a short spin) and keeps the phase if it falls behind. The shutter's messages are turned off while it runs; run() prints one summary instead. Samples within settle seconds after a switch, while the solenoid and the sensor respond, are discarded.
+
+    INPUTS:
+    stream -- a started sample stream of the power, e.g. PowerMeter.stream() or OphirPM.stream().
+    shutter -- an open KCubeSolenoid.Motor in manual mode.
+    period -- seconds of one open + closed cycle.
+    settle -- seconds discarded after each switch.
+    onCycle -- called with the results dict (see results()) after each completed cycle, on the lock-in thread.
+    """
+
+    def __init__(self, stream, shutter, period=0.2, settle=0.02, onCycle=None):
+        if not 0<=settle<period/2.0:
+            raise ValueError('settle must be between 0 and half the period.')
+        super().__init__('ShutterLockIn')
+        self._stream = stream
+        self._shutter = shutter
+        self._period = period
+        self._settle = settle
+        self.onCycle = onCycle
+
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._switches = []      # (time.time() of the switch, True if opened)
+        self._halves = []        # (open, mean, count) of every completed half period
+        self._cycles = []        # open - closed of every completed cycle
+        self._discarded = 0
+        self._pendingT = np.zeros(0)
+        self._pendingV = np.zeros(0)
+
+    @property
+    def period(self):
+        return self._period
+
+    @property
+    def settle(self):
+        return self._settle
+
+    @property
+    def switches(self):
+        """
+        The list of (time.time(), opened) of the shutter switches so far.
+        """
+        with self._lock:
+            return list(self._switches)
+
+    #########################################
+
+    def _prepare(self):
+        self._reset()
+        return ()
+
+    def _loops(self):
+        return [('ShutterLockInScheduler', self._schedule), ('ShutterLockIn', self._demodulate)]
+
+    def run(self, nCycles=None, duration=None, noise=None):
+        """
+        Run until nCycles cycles are done, duration seconds passed, or the noise is at most noise, whichever comes first. At least one of them must be given. Return the results (see results()).
+        """
+        if nCycles is None and duration is None and noise is None:
+            raise ValueError('Give nCycles, duration or noise.')
+        deadline = None if duration is None else time.perf_counter() + duration
+        self.start()
+        try:
+            while self.isRunning():
+                result = self.results()
+                if nCycles is not None and result['nCycles']>=nCycles:
+                    break
+                if noise is not None and result['nCycles']>=2 and result['noise']<=noise:
+                    break
+                if deadline is not None and time.perf_counter()>=deadline:
+                    break
+                self._stop.wait(self._period/4.0)
+        finally:
+            self.stop()
+        if self._error is not None:
+            raise self._error
+        result = self.results()
+        self._shutter.verboseMessage('Lock-in done: {} switches, {} cycles.'.format(len(self.switches), result['nCycles']))
+        return result
+
+    def results(self):
+        """
+        OUTPUT:
+        a dict of
+        signal -- mean of (open - closed) over the completed cycles.
+        noise -- standard error of signal.
+        nCycles -- number of completed cycles.
+        cycles -- an array of (open - closed) of each cycle.
+        open, closed -- mean power with the shutter open and closed.
+        discarded -- number of samples dropped as transitional.
+        """
+        with self._lock:
+            cycles = np.array(self._cycles)
+            halves = list(self._halves)
+            discarded = self._discarded
+        n = len(cycles)
+        opened = [mean for isOpen, mean, count in halves if isOpen and count>0]
+        closed = [mean for isOpen, mean, count in halves if not isOpen and count>0]
+        return {'signal': float(cycles.mean()) if n>0 else None,
+                'noise': float(cycles.std(ddof=1)/np.sqrt(n)) if n>1 else None,
+                'nCycles': n, 'cycles': cycles,
+                'open': float(np.mean(opened)) if opened else None,
+                'closed': float(np.mean(closed)) if closed else None,
+                'discarded': discarded}
+
+    #########################################
+    # Scheduler thread
+
+    def _schedule(self):
+        clock = time.perf_counter
+        half = self._period/2.0
+        t0 = clock() + 0.01
+        k = 0
+        with quiet(self._shutter):
+            try:
+                while True:
+                    deadline = t0 + k*half
+                    remaining = deadline - clock()
+                    if remaining>0.002 and self._stop.wait(remaining - 0.002):
+                        break
+                    while clock()<deadline:
+                        pass
+                    if self._stop.is_set():
+                        break
+                    isOpen = k%2==0
+                    before = time.time()
+                    self._shutter.setOperatingState('Active' if isOpen else 'Inactive')
+                    with self._lock:
+                        self._switches.append(((before + time.time())/2.0, isOpen))
+                    # keep the phase if a switch ran late
+                    k = max(k + 1, int((clock() - t0)/half) + 1)
+            finally:
+                try:
+                    self._shutter.setOperatingState('Inactive')
+                except Exception:
+                    pass
+
+    #########################################
+    # Demodulation thread
+
+    def _demodulate(self):
+        for block in self._stream.iterBlocks(timeout=self._period/4.0, copy=True):
+            if len(block)>0:
+                self._pendingT = np.concatenate((self._pendingT, block['t']))
+                self._pendingV = np.concatenate((self._pendingV, block['value']))
+            self._process()
+            if self._stop.is_set():
+                return
+
+    def _process(self):
+        """
+        Close the half periods whose end switch is known and whose samples have all arrived.
+        """
+        with self._lock:
+            switches = list(self._switches)
+        done = len(self._halves)
+        completed = False
+        # half period i runs from switch i to switch i+1
+        while done+1<len(switches):
+            start, isOpen = switches[done]
+            end = switches[done+1][0]
+            if len(self._pendingT)==0 or self._pendingT[-1]<end:
+                break  # samples of this half period may still be coming
+            t, v = self._pendingT, self._pendingV
+            inHalf = (t>=start) & (t<end)
+            keep = inHalf & (t>=start+self._settle)
+            count = int(keep.sum())
+            mean = float(v[keep].mean()) if count>0 else float('nan')
+            rest = t>=end
+            with self._lock:
+                self._discarded += int((~rest).sum()) - count
+                self._halves.append((isOpen, mean, count))
+                # a cycle is an open half followed by a closed half
+                if not isOpen and done>=1 and self._halves[-2][0] and count>0 and self._halves[-2][2]>0:
+                    self._cycles.append(self._halves[-2][1] - mean)
+                    completed = True
+            self._pendingT, self._pendingV = t[rest], v[rest]
+            done += 1
+        if completed and self.onCycle is not None:
+            self.onCycle(self.results())
@@ -0,0 +1,203 @@
+import math
+import time
+import numpy as np
+
+from ...ctools.ringbuffer import RingBuffer
+from ...ctools.stream import SAMPLE
+from ...ctools.tools import quiet
+from ...ctools.worker import Worker
+
+
+class MalusModel(object):
+    """
+    Transmitted power through a rotating half-wave plate and a fixed polarizer:
+        P(angle) = offset + amplitude*sin^2(2*(angle - angle0))
+    with angles in degrees. P rises from offset to offset + amplitude between angle0 and angle0 + 45; angle() inverts the model on that branch.
+
+    INPUTS:
+    amplitude -- modulation depth in watts.
+    angle0 -- plate angle of minimum transmission in degrees.
+    offset -- power at minimum transmission in watts.
+    """
+
+    def __init__(self, amplitude, angle0=0.0, offset=0.0):
+        self.amplitude = amplitude
+        self.angle0 = angle0
+        self.offset = offset
+
+    @property
+    def range(self):
+        """
+        (min, max) power the model can reach.
+        """
+        return (self.offset, self.offset + self.amplitude)
+
+    def power(self, angle):
+        return self.offset + self.amplitude*np.sin(np.radians(2*(np.asarray(angle) - self.angle0)))**2
+
+    def angle(self, power):
+        """
+        Return the plate angle in degrees, between angle0 and angle0 + 45, that gives power (clipped to the range).
+        """
+        x = (power - self.offset)/self.amplitude
+        x = min(max(x, 0.0), 1.0)
+        return self.angle0 + math.degrees(math.asin(math.sqrt(x)))/2.0
+
+    @classmethod
+    def fit(cls, angles, powers):
+        """
+        Return the MalusModel that fits powers measured at angles (degrees), by linear least squares on P = a + b*cos(4*angle) + c*sin(4*angle).
+        """
+        th = np.radians(4*np.asarray(angles, dtype=np.float64))
+        A = np.column_stack((np.ones_like(th), np.cos(th), np.sin(th)))
+        (a, b, c), *rest = np.linalg.lstsq(A, np.asarray(powers, dtype=np.float64), rcond=None)
+        amplitude = 2*math.hypot(b, c)
+        angle0 = math.degrees(math.atan2(-c, -b))/4.0
+        return cls(amplitude, angle0 % 90.0, a - amplitude/2.0)
+
+    def __repr__(self):
+        return '<MalusModel amplitude={:.4g} W angle0={:.3f} deg offset={:.4g} W>'.format(self.amplitude, self.angle0, self.offset)
+
+
+class PowerStabilizer(Worker):
+    """
+    Holds the power measured by a power meter at a setpoint by rotating a half-wave plate on a KCube rotator.
+
+    The controller works on power: a PID on the error gives a correction u (watts), and the feedforward model turns setpoint + u into a plate angle (see MalusModel), so the loop gain does not depend on where on the sin^2 curve it runs. When setpoint + u is outside the range of the model the integrator stops integrating in that direction (anti-windup). Moves are sent without waiting for the motor (wait=False) and without messages (verbose=False), and only when the angle changed by at least deadband, so the loop runs at the rate of the readings.
+
+    INPUTS:
+    meter -- an open PowerMeter.
+    rotator -- an open KCubeDCServo.Rotator (or Motor) turning the plate.
+    setpoint -- power to hold in watts.
+    model -- a MalusModel of the setup, e.g. from calibrate().
+    kp -- proportional gain (W/W).
+    ki -- integral gain (1/s).
+    kd -- derivative gain (s).
+    nAvg -- readings averaged per loop iteration.
+    deadband -- smallest angle change in degrees that is sent to the motor.
+    history -- number of (t, power) samples kept in the history.
+    """
+
+    def __init__(self, meter, rotator, setpoint, model, kp=0.5, ki=20.0, kd=0.0, nAvg=1, deadband=0.005, history=100000):
+        super().__init__('PowerStabilizer')
+        self._meter = meter
+        self._rotator = rotator
+        self.setpoint = setpoint
+        self.model = model
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.nAvg = int(nAvg)
+        self.deadband = deadband
+        self._history = RingBuffer(history, dtype=SAMPLE)
+
+        self._iterations = 0
+        self._moves = 0
+        self._elapsed = 0.0
+        self._integral = 0.0
+
+    @property
+    def history(self):
+        """
+        The RingBuffer of the (t, power) of every loop iteration.
+        """
+        return self._history
+
+    #########################################
+
+    def calibrate(self, angles=None, settle=0.0):
+        """
+        Move the plate to each angle, measure, and fit the feedforward model. The plate is left at the angle of the setpoint. The rotator's messages are off meanwhile.
+
+        INPUTS:
+        angles -- angles in degrees. Default is every 5 degrees over 90 degrees.
+        settle -- seconds to wait after each move before measuring.
+        OUTPUT:
+        the fitted MalusModel, also stored in model.
+        """
+        if angles is None:
+            angles = np.arange(0.0, 90.0, 5.0)
+        with quiet(self._rotator, wait=True):
+            powers = []
+            for angle in angles:
+                self._rotator.moveToPosition(angle)
+                if settle>0:
+                    time.sleep(settle)
+                powers.append(np.mean([self._meter.measure() for i in range(self.nAvg)]))
+            self.model = MalusModel.fit(angles, powers)
+            self._rotator.moveToPosition(self.model.angle(self.setpoint))
+        return self.model
+
+    def _prepare(self):
+        return (self._meter.reader(),)
+
+    def run(self, duration):
+        """
+        Stabilize for duration seconds. Return the results (see results()).
+        """
+        self.start()
+        try:
+            self._stop.wait(duration)
+        finally:
+            self.stop()
+        if self._error is not None:
+            raise self._error
+        return self.results()
+
+    def _loop(self, reader):
+        clock = time.perf_counter
+        readings = np.empty(self.nAvg)
+        lo, hi = self.model.range
+        angle = self.model.angle(self.setpoint)
+        self._integral = 0.0
+        self._iterations = 0
+        self._moves = 0
+        lastError = None
+        with quiet(self._rotator, wait=False):
+            self._rotator.moveToPosition(angle)
+            t0 = last = clock()
+            while not self._stop.is_set():
+                reader.readInto(readings)
+                power = readings.mean()
+                now = clock()
+                dt = now - last
+                last = now
+                self._history.append((time.time(), power))
+
+                e = self.setpoint - power
+                integral = self._integral + self.ki*e*dt
+                derivative = 0.0 if lastError is None or dt<=0 else self.kd*(e - lastError)/dt
+                lastError = e
+                target = self.setpoint + self.kp*e + integral + derivative
+                clipped = min(max(target, lo), hi)
+                # anti-windup: do not integrate further into saturation
+                if clipped==target or (e>0)!=(target>clipped):
+                    self._integral = integral
+
+                newAngle = self.model.angle(clipped)
+                if abs(newAngle - angle)>=self.deadband:
+                    self._rotator.moveToPosition(newAngle)
+                    angle = newAngle
+                    self._moves += 1
+                self._iterations += 1
+                self._elapsed = now - t0
+
+    def results(self, settleTime=0.0):
+        """
+        INPUTS:
+        settleTime -- seconds at the start of the run left out of the error statistics.
+        OUTPUT:
+        a dict of rate (loop iterations per second), iterations, moves (move commands sent), meanError and rmsError (setpoint - power, in watts), relativeRmsError (rmsError/setpoint), and the t and power arrays of the history.
+        """
+        samples = self._history.latest().copy()
+        t, power = samples['t'], samples['value']
+        if len(t)>0 and settleTime>0:
+            keep = t>=t[0]+settleTime
+            t, power = t[keep], power[keep]
+        err = self.setpoint - power
+        rms = float(np.sqrt(np.mean(err**2))) if len(err)>0 else None
+        return {'rate': self._iterations/self._elapsed if self._elapsed>0 else None,
+                'iterations': self._iterations, 'moves': self._moves,
+                'meanError': float(err.mean()) if len(err)>0 else None,
+                'rmsError': rms, 'relativeRmsError': rms/self.setpoint if rms is not None else None,
+                't': t, 'power': power}
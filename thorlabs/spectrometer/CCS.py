@@ -6,12 +6,26 @@ import ctypes
 from ...ctools import _visa_enum as enum
 from .tools import _TLCCS_wrapper as K
 from ..templates.VisaObject import VisaObject
+from ...spectral.stats import SpectrumStats
 from visa import constants as vicons
-from time import sleep
+from time import sleep, perf_counter
 import numpy as np
 
 SCANNING = 1
 PIX_NUM = 3648
+# scan data are normalized to the full scale of the ADC
+SATURATION = 1.0
+
+# device status bits, see GetDeviceStatus
+STATUS_SCAN_IDLE = 0x0002
+STATUS_SCAN_TRIGGERED = 0x0004
+STATUS_SCAN_START_TRANS = 0x0008
+STATUS_SCAN_TRANSFER = 0x0010
+STATUS_WAIT_FOR_EXT_TRIG = 0x0080
+
+# seconds between device status polls while waiting for a scan, growing from POLL_MIN to POLL_MAX
+POLL_MIN = 0.0002
+POLL_MAX = 0.005
 
 class CCS(VisaObject):
 
@@ -21,6 +35,12 @@ class CCS(VisaObject):
 		self.integrationTime = 0.01
 		self.averageNumber = 5
 		self.pixel_num = PIX_NUM
+		self._continuous = False
+		self._expectedReady = 0.0
+		# continuous scanning: time the last scan found by polling was ready, and the estimated frame period
+		self._lastReady = None
+		self._framePeriod = None
+		self._wavelengths = dict()
 	
 
 	@property
@@ -64,6 +84,7 @@ class CCS(VisaObject):
 			self.verboseMessage('Done establishing session.')
 			self.instrumentHandle = instrumentHandle
 			self.idQuery = idquery
+			self.invalidateWavelength()
 			self.resetDevice = resetDevice
 			self.setIntegrationTime(self.integrationTime)
 		else:
@@ -80,9 +101,10 @@ class CCS(VisaObject):
 				self.idQuery = None
 				self.resetDevice = None
 				self.instrumentHandle = None
+				self.invalidateWavelength()
 
 	def getStatus(self):
-		if self.isInSession:
+		if self.isInSession():
 			dstatus = ctypes.c_int32()
 			status = self.library.GetDeviceStatus(self.instrumentHandle, byref(dstatus))
 			if status == vicons.VI_SUCCESS:
@@ -90,28 +112,140 @@ class CCS(VisaObject):
 		else:
 			raise self.notInSessionMsg()
 
-	def sweep(self, avgN=1, waitTime=0):
+	@property
+	def isContinuous(self):
+		return self._continuous
+
+	def startScan(self):
 		"""
-		avgN -- a number of averaging
-		waitTime -- time in second to wait before the next sweep
+		Start a single scan. Read it with readScan().
 		"""
-		if self.isInSession:
-			self.verboseMessage('Sweeping {} time(s)...'.format(avgN))
-			datas = np.zeros((avgN, 3648), dtype=np.float)
-			for i in range(avgN):
-				status = self.library.StartScan(self.instrumentHandle)
-				sleep(0.1)
+		if self.isInSession():
+			status = self.library.StartScan(self.instrumentHandle)
+			if status!=vicons.VI_SUCCESS:
+				raise Exception('Failed to start scan. Error code: {}.'.format(status))
+			self._continuous = False
+			self._expectedReady = perf_counter() + self.integrationTime
+		else:
+			raise self.notInSessionMsg()
+
+	def startContinuous(self):
+		"""
+		Start scanning continuously: the CCD integrates the next scan while the previous one is read, so readScan() can be called back-to-back at the rate of the integration time. If a scan is not read in time, it is overwritten by the next one.
+
+		The device stops scanning continuously at any call other than reading scan data or the device status, e.g. setIntegrationTime(), startScan() or stopContinuous().
+		"""
+		if self.isInSession():
+			status = self.library.StartScanCont(self.instrumentHandle)
+			if status!=vicons.VI_SUCCESS:
+				raise Exception('Failed to start continuous scan. Error code: {}.'.format(status))
+			self._continuous = True
+			self._expectedReady = perf_counter() + self.integrationTime
+			self._lastReady = None
+			self._framePeriod = None
+		else:
+			raise self.notInSessionMsg()
+
+	def stopContinuous(self):
+		"""
+		Stop scanning continuously. The driver has no dedicated call for it, so this reads the integration time, which stops the scanning as any other command would.
+		"""
+		if self._continuous:
+			self.getIntegrationTime()
+
+	def waitScan(self, timeout=None):
+		"""
+		Wait until a started scan is ready to be read (the transfer bit of the device status is set). The status is first read when the scan is expected to be done, one integration time after it started (one frame period after the previous scan when scanning continuously), and then polled at intervals growing from POLL_MIN to POLL_MAX. Return the status bits.
+
+		timeout -- seconds to wait. None waits forever.
+		"""
+		(bits, polled) = self._waitReady(timeout)
+		return bits
 
-				while self.getStatus==1: #still scanning
-					sleep(0.1)
+	def _waitReady(self, timeout):
+		"""
+		Return (status bits, polled): polled is True if the scan was not ready yet at the first status read.
+		"""
+		start = perf_counter()
+		expected = self._expectedReady - start
+		if expected>0:
+			sleep(expected)
+		interval = POLL_MIN
+		polled = False
+		while True:
+			bits = self._statusBits()
+			if bits & STATUS_SCAN_TRANSFER:
+				return (bits, polled)
+			if timeout is not None and perf_counter()-start>timeout:
+				raise Exception('Scan was not ready within {} s. Device status: {:#x}.'.format(timeout, bits))
+			polled = True
+			sleep(interval)
+			interval = min(2*interval, POLL_MAX)
 
-				data = (ctypes.c_double*3648)()
-				status = self.library.GetScanData(self.instrumentHandle, data)
-				datas[i] = np.ctypeslib.as_array(data)
+	def readScan(self, out=None, timeout=None):
+		"""
+		Wait for the started scan (see waitScan) and read it. Return the scan data as a numpy array of PIX_NUM.
 
-				if waitTime>0:
-					sleep(waitTime)
+		INPUTS:
+		out -- a C-contiguous float64 numpy array of PIX_NUM to read the data into. If None, a new array is returned.
+		timeout -- seconds to wait for the scan. None waits forever.
+		"""
+		if self.isInSession():
+			if out is None:
+				out = np.empty(PIX_NUM, dtype=np.float64)
+			(bits, polled) = self._waitReady(timeout)
+			ready = perf_counter()
+			status = self.library.GetScanData(self.instrumentHandle, out.ctypes.data_as(ctypes.POINTER(ctypes.c_double)))
+			if status!=vicons.VI_SUCCESS:
+				raise Exception('Failed to get scan data. Error code: {}.'.format(status))
+			if self._continuous:
+				self._nextReady(ready, polled)
+			return out
+		else:
+			raise self.notInSessionMsg()
+
+	def _nextReady(self, ready, polled):
+		"""
+		Set when the next scan of continuous scanning is expected, re-anchored on the time this one was found ready, so the expectation does not drift from the device.
 
+		The frame period is the integration time plus any readout the device does not overlap, so it is measured. Only the time between two scans that were both found by polling (not ready at the first status read) is exact; a scan ready at the first read may have waited, so the period is shortened by POLL_MIN instead, until the scans are found early again.
+		"""
+		if self._framePeriod is None:
+			self._framePeriod = self.integrationTime
+		if polled:
+			if self._lastReady is not None:
+				self._framePeriod += 0.25*(ready - self._lastReady - self._framePeriod)
+			self._lastReady = ready
+		else:
+			# may go below the integration time: the sleep itself overshoots
+			self._framePeriod = max(self._framePeriod - POLL_MIN, 0.5*self.integrationTime)
+			self._lastReady = None
+		self._expectedReady = ready + self._framePeriod
+
+	def sweep(self, avgN=1, waitTime=0, continuous=False, timeout=None):
+		"""
+		avgN -- a number of averaging
+		waitTime -- time in second to wait before the next sweep
+		continuous -- if True, scan continuously (see startContinuous) while the avgN scans are read, instead of starting each scan. This reaches the scan rate of the integration time.
+		timeout -- seconds to wait for each scan. None waits forever.
+		"""
+		if self.isInSession():
+			self.verboseMessage('Sweeping {} time(s)...'.format(avgN))
+			datas = np.empty((avgN, PIX_NUM), dtype=np.float64)
+			running = self._continuous
+			if continuous and not running:
+				self.startContinuous()
+			try:
+				for i in range(avgN):
+					if not self._continuous:
+						self.startScan()
+					self.readScan(datas[i], timeout)
+
+					if waitTime>0:
+						sleep(waitTime)
+			finally:
+				if continuous and not running:
+					self.stopContinuous()
 			wl = self.getWavelength()
 
 			self.verboseMessage('Done sweeping {} time(s).'.format(avgN))
@@ -119,25 +253,170 @@ class CCS(VisaObject):
 		else:
 			raise self.notInSessionMsg()
 
-	def sweepAvg(self):
-		if self.isInSession:
-			(datas, wl) = self.sweep(self.averageNumber, waitTime=0)
-			return (np.mean(datas, axis=0), wl)
+	def stream(self, capacity=1000, continuous=True, start=True):
+		"""
+		Return a CCSStream that scans continuously on a background thread into a preallocated ring buffer of spectra. See CCSStream.
+
+		INPUTS:
+		capacity -- number of spectra kept.
+		continuous -- scan continuously (see startContinuous). With False, each scan is started after the previous one is read.
+		start -- start the acquisition thread now.
+		"""
+		if self.isInSession():
+			from .CCSStream import CCSStream
+			stream = CCSStream(self, capacity, continuous)
+			if start:
+				stream.start()
+			return stream
+		else:
+			raise self.notInSessionMsg()
+
+	async def sweepAsync(self, avgN=1, timeout=None):
+		"""
+		Awaitable sweep(). Each scan is started in the thread pool of ctools.aio and its completion is awaited by polling the device status for the data-ready bit without blocking the event loop.
+
+		avgN -- a number of scans
+		timeout -- seconds to wait for each scan. None waits forever.
+		"""
+		if self.isInSession():
+			from ...ctools import aio
+			async with aio.lockOf(self):
+				self.verboseMessage('Sweeping {} time(s)...'.format(avgN))
+				datas = np.zeros((avgN, PIX_NUM), dtype=np.float64)
+				interval = max(self.integrationTime/4.0, 0.001)
+				for i in range(avgN):
+					status = await aio.runBlocking(self.library.StartScan, self.instrumentHandle)
+					if status!=vicons.VI_SUCCESS:
+						raise Exception('Failed to start scan. Error code: {}.'.format(status))
+					self._continuous = False
+					await aio.pollUntil(lambda: self._statusBits() & STATUS_SCAN_TRANSFER, interval=interval, maxInterval=max(interval, 0.05), timeout=timeout)
+					data = (ctypes.c_double*PIX_NUM)()
+					await aio.runBlocking(self.library.GetScanData, self.instrumentHandle, data)
+					datas[i] = np.ctypeslib.as_array(data)
+				wl = await aio.runBlocking(self.getWavelength)
+				self.verboseMessage('Done sweeping {} time(s).'.format(avgN))
+				return (datas, wl)
+		else:
+			raise self.notInSessionMsg()
+
+	def _statusBits(self):
+		dstatus = ctypes.c_int32()
+		status = self.library.GetDeviceStatus(self.instrumentHandle, byref(dstatus))
+		if status!=vicons.VI_SUCCESS:
+			raise Exception('Failed to get device status. Error code: {}.'.format(status))
+		return dstatus.value
+
+	def sweepAvg(self, avgN=None, targetStderr=None, pixels=None, continuous=False, timeout=None):
+		"""
+		Return (mean spectrum, wavelength) of avgN scans. See sweepStats. Unlike sweepStats, each scan is started on its own by default, as sweepAvg always did; pass continuous=True to scan continuously.
+		"""
+		(stats, wl) = self.sweepStats(avgN, targetStderr, pixels, continuous, timeout)
+		return (stats.mean, wl)
+
+	def sweepStats(self, avgN=None, targetStderr=None, pixels=None, continuous=True, timeout=None):
+		"""
+		Scan and fold every scan into running per-pixel statistics (mean, variance, min, max, saturated count) as it is read, so memory does not grow with the number of scans. Return (stats, wavelength) where stats is a spectral.stats.SpectrumStats.
+
+		INPUTS:
+		avgN -- the number of scans, or the maximum number if targetStderr is given. Default is averageNumber.
+		targetStderr -- stop early once the standard error of the mean of every pixel is at most this. None always takes avgN scans.
+		pixels -- a slice, index array or boolean mask of the pixels targetStderr applies to. None checks all.
+		continuous -- scan continuously (see startContinuous) instead of starting each scan.
+		timeout -- seconds to wait for each scan. None waits forever.
+		"""
+		if self.isInSession():
+			if avgN is None:
+				avgN = self.averageNumber
+			self.verboseMessage('Averaging up to {} scan(s)...'.format(avgN))
+			stats = SpectrumStats(PIX_NUM, SATURATION)
+			scan = np.empty(PIX_NUM, dtype=np.float64)
+			running = self._continuous
+			if continuous and not running:
+				self.startContinuous()
+			try:
+				for i in range(avgN):
+					if not self._continuous:
+						self.startScan()
+					stats.add(self.readScan(scan, timeout))
+					if targetStderr is not None and stats.isConverged(targetStderr, pixels):
+						break
+			finally:
+				if continuous and not running:
+					self.stopContinuous()
+			wl = self.getWavelength()
+			self.verboseMessage('Done averaging {} scan(s).'.format(stats.count))
+			return (stats, wl)
 		else:
 			raise self.notInSessionMsg()
 
 	def getWavelength(self, dataset=0):
-		assert dataset == 0 or data==1, 'Accept only 0 (factory setting) or 1 (user defined).'
-		if self.isInSession:
-			data = (ctypes.c_double*3648)()
+		"""
+		Return the wavelength in nm of each pixel as a read-only numpy array of PIX_NUM.
+
+		The calibration is read from the device once per session and cached; only setWavelengthData() (or invalidateWavelength()) makes it read again.
+
+		dataset -- 0 for the factory calibration, 1 for the user-defined one.
+		"""
+		return self._wavelengthData(dataset)[0]
+
+	def getWavelengthRange(self, dataset=0):
+		"""
+		Return (min, max) wavelength in nm of the calibration dataset (see getWavelength).
+		"""
+		(_, minWL, maxWL) = self._wavelengthData(dataset)
+		return (minWL, maxWL)
+
+	def _wavelengthData(self, dataset):
+		assert dataset == 0 or dataset==1, 'Accept only 0 (factory setting) or 1 (user defined).'
+		cached = self._wavelengths.get(dataset)
+		if cached is not None:
+			return cached
+		if self.isInSession():
+			data = np.empty(PIX_NUM, dtype=np.float64)
 			minWL = ctypes.c_double()
 			maxWL = ctypes.c_double()
-			status = self.library.GetWavelengthData(self.instrumentHandle, ctypes.c_int16(dataset), data, byref(minWL), byref(maxWL))
+			status = self.library.GetWavelengthData(self.instrumentHandle, ctypes.c_int16(dataset), data.ctypes.data_as(ctypes.POINTER(ctypes.c_double)), byref(minWL), byref(maxWL))
+			self._continuous = False
 			if status == vicons.VI_SUCCESS:
-				return np.ctypeslib.as_array(data)
+				data.flags.writeable = False
+				cached = (data, minWL.value, maxWL.value)
+				self._wavelengths[dataset] = cached
+				return cached
+			else:
+				raise Exception('Failed to get wavelength data. Error code: {}.'.format(status))
+		else:
+			raise self.notInSessionMsg()
+
+	def setWavelengthData(self, pixels, wavelengths):
+		"""
+		Write the user-defined wavelength calibration (dataset 1). The device fits a polynomial through the supporting points.
+
+		INPUTS:
+		pixels -- pixel indices of the supporting points, in ascending order. At least 4.
+		wavelengths -- wavelengths in nm of the supporting points.
+		"""
+		pixels = np.ascontiguousarray(pixels, dtype=np.int32)
+		wavelengths = np.ascontiguousarray(wavelengths, dtype=np.float64)
+		assert len(pixels)==len(wavelengths), 'pixels and wavelengths must have the same length.'
+		if self.isInSession():
+			self.verboseMessage('Setting wavelength data...')
+			status = self.library.SetWavelengthData(self.instrumentHandle, pixels.ctypes.data_as(ctypes.POINTER(enum.ViInt32)),
+				wavelengths.ctypes.data_as(ctypes.POINTER(ctypes.c_double)), enum.ViInt32(len(pixels)))
+			self._continuous = False
+			self.invalidateWavelength()
+			if status==vicons.VI_SUCCESS:
+				self.verboseMessage('Done setting wavelength data.')
+			else:
+				raise Exception('Failed to set wavelength data. Error code: {}.'.format(status))
 		else:
 			raise self.notInSessionMsg()
 
+	def invalidateWavelength(self):
+		"""
+		Drop the cached wavelength calibration so it is read from the device again.
+		"""
+		self._wavelengths = dict()
+
 	def getIntegrationTime(self):
 		"""
 		Return integration time in seconds.
@@ -145,6 +424,7 @@ class CCS(VisaObject):
 		if self.isInSession:
 			time = ctypes.c_double()
 			status = self.library.GetIntegrationTime(self.instrumentHandle, byref(time))
+			self._continuous = False
 			if status==vicons.VI_SUCCESS:
 				self.integrationTime = time.value
 				return time.value
@@ -161,6 +441,7 @@ class CCS(VisaObject):
 		if self.isInSession:
 			self.verboseMessage('Setting integration time...')
 			status = self.library.SetIntegrationTime(self.instrumentHandle, ctypes.c_double(sec))
+			self._continuous = False
 			if status==vicons.VI_SUCCESS:
 				self.verboseMessage('Done setting integration time.')
 				self.integrationTime = sec
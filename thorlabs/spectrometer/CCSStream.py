@@ -0,0 +1,124 @@
+import time
+import numpy as np
+
+from ...ctools.ringbuffer import RingBuffer
+from ...ctools.stream import SampleStream
+from .CCS import PIX_NUM
+
+
+class CCSStream(SampleStream):
+    """
+    Background acquisition of a CCS spectrometer. A dedicated thread keeps the spectrometer scanning and reads each scan straight into the next slot of a preallocated (capacity x PIX_NUM) ring buffer: no memory is allocated per spectrum, and memory is bounded however long the stream runs. The time.time() at which each scan is read is kept in a parallel ring buffer.
+
+    Consumers get views, not copies: latest(n) returns (t, spectra) of the latest n scans, iterBlocks() yields the scans acquired since the previous block, and iterating the stream yields one (t, spectrum) at a time. A view is overwritten once the thread has gone round the buffer, so copy what must be kept longer than capacity scans.
+
+    While the stream runs, the thread owns the session: do not call other functions of the spectrometer from other threads.
+
+    INPUTS:
+    ccs -- an open CCS.
+    capacity -- number of spectra kept.
+    continuous -- scan continuously (see CCS.startContinuous) to reach the scan rate of the integration time. With False, each scan is started after the previous one is read.
+    timeout -- seconds to wait for each scan. None waits 1 s plus ten integration times.
+    """
+
+    def __init__(self, ccs, capacity=1000, continuous=True, timeout=None):
+        # one spare slot: the scan being read into slot() is never among the latest capacity scans.
+        # The times run one scan ahead of the spectra (appended before the commit), so they get one more.
+        super().__init__(capacity+1, name='CCSStream', shape=(PIX_NUM,), dtype=np.float64)
+        self._times = RingBuffer(capacity+2)
+        self._capacity = capacity
+        self._ccs = ccs
+        self._continuous = continuous
+        self._timeout = timeout
+        self._wavelength = None
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def ccs(self):
+        return self._ccs
+
+    @property
+    def wavelength(self):
+        """
+        The wavelength in nm of each pixel (read-only), read when the stream starts.
+        """
+        return self._wavelength
+
+    def _prepare(self):
+        if not self._ccs.isInSession():
+            raise self._ccs.notInSessionMsg()
+        # read before scanning: reading the calibration stops continuous scanning
+        self._wavelength = self._ccs.getWavelength()
+        timeout = self._timeout
+        if timeout is None:
+            timeout = 1.0 + 10*self._ccs.integrationTime
+        return (timeout,)
+
+    def _acquire(self, buffer, stop, timeout):
+        ccs = self._ccs
+        readScan = ccs.readScan
+        times = self._times
+        clock = time.time
+        if self._continuous:
+            ccs.startContinuous()
+        try:
+            while not stop.is_set():
+                if not self._continuous:
+                    ccs.startScan()
+                readScan(buffer.slot(), timeout)
+                # timestamp first, so it is there for every published spectrum
+                times.append(clock())
+                buffer.commit()
+        finally:
+            ccs.stopContinuous()
+
+    #########################################
+    # Consumers
+
+    def latest(self, n=None):
+        """
+        Return (t, spectra): views of the read times (n,) and the spectra (n, PIX_NUM) of the latest n scans, oldest first. Default is all the scans held.
+        """
+        count = self._buffer.count
+        held = min(count, self._capacity)
+        n = held if n is None else min(int(n), held)
+        return self._times.view(count-n, count), self._buffer.view(count-n, count)
+
+    def iterBlocks(self, timeout=1.0, copy=True):
+        """
+        Yield (t, spectra) of the scans acquired since the previous block, starting with the scans acquired after the call. Ends when the stream stops; raises the acquisition error if the thread failed.
+
+        INPUTS:
+        timeout -- seconds to wait for new scans before yielding an empty block, so a GUI loop can keep going.
+        copy -- yield copies. With False the blocks are views, valid until the ring buffer wraps.
+        """
+        buffer = self._buffer
+        seq = buffer.count
+        while True:
+            running = self.isRunning()
+            buffer.wait(seq, timeout)
+            spectra, nextSeq, dropped = buffer.since(seq)
+            if len(spectra)>self._capacity:
+                # the oldest one is in the slot being read into
+                dropped += len(spectra) - self._capacity
+                spectra = spectra[-self._capacity:]
+            self._dropped += dropped
+            t = self._times.view(nextSeq-len(spectra), nextSeq)
+            seq = nextSeq
+            if len(spectra)>0 or running:
+                yield (t.copy(), spectra.copy()) if copy else (t, spectra)
+            if not running and len(spectra)==0:
+                if self._error is not None:
+                    raise self._error
+                return
+
+    def __iter__(self):
+        """
+        Yield (t, spectrum) of every new scan. spectrum is a view.
+        """
+        for t, spectra in self.iterBlocks(copy=False):
+            for i in range(len(spectra)):
+                yield t[i], spectra[i]
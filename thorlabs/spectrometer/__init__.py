@@ -1 +1,3 @@
-from . import CCS
\ No newline at end of file
+from ...ctools.lazy import lazyImporter
+
+__getattr__, __dir__ = lazyImporter(__name__, ['CCS', 'CCSStream', 'tools'])
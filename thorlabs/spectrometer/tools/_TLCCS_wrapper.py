@@ -1,6 +1,5 @@
 from ctypes import (
     Structure,
-    cdll,
     c_bool,
     c_short,
     c_int,
@@ -25,14 +24,11 @@ c_word = c_ushort
 c_dword = c_ulong
 
 
-from ....locateDll import locateDll
+from ....ctools.tools import bind, LazyLibrary
 libname = "TLCCS_64.dll"
 foldername = "IVI Foundation"
-dllpath  = locateDll(libname,  foldername)
-lib = cdll.LoadLibrary(dllpath.replace("\\","\\\\"))
+lib = LazyLibrary(libname, foldername)
 
-
-from ....ctools.tools import bind, null_function
 from ....ctools._visa_enum import *
 
 Init = bind(lib, "tlccs_init", [ViRsrc, ViBoolean, ViBoolean, ViPSession], ViStatus)
@@ -42,9 +38,11 @@ Close = bind(lib, "tlccs_close", [ViSession], ViStatus)
 GetDeviceStatus = bind(lib, "tlccs_getDeviceStatus", [ViSession, POINTER(c_int32)], ViStatus)
 
 StartScan = bind(lib, "tlccs_startScan", [ViSession], ViStatus)
+StartScanCont = bind(lib, "tlccs_startScanCont", [ViSession], ViStatus)
 
 GetScanData = bind(lib, "tlccs_getScanData", [ViSession, POINTER(c_double)], ViStatus)
 GetWavelengthData = bind(lib, "tlccs_getWavelengthData", [ViSession, c_int16, POINTER(c_double), POINTER(c_double), POINTER(c_double)], ViStatus)
+SetWavelengthData = bind(lib, "tlccs_setWavelengthData", [ViSession, POINTER(ViInt32), POINTER(ViReal64), ViInt32], ViStatus)
 
 GetIntegrationTime = bind(lib, "tlccs_getIntegrationTime", [ViSession, POINTER(c_double)], ViStatus)
 SetIntegrationTime = bind(lib, "tlccs_setIntegrationTime", [ViSession, c_double], ViStatus)
\ No newline at end of file